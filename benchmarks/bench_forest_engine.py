@@ -0,0 +1,80 @@
+# ==========================================
+# Benchmark: compiled forest vs scikit-learn
+# ==========================================
+#
+# Usage: python -m benchmarks.bench_forest_engine --batches 1 100 10000
+#
+# Checks that the compiled NumPy forest matches scikit-learn's
+# predict_proba on every single- and two-feature input plus random rows
+# (exit status 1 on a mismatch), then times single-row calls and batches
+# with both engines.
+
+import argparse
+import itertools
+import sys
+import time
+import warnings
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from config import MODEL_PATH, FEATURES_PATH
+from utils.forest_pack import PARITY_TOLERANCE, CompiledForest
+
+
+def _best_of(call, repeats: int):
+    best = float("inf")
+    for _ in range(repeats):
+        started = time.perf_counter()
+        call()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def check_parity(model, forest, feature_columns, random_rows: int):
+    width = len(feature_columns)
+    identity = np.eye(width, dtype=np.float32)
+    inputs = [np.zeros((1, width), dtype=np.float32), identity]
+    inputs += [identity[first] + identity[second] for first, second in itertools.combinations(range(width), 2)]
+    inputs.append((np.random.default_rng(1).random((random_rows, width)) < 0.3).astype(np.float32))
+    X = np.vstack(inputs)
+
+    expected = model.predict_proba(pd.DataFrame(X, columns=feature_columns))
+    actual = forest.predict_proba(X)
+    difference = float(np.abs(expected - actual).max())
+    labels_match = bool((expected.argmax(axis=1) == actual.argmax(axis=1)).all())
+    print(f"parity: {len(X)} rows, max |diff| {difference:.3g}, labels match: {labels_match}")
+    return difference <= PARITY_TOLERANCE and labels_match
+
+
+def run(batches, repeats: int, random_rows: int):
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        model = joblib.load(MODEL_PATH)
+    feature_columns = list(joblib.load(FEATURES_PATH))
+    forest = CompiledForest.from_sklearn(model, feature_columns)
+
+    if not check_parity(model, forest, feature_columns, random_rows):
+        print("REGRESSION: compiled forest does not match scikit-learn")
+        return 1
+
+    rng = np.random.default_rng(2)
+    print(f"{'rows':>8} {'sklearn ms':>11} {'numpy ms':>10} {'speedup':>8}")
+    for rows in batches:
+        X = (rng.random((rows, len(feature_columns))) < 0.3).astype(np.float32)
+        frame = pd.DataFrame(X, columns=feature_columns)
+        sklearn_seconds = _best_of(lambda: model.predict_proba(frame), repeats)
+        numpy_seconds = _best_of(lambda: forest.predict_proba(X), repeats)
+        print(f"{rows:>8} {sklearn_seconds * 1000:>11.3f} {numpy_seconds * 1000:>10.3f} {sklearn_seconds / numpy_seconds:>7.1f}x")
+
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--batches", type=int, nargs="+", default=[1, 100, 10000])
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--random-rows", type=int, default=10000)
+    args = parser.parse_args()
+    sys.exit(run(args.batches, args.repeats, args.random_rows))
@@ -0,0 +1,76 @@
+# ==========================================
+# Benchmark: sequential vs parallel VCF parsing
+# ==========================================
+#
+# Usage: python -m benchmarks.bench_parallel_parse --rows 2000000 --workers 1 2 4 8 [--bgzf]
+#
+# Checks that parse_vcf_parallel returns the same variants and warnings as
+# the sequential streaming parser and reports throughput per worker count.
+
+import argparse
+import multiprocessing
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from benchmarks.synthetic_vcf import write_bgzf, write_synthetic_vcf
+from services.vcf_parser import VCFStreamParser, iter_vcf_file, parse_vcf_parallel
+
+
+def _sequential(path):
+    parser = VCFStreamParser()
+    with open(path, "rb") as handle:
+        variants = list(iter_vcf_file(handle, parser))
+    return variants, parser.get_warnings()
+
+
+def _parallel(path, workers, executor):
+    parser = VCFStreamParser()
+    variants = parse_vcf_parallel(path, parser, workers, executor)
+    return variants, parser.get_warnings()
+
+
+def run(rows: int, worker_counts, bgzf: bool, pgx_fraction: float):
+    fd, path = tempfile.mkstemp(suffix=".vcf")
+    os.close(fd)
+    target = path + ".gz" if bgzf else path
+
+    try:
+        write_synthetic_vcf(path, rows, pgx_fraction=pgx_fraction)
+        if bgzf:
+            write_bgzf(path, target)
+        size_mib = os.path.getsize(target) / 1024 / 1024
+        print(f"rows={rows} file={size_mib:.1f} MiB bgzf={bgzf}")
+
+        started = time.perf_counter()
+        expected = _sequential(target)
+        baseline = time.perf_counter() - started
+        print(f"{'sequential':<12} {baseline:8.3f}s  {rows / baseline:12,.0f} rows/s")
+
+        for workers in worker_counts:
+            with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+                # Warm the pool so process start-up is not timed.
+                _parallel(target, workers, executor)
+                started = time.perf_counter()
+                result = _parallel(target, workers, executor)
+                elapsed = time.perf_counter() - started
+            status = "ok" if result == expected else "MISMATCH"
+            print(
+                f"{f'workers={workers}':<12} {elapsed:8.3f}s  {rows / elapsed:12,.0f} rows/s"
+                f"  x{baseline / elapsed:5.2f}  {status}"
+            )
+    finally:
+        for name in {path, target}:
+            if os.path.exists(name):
+                os.remove(name)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[2, 4])
+    parser.add_argument("--pgx-fraction", type=float, default=0.001)
+    parser.add_argument("--bgzf", action="store_true")
+    args = parser.parse_args()
+    run(args.rows, args.workers, args.bgzf, args.pgx_fraction)
@@ -0,0 +1,234 @@
+# ==========================================
+# Benchmark: every pipeline stage
+# ==========================================
+#
+# Usage: python -m benchmarks.bench_pipeline --rows 50000 --samples 1
+#        python -m benchmarks.bench_pipeline --compare baseline.json
+#
+# Times parse_vcf, build_diplotypes, determine_phenotype, rule_based_risk,
+# predict_risk and a full POST /analyze (LLM answered by a local fake Groq
+# server) on a deterministic synthetic VCF. Results go to a JSON file;
+# with --compare, every stage whose median time per operation grew by
+# more than --threshold against the baseline is flagged and the exit
+# status is 1.
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import warnings
+from datetime import datetime, timezone
+from pathlib import Path
+
+RESULTS_FORMAT = 1
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+PHENOTYPES = ["PM", "IM", "NM", "RM", "URM", "Unknown"]
+
+
+def _timings(call, repeats: int):
+    samples = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        call()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def _stage_result(samples, operations: int):
+    """
+    Seconds per call of the stage plus the same per operation (row,
+    diplotype, drug × phenotype pair or request).
+    """
+
+    median = statistics.median(samples)
+    return {
+        "operations": operations,
+        "repeats": len(samples),
+        "best_seconds": min(samples),
+        "median_seconds": median,
+        "mean_seconds": statistics.fmean(samples),
+        "median_seconds_per_op": median / operations,
+    }
+
+
+def _environment():
+    import numpy as np
+
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, cwd=Path(__file__).resolve().parent, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "commit": commit,
+    }
+
+
+def run_stages(config, repeats: int, analyze_repeats: int, llm_latency: float):
+    from benchmarks.fake_groq import start_fake_groq
+
+    server, base_url = start_fake_groq(latency=llm_latency)
+    os.environ["GROQ_BASE_URL"] = base_url
+    os.environ["GROQ_API_KEY"] = "benchmark"
+    # Set before config is imported: every request reaches the provider.
+    os.environ["EXPLANATION_CACHE_MAX_ENTRIES"] = "0"
+
+    from fastapi.testclient import TestClient
+
+    import main
+    from benchmarks.synthetic_vcf import synthetic_vcf_text
+    from services.genotype_service import ALLELE_DEFINITIONS, REFERENCE_ALLELE, build_diplotypes
+    from services.phenotype_mapper import determine_phenotype
+    from services.readiness import readiness
+    from services.rule_engine import rule_based_risk
+    from services.vcf_parser import parse_vcf
+    from utils.predictor import predict_risk
+
+    readiness.warm_up()
+
+    text = synthetic_vcf_text(**config)
+    variants = parse_vcf(text)
+
+    # Every pairing of a gene's defined stars (and the reference).
+    diplotypes = []
+    for gene, index in ALLELE_DEFINITIONS.items():
+        stars = [REFERENCE_ALLELE] + index.stars
+        diplotypes += [(gene, f"{first}/{second}") for first in stars for second in stars]
+    pairs = [(drug, phenotype) for drug in sorted(main.DRUG_GENE_MAP) for phenotype in PHENOTYPES]
+
+    def phenotype_all():
+        for gene, diplotype in diplotypes:
+            determine_phenotype(gene, diplotype)
+
+    def rules_all():
+        for drug, phenotype in pairs:
+            rule_based_risk(drug, phenotype)
+
+    def predict_all():
+        for drug, phenotype in pairs:
+            predict_risk(drug, phenotype)
+
+    results = {
+        "parse_vcf": _stage_result(_timings(lambda: parse_vcf(text), repeats), config["rows"]),
+        "build_diplotypes": _stage_result(_timings(lambda: build_diplotypes(variants), repeats), max(1, len(variants))),
+        "determine_phenotype": _stage_result(_timings(phenotype_all, repeats), len(diplotypes)),
+        "rule_based_risk": _stage_result(_timings(rules_all, repeats), len(pairs)),
+        "predict_risk": _stage_result(_timings(predict_all, repeats), len(pairs)),
+    }
+
+    drug = sorted(main.DRUG_GENE_MAP)[0]
+    uploads = iter(range(analyze_repeats + 1))
+
+    def analyze():
+        # A distinct header line per upload keeps the result cache cold.
+        body = f"##benchmark_upload={next(uploads)}\n{text}".encode("utf-8")
+        response = client.post("/analyze", files={"file": ("bench.vcf", body)}, data={"drug": drug})
+        if response.status_code != 200:
+            raise RuntimeError(f"/analyze returned {response.status_code}: {response.text[:200]}")
+
+    try:
+        with TestClient(main.app) as client:
+            analyze()
+            results["analyze"] = _stage_result(_timings(analyze, analyze_repeats), 1)
+    finally:
+        server.shutdown()
+
+    return results, {"variants": len(variants), "fake_llm_requests": server.config.requests}
+
+
+def compare(results, baseline, threshold: float):
+    """
+    Stages whose median time per operation grew by more than ``threshold``
+    (a fraction) over the baseline: list of (stage, baseline, current, ratio).
+    """
+
+    regressions = []
+    for stage, current in results["stages"].items():
+        previous = baseline.get("stages", {}).get(stage)
+        if previous is None:
+            continue
+        ratio = current["median_seconds_per_op"] / previous["median_seconds_per_op"]
+        current["baseline_ratio"] = ratio
+        if ratio > 1 + threshold:
+            regressions.append((stage, previous["median_seconds_per_op"], current["median_seconds_per_op"], ratio))
+    return regressions
+
+
+def run(args):
+    config = {
+        "rows": args.rows,
+        "pgx_fraction": args.pgx_fraction,
+        "seed": args.seed,
+        "samples": args.samples,
+        "missing_annotation_rate": args.missing_annotation_rate,
+        "malformed_rate": args.malformed_rate,
+    }
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        stages, details = run_stages(config, args.repeats, args.analyze_repeats, args.llm_latency)
+
+    results = {
+        "format": RESULTS_FORMAT,
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "environment": _environment(),
+        "config": {**config, "repeats": args.repeats, "analyze_repeats": args.analyze_repeats, "llm_latency": args.llm_latency},
+        "details": details,
+        "stages": stages,
+    }
+
+    regressions = []
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as handle:
+            baseline = json.load(handle)
+        if baseline.get("config") != results["config"]:
+            print(f"⚠️ {args.compare} was recorded with a different configuration")
+        regressions = compare(results, baseline, args.threshold)
+
+    print(f"{'stage':<20} {'ops':>8} {'median ms':>10} {'best ms':>10} {'µs/op':>10} {'vs base':>8}")
+    for stage, result in stages.items():
+        ratio = result.get("baseline_ratio")
+        print(
+            f"{stage:<20} {result['operations']:>8} {result['median_seconds'] * 1000:>10.3f} "
+            f"{result['best_seconds'] * 1000:>10.3f} {result['median_seconds_per_op'] * 1e6:>10.2f} "
+            f"{'' if ratio is None else f'{ratio:.2f}x':>8}"
+        )
+
+    output = Path(args.output) if args.output else RESULTS_DIR / f"pipeline-{datetime.now():%Y%m%d-%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "w", encoding="utf-8") as handle:
+        json.dump(results, handle, indent=2)
+    print(f"✅ Results written to {output}")
+
+    for stage, previous, current, ratio in regressions:
+        print(f"REGRESSION: {stage} {previous * 1e6:.2f} → {current * 1e6:.2f} µs/op ({ratio:.2f}x)")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--pgx-fraction", type=float, default=0.01)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--samples", type=int, default=1, help="GT columns per row (0 for sites-only)")
+    parser.add_argument("--missing-annotation-rate", type=float, default=0.02, help="PGx rows missing STAR or ID")
+    parser.add_argument("--malformed-rate", type=float, default=0.001, help="rows with fewer than 8 columns")
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--analyze-repeats", type=int, default=10)
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="fake Groq seconds per response")
+    parser.add_argument("--output", help=f"results file (default: {RESULTS_DIR}/pipeline-<time>.json)")
+    parser.add_argument("--compare", help="baseline results file to check against")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown before a stage is flagged")
+    sys.exit(run(parser.parse_args()))
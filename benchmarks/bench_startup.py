@@ -0,0 +1,73 @@
+# ==========================================
+# Benchmark: import time and cold start
+# ==========================================
+#
+# Usage: python -m benchmarks.bench_startup --runs 5 --max-import-seconds 1.5
+#
+# Each run is a fresh interpreter. Reports the time to import ``main``,
+# the time until ``/`` answers and the time until ``/ready`` reports
+# ready, and fails when any heavy module is imported by ``main`` itself or
+# the import time exceeds the limit.
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+# Modules that must only load on first use or during warm-up.
+LAZY_MODULES = ("pandas", "sklearn", "joblib", "groq", "dotenv")
+
+_PROBE = r"""
+import json, sys, time
+started = time.perf_counter()
+import main
+imported = time.perf_counter() - started
+eager = [name for name in %(lazy)r if name in sys.modules]
+
+from fastapi.testclient import TestClient
+with TestClient(main.app) as client:
+    client.get("/")
+    first_response = time.perf_counter() - started
+    while client.get("/ready").status_code != 200:
+        time.sleep(0.01)
+    ready = time.perf_counter() - started
+
+print(json.dumps({"import": imported, "first_response": first_response, "ready": ready, "eager": eager}))
+"""
+
+
+def _probe():
+    output = subprocess.run(
+        [sys.executable, "-c", _PROBE % {"lazy": LAZY_MODULES}],
+        check=True, capture_output=True, text=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def run(runs: int, max_import_seconds: float):
+    results = [_probe() for _ in range(runs)]
+
+    for key in ("import", "first_response", "ready"):
+        values = [result[key] for result in results]
+        print(f"{key:<16} median {statistics.median(values):7.3f}s  max {max(values):7.3f}s")
+
+    eager = sorted({name for result in results for name in result["eager"]})
+    failures = []
+    if eager:
+        failures.append(f"imported by main: {', '.join(eager)}")
+    slowest = max(result["import"] for result in results)
+    if slowest > max_import_seconds:
+        failures.append(f"import took {slowest:.3f}s (limit {max_import_seconds:.3f}s)")
+
+    for failure in failures:
+        print(f"REGRESSION: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--max-import-seconds", type=float, default=1.5)
+    args = parser.parse_args()
+    sys.exit(run(args.runs, args.max_import_seconds))
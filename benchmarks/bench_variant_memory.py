@@ -0,0 +1,66 @@
+# ==========================================
+# Benchmark: variant and warning memory
+# ==========================================
+#
+# Usage: python -m benchmarks.bench_variant_memory --variants 1000000
+#
+# Compares tracemalloc usage of per-variant dicts against VariantRecord
+# and of a per-row warning list against the parser's warning counter.
+
+import argparse
+import random
+import tracemalloc
+from collections import Counter
+
+from benchmarks.synthetic_vcf import PGX_STARS
+from services.vcf_parser import TARGET_GENES, VariantRecord
+
+
+def _measure(build):
+    tracemalloc.start()
+    kept = build()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del kept
+    return current
+
+
+def _rows(count: int):
+    rng = random.Random(7)
+    for index in range(count):
+        # Decoded fields are fresh strings per row, as in the parser.
+        yield "".join(rng.choice(TARGET_GENES)), f"rs{index}", "".join(rng.choice(PGX_STARS))
+
+
+def run(count: int):
+    dict_bytes = _measure(lambda: [{"gene": g, "rsid": r, "star": s} for g, r, s in _rows(count)])
+    record_bytes = _measure(lambda: [VariantRecord(g, r, s) for g, r, s in _rows(count)])
+
+    print(f"variants={count}")
+    print(f"{'dict':<16} {dict_bytes / count:8.1f} B/variant")
+    print(f"{'VariantRecord':<16} {record_bytes / count:8.1f} B/variant  x{dict_bytes / record_bytes:5.2f}")
+
+    def warning_list():
+        warnings = []
+        for gene, _, _ in _rows(count):
+            warnings.append(f"STAR annotation missing for {gene}; defaulted to Unknown.")
+        return warnings
+
+    def warning_counter():
+        warnings = Counter()
+        for gene, _, _ in _rows(count):
+            warnings[f"STAR annotation missing for {gene}; defaulted to Unknown."] += 1
+        return warnings
+
+    list_bytes = _measure(warning_list)
+    counter_bytes = _measure(warning_counter)
+    print(f"warnings={count}")
+    print(f"{'list per row':<16} {list_bytes / 1024 / 1024:8.2f} MiB")
+    print(f"{'Counter':<16} {counter_bytes / 1024:8.2f} KiB")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--variants", type=int, default=1_000_000)
+    args = parser.parse_args()
+    run(args.variants)
@@ -0,0 +1,59 @@
+# ==========================================
+# Benchmark: byte-level PGx pre-filter
+# ==========================================
+#
+# Usage: python -m benchmarks.bench_vcf_prefilter --rows 3000000
+#
+# Parses the same synthetic VCF with the pre-filter on and off, checks the
+# variants and warnings match and reports throughput for both. Runs once
+# with GENE-less non-PGx rows and once with every row annotated.
+
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.synthetic_vcf import write_synthetic_vcf
+from services.vcf_parser import VCFStreamParser, iter_vcf_file
+
+
+class FullParseVCFParser(VCFStreamParser):
+    prefilter = False
+
+
+def _parse(path, parser):
+    started = time.perf_counter()
+    with open(path, "rb") as handle:
+        variants = list(iter_vcf_file(handle, parser))
+    return variants, parser.get_warnings(), time.perf_counter() - started
+
+
+def run(rows: int, pgx_fraction: float, annotated: bool):
+    fd, path = tempfile.mkstemp(suffix=".vcf")
+    os.close(fd)
+
+    try:
+        write_synthetic_vcf(path, rows, pgx_fraction=pgx_fraction, annotated=annotated)
+        size_mib = os.path.getsize(path) / 1024 / 1024
+        print(f"rows={rows} file={size_mib:.1f} MiB pgx_fraction={pgx_fraction} annotated={annotated}")
+
+        full_variants, full_warnings, full_time = _parse(path, FullParseVCFParser())
+        fast_variants, fast_warnings, fast_time = _parse(path, VCFStreamParser())
+
+        print(f"{'full parse':<12} {full_time:8.3f}s  {rows / full_time:12,.0f} rows/s")
+        print(f"{'pre-filter':<12} {fast_time:8.3f}s  {rows / fast_time:12,.0f} rows/s  x{full_time / fast_time:5.2f}")
+        same = full_variants == fast_variants and full_warnings == fast_warnings
+        print(f"variants {len(fast_variants)}  output {'identical' if same else 'MISMATCH'}")
+    finally:
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=3_000_000)
+    parser.add_argument("--pgx-fraction", type=float, default=0.0001)
+    parser.add_argument("--annotated", choices=["no", "yes", "both"], default="both",
+                        help="give non-PGx rows a GENE annotation")
+    args = parser.parse_args()
+    for annotated in {"no": [False], "yes": [True], "both": [False, True]}[args.annotated]:
+        run(args.rows, args.pgx_fraction, annotated)
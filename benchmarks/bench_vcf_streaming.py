@@ -0,0 +1,58 @@
+# ==========================================
+# Benchmark: whole-file vs streaming VCF parsing
+# ==========================================
+#
+# Usage: python -m benchmarks.bench_vcf_streaming --rows 500000
+#
+# Reports wall time and tracemalloc peak for the legacy
+# read + decode + parse_vcf path and for the chunked streaming parser.
+
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.synthetic_vcf import write_synthetic_vcf
+from services.vcf_parser import VCFStreamParser, iter_vcf_file, parse_vcf
+
+
+def _measure(label, func):
+    tracemalloc.start()
+    started = time.perf_counter()
+    variants = func()
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<10} {elapsed:8.3f}s  peak {peak / 1024 / 1024:8.2f} MiB  variants {len(variants)}")
+
+
+def run(rows: int, chunk_size: int):
+    fd, path = tempfile.mkstemp(suffix=".vcf")
+    os.close(fd)
+
+    try:
+        write_synthetic_vcf(path, rows)
+        size_mib = os.path.getsize(path) / 1024 / 1024
+        print(f"rows={rows} file={size_mib:.1f} MiB chunk={chunk_size}")
+
+        def whole_file():
+            with open(path, "rb") as handle:
+                return parse_vcf(handle.read().decode("utf-8"))
+
+        def streaming():
+            with open(path, "rb") as handle:
+                return list(iter_vcf_file(handle, VCFStreamParser(), chunk_size))
+
+        _measure("whole-file", whole_file)
+        _measure("streaming", streaming)
+    finally:
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    cli = argparse.ArgumentParser(description=__doc__)
+    cli.add_argument("--rows", type=int, default=500_000)
+    cli.add_argument("--chunk-size", type=int, default=1024 * 1024)
+    args = cli.parse_args()
+    run(args.rows, args.chunk_size)
@@ -0,0 +1,79 @@
+# ==========================================
+# Benchmark: model memory across worker processes
+# ==========================================
+#
+# Usage: python -m benchmarks.bench_worker_memory --workers 1 4 16
+#
+# Starts N worker-like processes that each load the model and score a
+# batch, then reads /proc/<pid>/smaps_rollup while they are all alive.
+# RSS counts shared pages once per process; PSS splits them between the
+# processes sharing them, so summed PSS is the real footprint. Run once per
+# MODEL_FORMAT (pickle vs packed). Linux only.
+
+import argparse
+import os
+import subprocess
+import sys
+
+_WORKER = r"""
+import sys
+from ml_model import model_instance
+from utils.predictor import predict_risk_batch
+model_instance.ensure_loaded()
+predict_risk_batch([("CODEINE", "PM"), ("NEWDRUG", "IM")] * 100)
+print("ready", flush=True)
+sys.stdin.read()
+"""
+
+
+def _smaps_rollup(pid: int):
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup", "r", encoding="utf-8") as handle:
+        for line in handle:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                values[parts[0].rstrip(":")] = int(parts[1])
+    return values
+
+
+def measure(model_format: str, workers: int):
+    env = dict(os.environ, MODEL_FORMAT=model_format, PYTHONWARNINGS="ignore")
+    processes = [
+        subprocess.Popen(
+            [sys.executable, "-c", _WORKER],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, env=env, text=True
+        )
+        for _ in range(workers)
+    ]
+
+    try:
+        for process in processes:
+            while process.stdout.readline().strip() != "ready":
+                if process.poll() is not None:
+                    raise RuntimeError(f"worker exited with {process.returncode}")
+        rollups = [_smaps_rollup(process.pid) for process in processes]
+    finally:
+        for process in processes:
+            process.stdin.close()
+        for process in processes:
+            process.wait()
+
+    rss = sum(rollup.get("Rss", 0) for rollup in rollups) / 1024
+    pss = sum(rollup.get("Pss", 0) for rollup in rollups) / 1024
+    return rss, pss
+
+
+def run(worker_counts, formats):
+    print(f"{'format':<8} {'workers':>7} {'sum RSS MiB':>12} {'sum PSS MiB':>12} {'PSS/worker':>11}")
+    for model_format in formats:
+        for workers in worker_counts:
+            rss, pss = measure(model_format, workers)
+            print(f"{model_format:<8} {workers:>7} {rss:>12.1f} {pss:>12.1f} {pss / workers:>11.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--formats", nargs="+", default=["pickle", "packed"])
+    args = parser.parse_args()
+    run(args.workers, args.formats)
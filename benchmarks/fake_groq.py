@@ -0,0 +1,119 @@
+# ==========================================
+# Local Fake Groq Provider
+# ==========================================
+#
+# Usage: python -m benchmarks.fake_groq --port 18080 --latency 0.5 --error-rate 0.1
+#
+# Serves the OpenAI-compatible chat completions route used by the Groq SDK.
+# Point the app at it with GROQ_BASE_URL=http://127.0.0.1:18080 and any
+# GROQ_API_KEY.
+
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+COMPLETION_TEXT = (
+    "Genotype changes expected drug response for this patient.\n"
+    "Altered enzyme activity changes drug activation or clearance.\n"
+    "Your doctor may adjust the dose or choose another drug."
+)
+
+
+class FakeGroqConfig:
+    def __init__(self, latency=0.0, error_rate=0.0, slow_rate=0.0, slow_latency=0.0, seed=None):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.slow_rate = slow_rate
+        self.slow_latency = slow_latency
+        self.rng = random.Random(seed)
+        self.requests = 0
+        self.errors = 0
+        self.slow = 0
+        self.lock = threading.Lock()
+
+
+def _make_handler(config: FakeGroqConfig):
+
+    class FakeGroqHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def do_POST(self):
+            length = int(self.headers.get("content-length", 0))
+            self.rfile.read(length)
+
+            with config.lock:
+                config.requests += 1
+                slow = config.rng.random() < config.slow_rate
+                failed = config.rng.random() < config.error_rate
+                config.slow += slow
+                config.errors += failed
+
+            time.sleep(config.slow_latency if slow else config.latency)
+
+            if failed:
+                self._send(500, {"error": {"message": "fake provider error", "type": "server_error"}})
+                return
+
+            self._send(200, {
+                "id": f"chatcmpl-fake-{config.requests}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": "fake",
+                "choices": [{
+                    "index": 0,
+                    "finish_reason": "stop",
+                    "message": {"role": "assistant", "content": COMPLETION_TEXT}
+                }],
+                "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2}
+            })
+
+        def _send(self, status, payload):
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("content-type", "application/json")
+            self.send_header("content-length", str(len(body)))
+            self.end_headers()
+            try:
+                self.wfile.write(body)
+            except (BrokenPipeError, ConnectionResetError):
+                # The client gave up (timeout); nothing left to do.
+                pass
+
+        def log_message(self, *args):
+            pass
+
+    return FakeGroqHandler
+
+
+def start_fake_groq(port: int = 0, **options):
+    """
+    Start the fake provider on a background thread.
+    Returns (server, base_url); call ``server.shutdown()`` to stop it.
+    """
+
+    config = FakeGroqConfig(**options)
+    server = ThreadingHTTPServer(("127.0.0.1", port), _make_handler(config))
+    server.daemon_threads = True
+    server.config = config
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+if __name__ == "__main__":
+    cli = argparse.ArgumentParser(description="Fake Groq chat completions server")
+    cli.add_argument("--port", type=int, default=18080)
+    cli.add_argument("--latency", type=float, default=0.0, help="seconds per response")
+    cli.add_argument("--error-rate", type=float, default=0.0, help="fraction of HTTP 500 responses")
+    cli.add_argument("--slow-rate", type=float, default=0.0, help="fraction of slow-tail responses")
+    cli.add_argument("--slow-latency", type=float, default=0.0, help="seconds for slow-tail responses")
+    cli.add_argument("--seed", type=int, default=None)
+    args = cli.parse_args()
+
+    config = FakeGroqConfig(args.latency, args.error_rate, args.slow_rate, args.slow_latency, args.seed)
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), _make_handler(config))
+    print(f"Fake Groq listening on http://127.0.0.1:{args.port}")
+    server.serve_forever()
@@ -0,0 +1,346 @@
+# ==========================================
+# Load Test: /analyze against a fake Groq provider
+# ==========================================
+#
+# Usage: python -m benchmarks.load_test --workers 2 --rates 5 10 20 --duration 30 \
+#            --llm-latency 0.5 --llm-error-rate 0.02 --llm-slow-rate 0.05 --llm-slow-latency 4
+#
+# Starts the fake Groq server and ``uvicorn main:app`` with --workers
+# pointed at it (or drives an app that is already running, with --url),
+# then sends multipart VCF uploads to /analyze at each target rate for
+# --duration seconds. Arrivals are open-loop: requests are sent on
+# schedule whether or not earlier ones have finished, and latency is
+# measured from the scheduled send time, so a backed-up server shows up
+# in the percentiles instead of slowing the client down.
+#
+# Per rate it reports throughput, latency percentiles, the llm stage from
+# the Server-Timing header, errors by kind and the fake provider's
+# injected failures, and whether the rate was sustained: the error rate
+# (and p99, with --p99-slo) stayed under the limit and requests did not
+# queue up, i.e. the median latency of the last quarter of arrivals is
+# within LATENCY_GROWTH of the first quarter's.
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+import httpx
+
+from benchmarks.fake_groq import start_fake_groq
+from benchmarks.synthetic_vcf import synthetic_vcf_text
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+# Largest last-quarter / first-quarter median latency of a sustained rate.
+LATENCY_GROWTH = 1.5
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_app(workers: int, llm_url: str, explanation_cache: bool, ready_timeout: float):
+    """
+    Run uvicorn with ``workers`` processes; returns (process, base_url)
+    once /ready answers.
+    """
+
+    port = _free_port()
+    env = dict(os.environ, GROQ_BASE_URL=llm_url, GROQ_API_KEY="load-test", PYTHONWARNINGS="ignore")
+    if not explanation_cache:
+        env["EXPLANATION_CACHE_MAX_ENTRIES"] = "0"
+
+    process = subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "main:app",
+            "--host", "127.0.0.1", "--port", str(port),
+            "--workers", str(workers), "--log-level", "warning",
+        ],
+        cwd=BASE_DIR, env=env
+    )
+    url = f"http://127.0.0.1:{port}"
+
+    deadline = time.monotonic() + ready_timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"uvicorn exited with {process.returncode}")
+        try:
+            if httpx.get(f"{url}/ready", timeout=1).status_code == 200:
+                return process, url
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+
+    stop_app(process)
+    raise RuntimeError(f"app not ready after {ready_timeout:.0f}s")
+
+
+def stop_app(process):
+    process.terminate()
+    try:
+        process.wait(timeout=15)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+
+def _server_timing(header):
+    timings = {}
+    for entry in header.split(","):
+        name, _, duration = entry.strip().partition(";dur=")
+        if duration:
+            timings[name] = float(duration) / 1000
+    return timings
+
+
+def percentile(values, fraction: float):
+    """
+    Nearest-rank percentile of an already sorted list (None if empty).
+    """
+
+    if not values:
+        return None
+    rank = max(1, int(-(-fraction * len(values) // 1)))
+    return values[rank - 1]
+
+
+class Uploads:
+    """
+    The request bodies: one synthetic VCF, made distinct per request with a
+    header line so the result cache is not hit (unless ``reuse``).
+    """
+
+    def __init__(self, text: str, drugs, reuse: bool):
+        self.text = text
+        self.drugs = drugs
+        self.reuse = reuse
+        self.sent = 0
+
+    def next(self):
+        number = self.sent
+        self.sent += 1
+        body = self.text if self.reuse else f"##load_test_upload={number}\n{self.text}"
+        return body.encode("utf-8"), self.drugs[number % len(self.drugs)]
+
+
+async def _send(client, url, uploads, scheduled, timeout):
+    body, drug = uploads.next()
+    try:
+        response = await client.post(
+            f"{url}/analyze",
+            files={"file": ("load_test.vcf", body, "text/plain")},
+            data={"drug": drug},
+            timeout=timeout
+        )
+        outcome = "ok" if response.status_code == 200 else f"http_{response.status_code}"
+        timings = _server_timing(response.headers.get("server-timing", ""))
+    except httpx.HTTPError as exc:
+        outcome = type(exc).__name__
+        timings = {}
+    return outcome, time.perf_counter() - scheduled, timings
+
+
+async def drive(url, uploads, rate: float, duration: float, timeout: float, max_in_flight: int):
+    """
+    Send ``rate`` requests per second for ``duration`` seconds and wait
+    for them all. Arrivals that find ``max_in_flight`` requests pending are
+    not sent and count as ``client_saturated``.
+    """
+
+    limits = httpx.Limits(max_connections=max_in_flight, max_keepalive_connections=max_in_flight)
+    async with httpx.AsyncClient(limits=limits) as client:
+        tasks = []
+        in_flight = 0
+        skipped = 0
+
+        async def tracked(scheduled):
+            nonlocal in_flight
+            try:
+                return await _send(client, url, uploads, scheduled, timeout)
+            finally:
+                in_flight -= 1
+
+        started = time.perf_counter()
+        for number in range(max(1, round(rate * duration))):
+            scheduled = started + number / rate
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if in_flight >= max_in_flight:
+                skipped += 1
+                continue
+            in_flight += 1
+            tasks.append(asyncio.create_task(tracked(scheduled)))
+
+        results = await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - started
+
+    return results, skipped, elapsed
+
+
+def summarize(rate: float, results, skipped: int, elapsed: float, limits):
+    outcomes = Counter(outcome for outcome, _, _ in results)
+    if skipped:
+        outcomes["client_saturated"] = skipped
+    attempted = len(results) + skipped
+    ok = outcomes.get("ok", 0)
+
+    # Results are in arrival order; a growing backlog shows as latency
+    # rising from the first quarter of arrivals to the last.
+    quarter = max(1, len(results) // 4)
+    first = sorted(latency for outcome, latency, _ in results[:quarter] if outcome == "ok")
+    last = sorted(latency for outcome, latency, _ in results[-quarter:] if outcome == "ok")
+    growth = percentile(last, 0.5) / percentile(first, 0.5) if first and last else None
+
+    latencies = sorted(latency for outcome, latency, _ in results if outcome == "ok")
+    llm = sorted(timings["llm"] for outcome, _, timings in results if outcome == "ok" and "llm" in timings)
+
+    throughput = ok / elapsed if elapsed else 0.0
+    error_rate = (attempted - ok) / attempted if attempted else 0.0
+    p99 = percentile(latencies, 0.99)
+
+    return {
+        "target_rps": rate,
+        "attempted": attempted,
+        "ok": ok,
+        "elapsed_seconds": elapsed,
+        "throughput_rps": throughput,
+        "error_rate": error_rate,
+        "errors": {outcome: count for outcome, count in sorted(outcomes.items()) if outcome != "ok"},
+        "latency_seconds": {
+            "p50": percentile(latencies, 0.50),
+            "p90": percentile(latencies, 0.90),
+            "p99": p99,
+            "max": latencies[-1] if latencies else None,
+        },
+        "llm_seconds": {
+            "p50": percentile(llm, 0.50),
+            "p99": percentile(llm, 0.99),
+        },
+        "latency_growth": growth,
+        "sustained": (
+            error_rate <= limits["max_error_rate"]
+            and growth is not None
+            and growth <= LATENCY_GROWTH
+            and (limits["p99_slo"] is None or p99 <= limits["p99_slo"])
+        ),
+    }
+
+
+def _ms(seconds):
+    return "-" if seconds is None else f"{seconds * 1000:.0f}"
+
+
+def _print_row(summary):
+    latency = summary["latency_seconds"]
+    errors = ", ".join(f"{name}={count}" for name, count in summary["errors"].items()) or "-"
+    print(
+        f"{summary['target_rps']:>7.1f} {summary['throughput_rps']:>8.2f} "
+        f"{_ms(latency['p50']):>7} {_ms(latency['p90']):>7} {_ms(latency['p99']):>7} {_ms(latency['max']):>7} "
+        f"{_ms(summary['llm_seconds']['p50']):>8} {_ms(summary['llm_seconds']['p99']):>8} "
+        f"{'yes' if summary['sustained'] else 'no':>9}  {errors}  "
+        f"(llm 500s={summary['provider']['errors']} slow={summary['provider']['slow']})"
+    )
+
+
+def run(args):
+    provider, llm_url = start_fake_groq(
+        latency=args.llm_latency,
+        error_rate=args.llm_error_rate,
+        slow_rate=args.llm_slow_rate,
+        slow_latency=args.llm_slow_latency,
+        seed=args.seed
+    )
+
+    app = None
+    url = args.url
+    if url is None:
+        app, url = start_app(args.workers, llm_url, args.explanation_cache, args.ready_timeout)
+    else:
+        print(f"⚠️ Driving {url}; the app must be started with GROQ_BASE_URL={llm_url}")
+
+    uploads = Uploads(
+        synthetic_vcf_text(args.rows, args.pgx_fraction, args.seed, samples=1),
+        [drug.upper() for drug in args.drugs],
+        args.reuse_uploads
+    )
+    limits = {"max_error_rate": args.max_error_rate, "p99_slo": args.p99_slo}
+
+    summaries = []
+    try:
+        # Warm every worker's connections and code paths before measuring.
+        asyncio.run(drive(url, uploads, max(1.0, args.workers), args.warmup, args.timeout, args.max_in_flight))
+
+        print(
+            f"workers={args.workers} llm latency={args.llm_latency}s errors={args.llm_error_rate:.0%} "
+            f"slow={args.llm_slow_rate:.0%}@{args.llm_slow_latency}s rows={args.rows}"
+        )
+        print(
+            f"{'target':>7} {'ok/s':>8} {'p50 ms':>7} {'p90 ms':>7} {'p99 ms':>7} {'max ms':>7} "
+            f"{'llm p50':>8} {'llm p99':>8} {'sustained':>9}  errors"
+        )
+        for rate in args.rates:
+            before = (provider.config.requests, provider.config.errors, provider.config.slow)
+            results, skipped, elapsed = asyncio.run(
+                drive(url, uploads, rate, args.duration, args.timeout, args.max_in_flight)
+            )
+            summary = summarize(rate, results, skipped, elapsed, limits)
+            summary["provider"] = {
+                "requests": provider.config.requests - before[0],
+                "errors": provider.config.errors - before[1],
+                "slow": provider.config.slow - before[2],
+            }
+            summaries.append(summary)
+            _print_row(summary)
+    finally:
+        if app is not None:
+            stop_app(app)
+        provider.shutdown()
+
+    sustained = [summary["target_rps"] for summary in summaries if summary["sustained"]]
+    if sustained:
+        best = max(sustained)
+        print(f"✅ Highest sustained rate: {best:g} req/s ({best / args.workers:.2f} per worker)")
+    else:
+        print("⚠️ No target rate was sustained")
+
+    if args.output:
+        config = {key: value for key, value in vars(args).items() if key != "output"}
+        with open(args.output, "w", encoding="utf-8") as handle:
+            json.dump({"config": config, "rates": summaries}, handle, indent=2)
+        print(f"✅ Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--url", help="drive an already running app instead of starting one")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--rates", type=float, nargs="+", default=[2, 5, 10, 20], help="target requests per second")
+    parser.add_argument("--duration", type=float, default=20, help="seconds per rate")
+    parser.add_argument("--warmup", type=float, default=3, help="seconds of warm-up traffic")
+    parser.add_argument("--timeout", type=float, default=30, help="client timeout per request")
+    parser.add_argument("--max-in-flight", type=int, default=256)
+    parser.add_argument("--drugs", nargs="+", default=["CODEINE", "WARFARIN", "CLOPIDOGREL"])
+    parser.add_argument("--rows", type=int, default=5000, help="rows per uploaded VCF")
+    parser.add_argument("--pgx-fraction", type=float, default=0.01)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--reuse-uploads", action="store_true", help="send identical files (result cache hits)")
+    parser.add_argument("--explanation-cache", action="store_true", help="keep the LLM explanation cache on")
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="fake Groq seconds per response")
+    parser.add_argument("--llm-error-rate", type=float, default=0.0, help="fraction of HTTP 500 responses")
+    parser.add_argument("--llm-slow-rate", type=float, default=0.0, help="fraction of slow-tail responses")
+    parser.add_argument("--llm-slow-latency", type=float, default=5.0, help="seconds for slow-tail responses")
+    parser.add_argument("--max-error-rate", type=float, default=0.01, help="highest error rate still sustained")
+    parser.add_argument("--p99-slo", type=float, default=None, help="highest p99 seconds still sustained")
+    parser.add_argument("--ready-timeout", type=float, default=60)
+    parser.add_argument("--output", help="write the results as JSON")
+    run(parser.parse_args())
@@ -0,0 +1,141 @@
+# ==========================================
+# Synthetic VCF Generator (benchmarks)
+# ==========================================
+#
+# Deterministic for a given set of options: the same seed always yields
+# the same file. PGx rows use rsIDs and stars from the allele definitions,
+# so diplotype resolution does real work.
+
+import random
+
+from services.genotype_service import ALLELE_DEFINITIONS
+from services.vcf_parser import TARGET_GENES
+
+PGX_STARS = ["*1", "*2", "*3", "*4", "*17"]
+
+# (rsid, star) sites per gene, in a fixed order.
+PGX_SITES = {
+    gene: [
+        (rsid, star)
+        for star, rsids in zip(ALLELE_DEFINITIONS[gene].stars, ALLELE_DEFINITIONS[gene].rsids)
+        for rsid in sorted(rsids)
+    ]
+    for gene in TARGET_GENES
+    if gene in ALLELE_DEFINITIONS
+}
+
+# GENE values of non-PGx rows in fully annotated files.
+OTHER_GENES = ["BRCA1", "TP53", "EGFR", "APOE", "LDLR", "MTHFR"]
+
+# Sample calls, weighted towards the reference like a real cohort.
+SAMPLE_GENOTYPES = ["0/0", "0/1", "1/1", "0|1", "1|0", "./."]
+SAMPLE_GENOTYPE_WEIGHTS = [60, 15, 5, 8, 8, 4]
+
+VCF_HEADER = (
+    "##fileformat=VCFv4.2\n"
+    "##INFO=<ID=GENE,Number=1,Type=String,Description=\"Gene symbol\">\n"
+    "##INFO=<ID=STAR,Number=1,Type=String,Description=\"Star allele\">\n"
+    "#CHROM\tPOS\tID\tREF\tALT\tQUAL\tFILTER\tINFO\n"
+)
+
+
+def _header(samples: int):
+    if not samples:
+        return VCF_HEADER
+    names = "\t".join(f"SAMPLE{number}" for number in range(1, samples + 1))
+    return (
+        VCF_HEADER[:-1]
+        .replace("#CHROM", "##FORMAT=<ID=GT,Number=1,Type=String,Description=\"Genotype\">\n#CHROM")
+        + f"\tFORMAT\t{names}\n"
+    )
+
+
+def iter_synthetic_vcf_lines(
+    rows: int,
+    pgx_fraction: float = 0.0001,
+    seed: int = 42,
+    samples: int = 0,
+    missing_annotation_rate: float = 0.0,
+    malformed_rate: float = 0.0,
+    annotated: bool = False
+):
+    """
+    Yield the lines of a deterministic synthetic VCF.
+
+    ``samples`` adds a GT column per sample. ``missing_annotation_rate`` is
+    the fraction of PGx rows missing their STAR or ID, and
+    ``malformed_rate`` the fraction of rows cut short of 8 columns. With
+    ``annotated`` every non-PGx row carries the GENE of a non-target gene,
+    as in a fully annotated file.
+    """
+
+    rng = random.Random(seed)
+    genes = [gene for gene in TARGET_GENES if gene in PGX_SITES]
+
+    yield _header(samples)
+
+    for index in range(rows):
+        pos = 10000 + index * 37
+
+        if malformed_rate and rng.random() < malformed_rate:
+            yield f"chr1\t{pos}\trs{index}\tA\n"
+            continue
+
+        rsid = f"rs{index}"
+        if rng.random() < pgx_fraction:
+            gene = rng.choice(genes)
+            rsid, star = rng.choice(PGX_SITES[gene])
+            info = f"GENE={gene};STAR={star}"
+            if missing_annotation_rate and rng.random() < missing_annotation_rate:
+                if rng.random() < 0.5:
+                    info = f"GENE={gene}"
+                else:
+                    rsid = "."
+        else:
+            info = f"DP={rng.randint(5, 80)};AF=0.5"
+            if annotated:
+                info = f"GENE={OTHER_GENES[index % len(OTHER_GENES)]};{info}"
+
+        line = f"chr1\t{pos}\t{rsid}\tA\tG\t50\tPASS\t{info}"
+        if samples:
+            calls = rng.choices(SAMPLE_GENOTYPES, SAMPLE_GENOTYPE_WEIGHTS, k=samples)
+            line += "\tGT\t" + "\t".join(calls)
+        yield line + "\n"
+
+
+def write_synthetic_vcf(path, rows: int, pgx_fraction: float = 0.0001, seed: int = 42, **options):
+    with open(path, "w", encoding="utf-8") as handle:
+        for line in iter_synthetic_vcf_lines(rows, pgx_fraction, seed, **options):
+            handle.write(line)
+    return path
+
+
+def synthetic_vcf_text(rows: int, pgx_fraction: float = 0.0001, seed: int = 42, **options) -> str:
+    return "".join(iter_synthetic_vcf_lines(rows, pgx_fraction, seed, **options))
+
+
+def write_bgzf(source_path, target_path, block_size: int = 65280):
+    """
+    Compress ``source_path`` into BGZF blocks, like ``bgzip``.
+    """
+
+    import struct
+    import zlib
+
+    def block(data: bytes) -> bytes:
+        compressor = zlib.compressobj(6, zlib.DEFLATED, -zlib.MAX_WBITS)
+        payload = compressor.compress(data) + compressor.flush()
+        header = b"\x1f\x8b\x08\x04\x00\x00\x00\x00\x00\xff\x06\x00BC\x02\x00"
+        size = struct.pack("<H", len(header) + 2 + len(payload) + 8 - 1)
+        footer = struct.pack("<II", zlib.crc32(data), len(data))
+        return header + size + payload + footer
+
+    with open(source_path, "rb") as source, open(target_path, "wb") as target:
+        while True:
+            data = source.read(block_size)
+            if not data:
+                break
+            target.write(block(data))
+        target.write(block(b""))
+
+    return target_path
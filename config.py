@@ -1,6 +1,104 @@
+import os
+import tempfile
 from pathlib import Path
 
 BASE_DIR = Path(__file__).resolve().parent
 
 MODEL_PATH = BASE_DIR / "models" / "pharmaguard_random_forest.pkl"
 FEATURES_PATH = BASE_DIR / "models" / "model_features.pkl"
+
+# Memory-mappable form of the same forest (python -m utils.forest_pack),
+# shared by all workers through the page cache. MODEL_FORMAT is "auto"
+# (packed when it was built from the current pickle), "packed" or "pickle".
+PACKED_MODEL_PATH = Path(os.getenv("PACKED_MODEL_PATH", str(BASE_DIR / "models" / "pharmaguard_forest")))
+MODEL_FORMAT = os.getenv("MODEL_FORMAT", "auto")
+
+# Forest evaluator: "numpy" (compiled node arrays; a pickle is compiled on
+# load) or "sklearn" (always the pickle and scikit-learn's predict_proba).
+MODEL_BACKEND = os.getenv("MODEL_BACKEND", "numpy")
+
+# Load the model and client libraries in a background task at startup;
+# otherwise they load on first use, or on the first /ready call.
+WARMUP_ON_STARTUP = os.getenv("WARMUP_ON_STARTUP", "1") != "0"
+
+# Seconds between checks for a changed model file on disk.
+MODEL_RELOAD_CHECK_INTERVAL = 5.0
+
+# Largest number of pairs accepted by /predict/batch.
+MAX_PREDICTION_BATCH = 10000
+
+# Threads available for blocking / CPU-bound pipeline stages.
+PIPELINE_WORKERS = int(os.getenv("PIPELINE_WORKERS", str(min(8, (os.cpu_count() or 1) + 2))))
+
+# Upper bound on a single LLM explanation call before falling back.
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "8"))
+LLM_CONNECT_TIMEOUT_SECONDS = float(os.getenv("LLM_CONNECT_TIMEOUT_SECONDS", "2"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "0"))
+
+# Shared LLM client: keep-alive pool size and concurrent calls per worker.
+LLM_POOL_SIZE = int(os.getenv("LLM_POOL_SIZE", "20"))
+LLM_KEEPALIVE_SECONDS = float(os.getenv("LLM_KEEPALIVE_SECONDS", "60"))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "16"))
+
+# Circuit breaker: open after this many consecutive failed or slow calls,
+# skip the provider for LLM_BREAKER_RESET_SECONDS, then try one call.
+LLM_BREAKER_FAILURES = int(os.getenv("LLM_BREAKER_FAILURES", "5"))
+LLM_BREAKER_RESET_SECONDS = float(os.getenv("LLM_BREAKER_RESET_SECONDS", "30"))
+LLM_SLOW_CALL_SECONDS = float(os.getenv("LLM_SLOW_CALL_SECONDS", "5"))
+
+# Deferred-explanation reports: SQLite file shared by all API workers, how
+# many are kept and for how long, and how often a worker polls for an
+# explanation being generated by another worker.
+REPORT_STORE_PATH = os.getenv("REPORT_STORE_PATH", os.path.join(tempfile.gettempdir(), "pharmaguard_reports.sqlite3"))
+REPORT_STORE_MAX_REPORTS = int(os.getenv("REPORT_STORE_MAX_REPORTS", "1000"))
+REPORT_STORE_TTL_SECONDS = float(os.getenv("REPORT_STORE_TTL_SECONDS", "3600"))
+REPORT_STORE_POLL_SECONDS = float(os.getenv("REPORT_STORE_POLL_SECONDS", "0.25"))
+
+# LLM explanation cache: in-memory LRU size and entry lifetime. Set
+# EXPLANATION_CACHE_PATH to an SQLite file to persist entries across
+# restarts and share them between workers.
+EXPLANATION_CACHE_MAX_ENTRIES = int(os.getenv("EXPLANATION_CACHE_MAX_ENTRIES", "256"))
+EXPLANATION_CACHE_TTL_SECONDS = float(os.getenv("EXPLANATION_CACHE_TTL_SECONDS", "86400"))
+EXPLANATION_CACHE_PATH = os.getenv("EXPLANATION_CACHE_PATH", "")
+
+# CPIC rule table (drug, gene, phenotype → risk, severity), reloaded when
+# the file changes.
+RULES_PATH = Path(os.getenv("RULES_PATH", str(BASE_DIR / "data" / "cpic_rules.json")))
+RULES_RELOAD_CHECK_INTERVAL = float(os.getenv("RULES_RELOAD_CHECK_INTERVAL", "5"))
+
+# Per-gene allele activity values and phenotype thresholds.
+ALLELE_FUNCTIONS_PATH = Path(os.getenv("ALLELE_FUNCTIONS_PATH", str(BASE_DIR / "data" / "allele_functions.json")))
+
+# Star-allele definitions (star → defining rsIDs) for the diplotype builder.
+ALLELE_DEFINITIONS_PATH = Path(os.getenv("ALLELE_DEFINITIONS_PATH", str(BASE_DIR / "data" / "allele_definitions.json")))
+
+# Bump when pipeline logic changes so cached results are not reused (model
+# and rule-file changes are picked up from their fingerprints).
+PIPELINE_VERSION = "6"
+
+# Content-addressed /analyze result cache: "memory", "sqlite" or "off".
+RESULT_CACHE_BACKEND = os.getenv("RESULT_CACHE_BACKEND", "memory")
+RESULT_CACHE_PATH = os.getenv("RESULT_CACHE_PATH", os.path.join(tempfile.gettempdir(), "pharmaguard_result_cache.sqlite3"))
+RESULT_CACHE_MAX_BYTES = int(os.getenv("RESULT_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+# Background job API: worker processes, max queued + running jobs per API
+# worker, SQLite job store and spool directory for uploaded files.
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", str(os.cpu_count() or 1)))
+JOB_QUEUE_MAX = int(os.getenv("JOB_QUEUE_MAX", "16"))
+JOB_DB_PATH = os.getenv("JOB_DB_PATH", os.path.join(tempfile.gettempdir(), "pharmaguard_jobs.sqlite3"))
+JOB_UPLOAD_DIR = os.getenv("JOB_UPLOAD_DIR", os.path.join(tempfile.gettempdir(), "pharmaguard_jobs"))
+JOB_RETRY_AFTER_SECONDS = int(os.getenv("JOB_RETRY_AFTER_SECONDS", "30"))
+
+# Parallel parsing of large on-disk VCFs: files of at least
+# PARALLEL_PARSE_MIN_BYTES are split into byte ranges parsed on
+# PARSE_WORKERS processes (0 disables). Background jobs share them: each
+# of the JOB_WORKERS job processes uses PARSE_WORKERS // JOB_WORKERS.
+PARSE_WORKERS = int(os.getenv("PARSE_WORKERS", str(os.cpu_count() or 1)))
+PARALLEL_PARSE_MIN_BYTES = int(os.getenv("PARALLEL_PARSE_MIN_BYTES", str(64 * 1024 * 1024)))
+
+# On-demand request profiling: requests to /analyze* or /predict* carrying
+# an X-Profile-Token header equal to PROFILE_TOKEN run under cProfile and
+# the stats are stored in PROFILE_DIR. Empty token = profiling disabled.
+PROFILE_TOKEN = os.getenv("PROFILE_TOKEN", "")
+PROFILE_DIR = os.getenv("PROFILE_DIR", os.path.join(tempfile.gettempdir(), "pharmaguard_profiles"))
+PROFILE_MAX_STORED = int(os.getenv("PROFILE_MAX_STORED", "50"))
@@ -5,6 +5,7 @@
 import os
 import sys
 from datetime import datetime
+from typing import List, Optional
 
 # ------------------------------------------------------
 # Fix Python path (Prevents ModuleNotFoundError)
@@ -18,16 +19,40 @@ if PROJECT_ROOT not in sys.path:
 # ------------------------------------------------------
 # Imports
 # ------------------------------------------------------
-from fastapi import FastAPI, HTTPException, UploadFile, File, Form
+import asyncio
+import json
+from contextlib import asynccontextmanager, suppress
+
+from fastapi import FastAPI, HTTPException, UploadFile, File, Form, Header, Response
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 
-from utils.predictor import predict_risk
-from services.vcf_parser import parse_vcf, VCFValidationError
-from services.genotype_service import build_diplotypes
+from config import MAX_PREDICTION_BATCH
+from utils.predictor import predict_risk, predict_risk_batch
+from utils.concurrency import run_blocking
+from utils.metrics import metrics, stage_timer, ServerTimingMiddleware
+from utils.profiling import ProfilingMiddleware, call_profiled, profile_store, profile_token_valid
+from services.vcf_parser import (
+    VCFStreamParser,
+    CohortVCFParser,
+    VCFValidationError,
+    EmptyVCFError,
+    VCFEncodingError,
+    read_indexed_vcf,
+    stream_vcf_upload,
+)
+from services.genotype_service import build_diplotypes, build_diplotypes_bulk
 from services.phenotype_mapper import determine_phenotype
-from services.rule_engine import rule_based_risk
-from services.response_builder import build_final_response
+from services.rule_engine import rule_based_risk, rule_engine
+from services.report_store import report_store, new_report_id
+from services.llm_service import generate_explanation_async, llm_client_manager, is_provider_explanation
+from services.result_cache import result_cache, result_cache_key, hash_file
+from services.job_queue import job_queue, QueueFullError
+from config import JOB_RETRY_AFTER_SECONDS, WARMUP_ON_STARTUP
+from services.readiness import readiness, FAILED
+from services.response_builder import refresh_request_fields, build_report, build_final_response_async, build_panel_response_async, build_cohort_response
+from services.panel_service import resolve_panel_drugs, evaluate_panel, evaluate_cohort
 
 
 
@@ -35,15 +60,40 @@ from services.response_builder import build_final_response
 # FastAPI App Initialization
 # ======================================================
 
+def start_warmup(app: FastAPI):
+    app.state.warmup_task = asyncio.create_task(asyncio.to_thread(readiness.warm_up))
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Warm up in the background so liveness checks answer immediately.
+    app.state.warmup_task = None
+    if WARMUP_ON_STARTUP:
+        start_warmup(app)
+    yield
+    warmup_task = app.state.warmup_task
+    if warmup_task is not None and not warmup_task.done():
+        # Stops waiting on the warm-up; the thread finishes on its own.
+        warmup_task.cancel()
+        with suppress(asyncio.CancelledError):
+            await warmup_task
+    await llm_client_manager.aclose()
+    job_queue.shutdown()
+
+
 app = FastAPI(
     title="PharmaGuard AI",
     description="Pharmacogenomic Risk Prediction System",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 allowed_origins_env = os.getenv("ALLOWED_ORIGINS", "http://localhost:5173,http://127.0.0.1:5173")
 allowed_origins = [origin.strip() for origin in allowed_origins_env.split(",") if origin.strip()]
 
+app.add_middleware(ProfilingMiddleware)
+app.add_middleware(ServerTimingMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=allowed_origins,
@@ -57,14 +107,12 @@ app.add_middleware(
 # Drug → Gene Mapping
 # ======================================================
 
-DRUG_GENE_MAP = {
-    "CODEINE": "CYP2D6",
-    "WARFARIN": "CYP2C9",
-    "CLOPIDOGREL": "CYP2C19",
-    "SIMVASTATIN": "SLCO1B1",
-    "AZATHIOPRINE": "TPMT",
-    "FLUOROURACIL": "DPYD"
-}
+# Live views of the CPIC rule table (data/cpic_rules.json), so supported
+# drugs follow rule-file reloads without a restart.
+DRUG_GENE_MAP = rule_engine.drug_gene_map
+
+# Gene → drugs, so panel mode phenotypes each gene once.
+GENE_DRUG_INDEX = rule_engine.gene_drug_index
 
 
 def user_friendly_error(code: str, message: str, hint: str):
@@ -85,6 +133,10 @@ class PredictionRequest(BaseModel):
     phenotype: str
 
 
+class BatchPredictionRequest(BaseModel):
+    items: List[PredictionRequest]
+
+
 # ======================================================
 # Health Check Endpoint
 # ======================================================
@@ -93,10 +145,34 @@ class PredictionRequest(BaseModel):
 def root():
     return {
         "status": "PharmaGuard AI Backend Running",
-        "message": "System Ready"
+        "message": "System Ready" if readiness.is_ready else "Warming up"
     }
 
 
+@app.get("/metrics")
+def get_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/live")
+def live():
+    return {"status": "alive"}
+
+
+@app.get("/ready")
+async def ready():
+    if not readiness.is_ready and not WARMUP_ON_STARTUP:
+        await run_blocking(readiness.warm_up)
+    elif readiness.state == FAILED:
+        # Retry a failed background warm-up; the probe answers 503 meanwhile.
+        warmup_task = getattr(app.state, "warmup_task", None)
+        if warmup_task is None or warmup_task.done():
+            start_warmup(app)
+    if not readiness.is_ready:
+        return JSONResponse(status_code=503, content=readiness.status())
+    return readiness.status()
+
+
 # ======================================================
 # Direct ML Prediction Endpoint (For Testing)
 # ======================================================
@@ -104,7 +180,8 @@ def root():
 @app.post("/predict")
 def predict(request: PredictionRequest):
     try:
-        risk_label, confidence = predict_risk(
+        risk_label, confidence = call_profiled(
+            predict_risk,
             drug=request.drug.upper(),
             phenotype=request.phenotype.upper()
         )
@@ -122,6 +199,211 @@ def predict(request: PredictionRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+# ======================================================
+# Batch ML Prediction Endpoint
+# ======================================================
+
+@app.post("/predict/batch")
+def predict_batch(request: BatchPredictionRequest):
+    if len(request.items) > MAX_PREDICTION_BATCH:
+        raise HTTPException(
+            status_code=400,
+            detail=user_friendly_error(
+                code="BATCH_TOO_LARGE",
+                message=f"A batch may contain at most {MAX_PREDICTION_BATCH} items.",
+                hint="Split the request into smaller batches."
+            )
+        )
+
+    try:
+        pairs = [(item.drug.upper(), item.phenotype.upper()) for item in request.items]
+        predictions = call_profiled(predict_risk_batch, pairs)
+
+        return {
+            "count": len(pairs),
+            "predictions": [
+                {
+                    "drug": drug,
+                    "phenotype": phenotype,
+                    "predicted_risk": risk_label,
+                    "confidence_score": confidence
+                }
+                for (drug, phenotype), (risk_label, confidence) in zip(pairs, predictions)
+            ]
+        }
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+# ======================================================
+# Shared VCF Upload Handling
+# ======================================================
+
+async def read_vcf_upload(file: UploadFile, index: Optional[UploadFile] = None, parser=None):
+    """
+    Stream and parse an uploaded VCF, mapping parser errors to HTTP 400s.
+    Returns (variants, annotation_warnings).
+    """
+
+    if parser is None:
+        parser = VCFStreamParser()
+
+    try:
+        if index is not None:
+            with stage_timer("upload_read"):
+                index_data = await index.read()
+            with stage_timer("parse"):
+                variants = await run_blocking(read_indexed_vcf, file.file, index_data, parser)
+        else:
+            variants = [variant async for variant in stream_vcf_upload(file, parser)]
+    except EmptyVCFError:
+        raise HTTPException(
+            status_code=400,
+            detail=user_friendly_error(
+                code="EMPTY_FILE",
+                message="The uploaded VCF file is empty.",
+                hint="Upload a valid .vcf or .vcf.gz file that contains variant records."
+            )
+        )
+    except VCFEncodingError:
+        raise HTTPException(
+            status_code=400,
+            detail=user_friendly_error(
+                code="INVALID_ENCODING",
+                message="The uploaded VCF file encoding is not valid UTF-8.",
+                hint="Export or save the VCF file in UTF-8 format and try again."
+            )
+        )
+    except VCFValidationError as vcf_error:
+        raise HTTPException(
+            status_code=400,
+            detail=user_friendly_error(
+                code="INVALID_VCF",
+                message=str(vcf_error),
+                hint="Ensure the file follows VCF format and includes the #CHROM header plus tab-separated variant rows."
+            )
+        )
+
+    annotation_warnings = parser.get_warnings()
+    metrics.increment("variants_parsed", len(variants))
+    metrics.increment("malformed_rows", parser.malformed_rows)
+
+    if not variants:
+        raise HTTPException(
+            status_code=400,
+            detail=user_friendly_error(
+                code="NO_PGX_VARIANTS",
+                message="No supported pharmacogenomic variants were found in the uploaded file.",
+                hint="Verify that the VCF includes GENE annotations for CYP2D6, CYP2C19, CYP2C9, SLCO1B1, TPMT, or DPYD."
+            )
+        )
+
+    return variants, annotation_warnings
+
+
+# ======================================================
+# Result Cache Helpers
+# ======================================================
+
+def _lookup_result(file_obj, endpoint: str, *params):
+    # The key includes pipeline_version(), which loads the model (or waits
+    # for the warm-up that is loading it): never build it on the event loop.
+    cache_key = result_cache_key(hash_file(file_obj), endpoint, *params)
+    return cache_key, result_cache.get(cache_key)
+
+
+async def lookup_cached_result(file: UploadFile, index: Optional[UploadFile], endpoint: str, *params):
+    """
+    Hash the upload and look it up in the result cache.
+    Returns (cache_key, cached_result); both None when caching is off.
+    Whether a tabix index came with the upload is part of the key: an
+    indexed read skips off-target rows and so reports different warnings.
+    """
+
+    if result_cache is None:
+        return None, None
+
+    read_mode = "indexed" if index is not None else "full"
+    with stage_timer("cache_lookup"):
+        cache_key, cached = await run_blocking(_lookup_result, file.file, endpoint, read_mode, *params)
+
+    metrics.increment("result_cache_misses" if cached is None else "result_cache_hits")
+    return cache_key, cached
+
+
+async def store_cached_result(cache_key, result, explanations):
+    # Results carrying a static fallback are not cached so a later request
+    # can pick up the real explanation once the provider recovers.
+    if cache_key is None or not all(is_provider_explanation(e) for e in explanations):
+        return
+    await run_blocking(result_cache.put, cache_key, result)
+
+
+def cached_response(result):
+    return json_response(refresh_request_fields(result), headers={"X-Result-Cache": "hit"})
+
+
+def json_response(result, **options):
+    """
+    Serialize a pipeline result (plain JSON types only) as the timed
+    "serialize" stage.
+    """
+
+    with stage_timer("serialize"):
+        return JSONResponse(content=result, **options)
+
+
+# ======================================================
+# Single-Drug Pipeline (blocking stages)
+# ======================================================
+
+def run_drug_pipeline(drug: str, variants, annotation_warnings=None):
+    """
+    Diplotypes → phenotype → hybrid risk for one drug.
+    CPU-bound; called through ``run_blocking`` from async endpoints.
+    Diplotype warnings are appended to ``annotation_warnings``.
+    """
+
+    # ----------------------------
+    # Step 4: Build Diplotypes
+    # ----------------------------
+    with stage_timer("diplotypes"):
+        diplotypes = build_diplotypes(variants, annotation_warnings)
+
+    primary_gene = DRUG_GENE_MAP[drug]
+    diplotype = diplotypes.get(primary_gene, "Unknown")
+
+    # ----------------------------
+    # Step 5: Determine Phenotype
+    # ----------------------------
+    with stage_timer("phenotype"):
+        phenotype = determine_phenotype(primary_gene, diplotype)
+
+    # ----------------------------
+    # Step 6: Hybrid Risk System
+    # ----------------------------
+
+    # 1️. Rule-based (clinical authority)
+    with stage_timer("rule_risk"):
+        rule_risk, severity = rule_based_risk(drug, phenotype)
+
+    # 2. ML-based (probabilistic validation)
+    with stage_timer("ml_predict"):
+        ml_risk, confidence = predict_risk(drug, phenotype)
+
+    # 3️. Final decision → Always trust rule engine
+    return {
+        "drug": drug,
+        "primary_gene": primary_gene,
+        "diplotype": diplotype,
+        "phenotype": phenotype,
+        "rule_risk": rule_risk,
+        "severity": severity,
+        "confidence": confidence
+    }
+
+
 # ======================================================
 # Full VCF Pipeline Endpoint
 # ======================================================
@@ -129,10 +411,20 @@ def predict(request: PredictionRequest):
 @app.post("/analyze")
 async def analyze_vcf(
     file: UploadFile = File(...),
-    drug: str = Form(...)
+    drug: str = Form(...),
+    index: Optional[UploadFile] = File(None),
+    explanation: str = Form("inline")
 ):
     """
     Upload VCF + Drug Name
+
+    The VCF may be plain text or gzip/BGZF compressed. When a tabix
+    ``index`` (.tbi) is uploaded alongside a BGZF file, only the target
+    gene loci are read.
+
+    With ``explanation=deferred`` the deterministic report is returned
+    immediately with a ``report_id``; the LLM explanation is generated in
+    the background and served from ``/reports/{report_id}/explanation``.
     """
 
     try:
@@ -152,109 +444,397 @@ async def analyze_vcf(
             )
 
         # ----------------------------
-        # Step 2: Read VCF File
+        # Repeat upload? Answer from the result cache
+        # (deferred requests always get a fresh report_id)
         # ----------------------------
-        content = await file.read()
-        if not content:
-            raise HTTPException(
-                status_code=400,
-                detail=user_friendly_error(
-                    code="EMPTY_FILE",
-                    message="The uploaded VCF file is empty.",
-                    hint="Upload a valid .vcf file that contains variant records."
-                )
+        deferred = explanation.lower() == "deferred"
+        cache_key, cached = None, None
+        if not deferred:
+            cache_key, cached = await lookup_cached_result(file, index, "analyze", drug)
+        if cached is not None:
+            return cached_response(cached)
+
+        # ----------------------------
+        # Step 2 + 3: Stream and Parse VCF
+        # ----------------------------
+        variants, annotation_warnings = await read_vcf_upload(file, index)
+
+        # ----------------------------
+        # Steps 4-6: Diplotypes, Phenotype, Hybrid Risk
+        # ----------------------------
+        drug_result = await run_blocking(run_drug_pipeline, drug, variants, annotation_warnings)
+
+        # ----------------------------
+        # Build Final Structured JSON
+        # ----------------------------
+
+        if deferred:
+            report = build_report(
+                variants=variants,
+                annotation_warnings=annotation_warnings,
+                **drug_result
             )
+            report_id = new_report_id()
+            report["report_id"] = report_id
+            report["llm_generated_explanation"] = {
+                "status": "pending",
+                "explanation_url": f"/reports/{report_id}/explanation",
+                "stream_url": f"/reports/{report_id}/explanation/stream"
+            }
+            response = json_response(report)
+            await run_blocking(report_store.create, report_id, report)
+            report_store.start_explanation(report_id, report, generate_explanation_async)
+            return response
+
+        final_response = await build_final_response_async(
+            variants=variants,
+            annotation_warnings=annotation_warnings,
+            **drug_result
+        )
+
+        await store_cached_result(cache_key, final_response, [final_response["llm_generated_explanation"]])
+
+        return json_response(final_response)
+
+
+
+       
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+# ======================================================
+# Deferred Explanation Endpoints
+# ======================================================
+
+def _report_not_found():
+    return HTTPException(
+        status_code=404,
+        detail=user_friendly_error(
+            code="REPORT_NOT_FOUND",
+            message="No report with this ID is available.",
+            hint="Reports are kept for a limited time; run the analysis again."
+        )
+    )
 
-        try:
-            content = content.decode("utf-8")
-        except UnicodeDecodeError:
+
+@app.get("/reports/{report_id}")
+async def get_report(report_id: str):
+    entry = await run_blocking(report_store.get, report_id)
+    if entry is None:
+        raise _report_not_found()
+    return entry.report
+
+
+@app.get("/reports/{report_id}/explanation")
+async def get_report_explanation(report_id: str, wait: float = 0):
+    """
+    Explanation for a deferred report. Returns 202 while it is still being
+    generated; ``wait`` long-polls for up to that many seconds (max 30).
+    """
+
+    entry = await report_store.wait(report_id, timeout=min(max(wait, 0), 30))
+    if entry is None:
+        raise _report_not_found()
+
+    if not entry.ready:
+        return JSONResponse(status_code=202, content={"report_id": report_id, "status": "pending"})
+
+    return {
+        "report_id": report_id,
+        "status": "ready",
+        "llm_generated_explanation": entry.report["llm_generated_explanation"]
+    }
+
+
+@app.get("/reports/{report_id}/explanation/stream")
+async def stream_report_explanation(report_id: str):
+    """
+    Server-sent events: a ``pending`` event, then one ``explanation`` event
+    once it is ready.
+    """
+
+    entry = await run_blocking(report_store.get, report_id)
+    if entry is None:
+        raise _report_not_found()
+
+    async def events():
+        current = entry
+        if not current.ready:
+            yield "event: pending\ndata: {}\n\n"
+            current = await report_store.wait(report_id, timeout=None)
+            if current is None:
+                yield "event: expired\ndata: {}\n\n"
+                return
+        payload = json.dumps(current.report["llm_generated_explanation"])
+        yield f"event: explanation\ndata: {payload}\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+# ======================================================
+# Multi-Drug Panel Endpoint
+# ======================================================
+
+@app.post("/analyze/panel")
+async def analyze_panel(
+    file: UploadFile = File(...),
+    drugs: str = Form("all"),
+    index: Optional[UploadFile] = File(None)
+):
+    """
+    Upload VCF once and evaluate several drugs.
+
+    ``drugs`` is a comma-separated list or "all" for every supported drug.
+    Parsing and diplotyping run once for the whole panel.
+    """
+
+    try:
+        panel_drugs, unsupported = resolve_panel_drugs(drugs, DRUG_GENE_MAP)
+
+        if unsupported or not panel_drugs:
             raise HTTPException(
                 status_code=400,
                 detail=user_friendly_error(
-                    code="INVALID_ENCODING",
-                    message="The uploaded VCF file encoding is not valid UTF-8.",
-                    hint="Export or save the VCF file in UTF-8 format and try again."
+                    code="UNSUPPORTED_DRUG",
+                    message=f"Unsupported drug(s) in panel: {', '.join(unsupported) or 'none selected'}.",
+                    hint=f"Choose from {', '.join(DRUG_GENE_MAP)} or use 'all'."
                 )
             )
 
-        # ----------------------------
-        # Step 3: Parse VCF
-        # ----------------------------
-        try:
-            variants, annotation_warnings = parse_vcf(content, return_warnings=True)
-        except VCFValidationError as vcf_error:
+        cache_key, cached = await lookup_cached_result(file, index, "analyze/panel", ",".join(panel_drugs))
+        if cached is not None:
+            return cached_response(cached)
+
+        variants, annotation_warnings = await read_vcf_upload(file, index)
+
+        with stage_timer("diplotypes"):
+            diplotypes = await run_blocking(build_diplotypes, variants, annotation_warnings)
+
+        with stage_timer("panel_evaluate"):
+            drug_results = await run_blocking(evaluate_panel, panel_drugs, diplotypes, GENE_DRUG_INDEX)
+
+        panel_response = await build_panel_response_async(
+            drug_results=drug_results,
+            variants=variants,
+            annotation_warnings=annotation_warnings
+        )
+
+        await store_cached_result(
+            cache_key,
+            panel_response,
+            [result["llm_generated_explanation"] for result in panel_response["results"]]
+        )
+
+        return json_response(panel_response)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+# ======================================================
+# Multi-Sample Cohort Endpoint
+# ======================================================
+
+@app.post("/analyze/cohort")
+async def analyze_cohort(
+    file: UploadFile = File(...),
+    drugs: str = Form("all"),
+    index: Optional[UploadFile] = File(None)
+):
+    """
+    Upload a multi-sample VCF and evaluate every sample in one pass.
+
+    Genotypes come from the GT field of each sample column.
+    """
+
+    try:
+        panel_drugs, unsupported = resolve_panel_drugs(drugs, DRUG_GENE_MAP)
+
+        if unsupported or not panel_drugs:
             raise HTTPException(
                 status_code=400,
                 detail=user_friendly_error(
-                    code="INVALID_VCF",
-                    message=str(vcf_error),
-                    hint="Ensure the file follows VCF format and includes the #CHROM header plus tab-separated variant rows."
+                    code="UNSUPPORTED_DRUG",
+                    message=f"Unsupported drug(s) in panel: {', '.join(unsupported) or 'none selected'}.",
+                    hint=f"Choose from {', '.join(DRUG_GENE_MAP)} or use 'all'."
                 )
             )
 
-        if not variants:
+        parser = CohortVCFParser()
+        variants, annotation_warnings = await read_vcf_upload(file, index, parser)
+
+        if not parser.samples:
             raise HTTPException(
                 status_code=400,
                 detail=user_friendly_error(
-                    code="NO_PGX_VARIANTS",
-                    message="No supported pharmacogenomic variants were found in the uploaded file.",
-                    hint="Verify that the VCF includes GENE annotations for CYP2D6, CYP2C19, CYP2C9, SLCO1B1, TPMT, or DPYD."
+                    code="NO_SAMPLES",
+                    message="The uploaded VCF has no sample genotype columns.",
+                    hint="Cohort analysis needs FORMAT and per-sample GT columns after INFO."
                 )
             )
 
-        # ----------------------------
-        # Step 4: Build Diplotypes
-        # ----------------------------
-        diplotypes = build_diplotypes(variants)
+        matrix = parser.to_matrix(variants)
+        with stage_timer("diplotypes"):
+            gene_diplotypes = await run_blocking(build_diplotypes_bulk, matrix, annotation_warnings)
 
-        primary_gene = DRUG_GENE_MAP[drug]
-        diplotype = diplotypes.get(primary_gene, "Unknown")
+        with stage_timer("cohort_evaluate"):
+            sample_results = await run_blocking(
+                evaluate_cohort, panel_drugs, gene_diplotypes, len(matrix.samples), GENE_DRUG_INDEX
+            )
 
-        # ----------------------------
-        # Step 5: Determine Phenotype
-        # ----------------------------
-        phenotype = determine_phenotype(primary_gene, diplotype)
+        return json_response(build_cohort_response(
+            samples=matrix.samples,
+            sample_results=sample_results,
+            drugs=panel_drugs,
+            variants=variants,
+            annotation_warnings=annotation_warnings
+        ))
 
-       # ----------------------------
-        # Step 6: Hybrid Risk System
-        # ----------------------------
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
 
-        # 1️. Rule-based (clinical authority)
-        rule_risk, severity = rule_based_risk(drug, phenotype)
 
-        # 2. ML-based (probabilistic validation)
-        ml_risk, confidence = predict_risk(drug, phenotype)
+# ======================================================
+# Request Profiles
+# ======================================================
 
-        # 3️. Final decision → Always trust rule engine
-        final_risk = rule_risk
-        confidence_score = confidence
-        
-        # ----------------------------
-        # Build Final Structured JSON
-        # ----------------------------
+def _get_profile_or_error(profile_id: str, token: Optional[str]):
+    if not profile_token_valid(token):
+        raise HTTPException(
+            status_code=403,
+            detail=user_friendly_error(
+                code="PROFILING_FORBIDDEN",
+                message="Profiling is disabled or the profile token is invalid.",
+                hint="Send the configured PROFILE_TOKEN in the X-Profile-Token header."
+            )
+        )
 
-        final_response = build_final_response(
-            drug=drug,
-            primary_gene=primary_gene,
-            diplotype=diplotype,
-            phenotype=phenotype,
-            variants=variants,
-            rule_risk=final_risk,
-            severity=severity,
-            confidence=confidence_score,
-            annotation_warnings=annotation_warnings
+    meta = profile_store.meta(profile_id)
+    if meta is None:
+        raise HTTPException(
+            status_code=404,
+            detail=user_friendly_error(
+                code="PROFILE_NOT_FOUND",
+                message="Profile not found or expired.",
+                hint="Profile the request again; only the most recent profiles are kept."
+            )
         )
+    return meta
 
-        return final_response
 
+@app.get("/profiles/{profile_id}")
+def download_profile(profile_id: str, x_profile_token: Optional[str] = Header(None)):
+    """
+    The request's cProfile stats as a pstats file
+    (``python -m pstats``, snakeviz, or ``pstats.Stats(path)``).
+    """
 
+    _get_profile_or_error(profile_id, x_profile_token)
+    path = profile_store.stats_path(profile_id)
+    if path is None:
+        # Nothing ran under the profiler (e.g. a result-cache hit).
+        return Response(status_code=204)
+    return FileResponse(path, media_type="application/octet-stream", filename=f"{profile_id}.pstats")
 
-       
 
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+@app.get("/profiles/{profile_id}/summary")
+def get_profile_summary(profile_id: str, limit: int = 30, x_profile_token: Optional[str] = Header(None)):
+    _get_profile_or_error(profile_id, x_profile_token)
+    return profile_store.summary(profile_id, limit=max(1, min(limit, 500)))
+
+
+# ======================================================
+# Background Job Endpoints
+# ======================================================
+
+@app.post("/jobs", status_code=202)
+async def submit_job(
+    file: UploadFile = File(...),
+    drugs: str = Form("all")
+):
+    """
+    Queue a (large) VCF for background analysis and return a job ID.
+    Answers 429 with Retry-After when the queue is full.
+    """
+
+    panel_drugs, unsupported = resolve_panel_drugs(drugs, DRUG_GENE_MAP)
+
+    if unsupported or not panel_drugs:
+        raise HTTPException(
+            status_code=400,
+            detail=user_friendly_error(
+                code="UNSUPPORTED_DRUG",
+                message=f"Unsupported drug(s) in panel: {', '.join(unsupported) or 'none selected'}.",
+                hint=f"Choose from {', '.join(DRUG_GENE_MAP)} or use 'all'."
+            )
+        )
+
+    try:
+        job_id = await run_blocking(job_queue.submit, file.file, panel_drugs, DRUG_GENE_MAP)
+    except QueueFullError:
+        raise HTTPException(
+            status_code=429,
+            detail=user_friendly_error(
+                code="QUEUE_FULL",
+                message="The analysis queue is full.",
+                hint=f"Retry in about {JOB_RETRY_AFTER_SECONDS} seconds."
+            ),
+            headers={"Retry-After": str(JOB_RETRY_AFTER_SECONDS)}
+        )
+
+    return {
+        "job_id": job_id,
+        "status": "queued",
+        "status_url": f"/jobs/{job_id}",
+        "result_url": f"/jobs/{job_id}/result"
+    }
+
+
+def _get_job_or_404(job_id: str, include_result: bool = False):
+    job = job_queue.store.get(job_id, include_result=include_result)
+    if job is None:
+        raise HTTPException(
+            status_code=404,
+            detail=user_friendly_error(
+                code="JOB_NOT_FOUND",
+                message="No job with this ID exists.",
+                hint="Check the job ID returned by POST /jobs."
+            )
+        )
+    return job
+
+
+@app.get("/jobs/{job_id}")
+def get_job(job_id: str):
+    return _get_job_or_404(job_id)
+
+
+@app.get("/jobs/{job_id}/result")
+def get_job_result(job_id: str):
+    job = _get_job_or_404(job_id, include_result=True)
+
+    if job["status"] in ("queued", "running"):
+        return JSONResponse(status_code=202, content={"job_id": job_id, "status": job["status"]})
+
+    if job["status"] == "failed":
+        raise HTTPException(
+            status_code=422,
+            detail=user_friendly_error(
+                code="JOB_FAILED",
+                message=job["error"] or "The analysis failed.",
+                hint="Fix the VCF file and submit a new job."
+            )
+        )
+
+    return {"job_id": job_id, "status": "done", **job["result"]}
 
 
 # ======================================================
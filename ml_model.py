@@ -1,24 +1,219 @@
 # ==========================================
 # ML Model Loader
 # ==========================================
+#
+# The model is loaded on first lookup (or by the startup warm-up), so
+# importing this module is cheap. By default it is served by the compiled
+# NumPy forest (utils/forest_pack.py), memory-mapped from the packed files
+# so workers share one copy of the trees; joblib and scikit-learn are only
+# imported when the pickle has to be read.
 
-import joblib
-from config import MODEL_PATH, FEATURES_PATH
+import os
+import threading
+import time
+from itertools import product
+
+import numpy as np
+
+from config import (
+    MODEL_PATH,
+    FEATURES_PATH,
+    PACKED_MODEL_PATH,
+    MODEL_FORMAT,
+    MODEL_BACKEND,
+    MODEL_RELOAD_CHECK_INTERVAL,
+)
+from utils.forest_pack import PACKED_ARRAYS, CompiledForest, PackedForestError, file_sha256
+
+
+def encode_pairs(pairs, feature_index, width: int):
+    """
+    One-hot encode (drug, phenotype) pairs into the model's feature layout.
+    Unknown drugs or phenotypes leave their columns at zero.
+    """
+
+    features = np.zeros((len(pairs), width), dtype=np.float32)
+    for row, (drug, phenotype) in enumerate(pairs):
+        drug_column = feature_index.get(f"drug_{drug}")
+        phenotype_column = feature_index.get(f"phenotype_{phenotype}")
+        if drug_column is not None:
+            features[row, drug_column] = 1
+        if phenotype_column is not None:
+            features[row, phenotype_column] = 1
+    return features
+
+
+def predict_proba(model, features, feature_columns):
+    """
+    Class probabilities for an encoded feature matrix.
+    """
+
+    if isinstance(model, CompiledForest):
+        return model.predict_proba(features)
+
+    import pandas as pd
+
+    # Column labels only, no encoding: keeps sklearn's feature-name check quiet.
+    return model.predict_proba(pd.DataFrame(features, columns=feature_columns, copy=False))
+
+
+def _model_fingerprint():
+    fingerprint = []
+    packed_files = [PACKED_MODEL_PATH / "forest.json"] + [PACKED_MODEL_PATH / f"{name}.npy" for name in PACKED_ARRAYS]
+    for path in [MODEL_PATH, FEATURES_PATH] + packed_files:
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            fingerprint.append(None)
+            continue
+        fingerprint.append((stat.st_mtime_ns, stat.st_size))
+    return tuple(fingerprint)
+
+
+def _load_model_files():
+    """
+    Return (model, feature_columns, format) following MODEL_FORMAT and
+    MODEL_BACKEND.
+    """
+
+    if MODEL_BACKEND != "sklearn" and MODEL_FORMAT != "pickle":
+        try:
+            forest = CompiledForest.load(PACKED_MODEL_PATH)
+        except PackedForestError:
+            if MODEL_FORMAT == "packed":
+                raise
+            forest = None
+
+        if forest is not None:
+            if MODEL_FORMAT == "packed" or not MODEL_PATH.exists() or forest.source_sha256 == file_sha256(MODEL_PATH):
+                return forest, forest.feature_columns, "packed"
+            print("⚠️ Packed model was built from a different pickle; compiling the pickle (run python -m utils.forest_pack).")
+
+    import joblib
+
+    model = joblib.load(MODEL_PATH)
+    feature_columns = joblib.load(FEATURES_PATH)
+    if MODEL_BACKEND == "sklearn":
+        return model, feature_columns, "sklearn"
+    return CompiledForest.from_sklearn(model, feature_columns), feature_columns, "compiled"
+
+
+class LoadedModel:
+    """
+    One loaded model with everything derived from it, swapped in as a
+    unit so readers never mix a new model with old columns.
+    """
+
+    def __init__(self, model, feature_columns, model_format, risk_table, fingerprint):
+        self.model = model
+        self.feature_columns = feature_columns
+        self.feature_index = {column: position for position, column in enumerate(feature_columns)}
+        self.model_format = model_format
+        self.risk_table = risk_table
+        self.fingerprint = fingerprint
 
 
 class PharmaGuardModel:
     def __init__(self):
+        self._lock = threading.Lock()
+        self._next_check = 0.0
+        self._loaded = None
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._loaded is not None
+
+    def ensure_loaded(self):
+        if self._loaded is None:
+            with self._lock:
+                if self._loaded is None:
+                    self._load()
+
+    def _load(self):
         print("🔄 Loading RandomForest model...")
-        self.model = joblib.load(MODEL_PATH)
-        self.feature_columns = joblib.load(FEATURES_PATH)
-        print("✅ Model loaded successfully.")
+        fingerprint = _model_fingerprint()
+        model, feature_columns, model_format = _load_model_files()
+        risk_table = self._build_risk_table(model, feature_columns)
+
+        self._loaded = LoadedModel(model, feature_columns, model_format, risk_table, fingerprint)
+        self._next_check = time.monotonic() + MODEL_RELOAD_CHECK_INTERVAL
+        print(f"✅ Model loaded successfully ({model_format}, {len(risk_table)} precomputed risk entries).")
+
+    @staticmethod
+    def _build_risk_table(model, feature_columns):
+        """
+        Evaluate the model once over every drug × phenotype the features
+        encode and return {(drug, phenotype): (risk_label, confidence)}.
+        """
+
+        drugs = [column[len("drug_"):] for column in feature_columns if column.startswith("drug_")]
+        phenotypes = [column[len("phenotype_"):] for column in feature_columns if column.startswith("phenotype_")]
+        combos = list(product(drugs, phenotypes))
+        if not combos:
+            return {}
+
+        feature_index = {column: position for position, column in enumerate(feature_columns)}
+        encoded = encode_pairs(combos, feature_index, len(feature_columns))
+        probabilities = predict_proba(model, encoded, feature_columns)
+        best = probabilities.argmax(axis=1)
+
+        return {
+            combo: (str(model.classes_[index]), round(float(row[index]), 4))
+            for combo, index, row in zip(combos, best, probabilities)
+        }
+
+    @property
+    def fingerprint(self):
+        return self.current().fingerprint
+
+    def _reload_if_changed(self):
+        if time.monotonic() < self._next_check:
+            return
+        if self._loaded is None:
+            self.ensure_loaded()
+            return
+
+        with self._lock:
+            if time.monotonic() < self._next_check:
+                return
+            self._next_check = time.monotonic() + MODEL_RELOAD_CHECK_INTERVAL
+            try:
+                if _model_fingerprint() == self._loaded.fingerprint:
+                    return
+                self._load()
+            except Exception as exc:
+                # Half-copied or invalid files: keep serving the current
+                # model and look again after the next interval.
+                print(f"⚠️ Model reload failed, keeping previous model: {exc}")
+
+    def current(self) -> LoadedModel:
+        """
+        The loaded model, reloaded first if its files changed. Read every
+        attribute from the one snapshot.
+        """
+
+        self._reload_if_changed()
+        return self._loaded
+
+    def lookup_risk(self, drug: str, phenotype: str):
+        """
+        Precomputed (risk_label, confidence) or None for unseen combinations.
+        """
+
+        return self.current().risk_table.get((drug, phenotype))
 
     def get_model(self):
-        return self.model
+        return self.current().model
 
     def get_feature_columns(self):
-        return self.feature_columns
+        return self.current().feature_columns
+
+    def get_feature_index(self):
+        """
+        Feature column name → matrix column position.
+        """
+        return self.current().feature_index
 
 
-# Singleton instance (loads once)
+# Singleton instance (loads once, on first use)
 model_instance = PharmaGuardModel()
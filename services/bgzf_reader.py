@@ -0,0 +1,301 @@
+# ==========================================
+# BGZF / Tabix Reader
+# ==========================================
+
+import gzip
+import struct
+import zlib
+
+GZIP_MAGIC = b"\x1f\x8b"
+TABIX_MAGIC = b"TBI\x01"
+
+# Tabix binning scheme (min_shift=14, depth=5).
+_BIN_LEVELS = ((26, 1), (23, 9), (20, 73), (17, 585), (14, 4681))
+_LINEAR_SHIFT = 14
+
+
+class BGZFError(Exception):
+    pass
+
+
+def is_gzip(prefix: bytes) -> bool:
+    return prefix[:2] == GZIP_MAGIC
+
+
+def normalize_chrom(name: str) -> str:
+    if name[:3].lower() == "chr":
+        return name[3:]
+    return name
+
+
+class GzipStreamDecompressor:
+    """
+    Incremental decompressor for gzip data made of one or more members.
+
+    BGZF files are a series of small gzip members, so this handles both
+    bgzip output and plain ``gzip`` files without an index.
+    """
+
+    def __init__(self):
+        self._decompressor = zlib.decompressobj(zlib.MAX_WBITS | 16)
+
+    def decompress(self, chunk: bytes) -> bytes:
+        output = []
+        data = chunk
+
+        while data:
+            try:
+                output.append(self._decompressor.decompress(data))
+            except zlib.error as exc:
+                raise BGZFError(f"Invalid gzip data: {exc}")
+
+            if not self._decompressor.eof:
+                break
+
+            data = self._decompressor.unused_data
+            self._decompressor = zlib.decompressobj(zlib.MAX_WBITS | 16)
+
+        return b"".join(output)
+
+
+class BGZFReader:
+    """
+    Random-access reader over a seekable BGZF file object.
+    """
+
+    def __init__(self, file_obj):
+        self.file_obj = file_obj
+
+    def read_block(self, coffset: int):
+        """
+        Return (uncompressed data, compressed block size) for the block at
+        ``coffset``. A size of 0 means end of file.
+        """
+
+        self.file_obj.seek(coffset)
+        header = self.file_obj.read(12)
+        if len(header) < 12:
+            return b"", 0
+
+        xlen = struct.unpack("<H", header[10:12])[0]
+        block_size = self._block_size(header, self.file_obj.read(xlen))
+
+        remaining = self.file_obj.read(block_size - 12 - xlen)
+        try:
+            data = zlib.decompress(remaining[:-8], -zlib.MAX_WBITS)
+        except zlib.error as exc:
+            raise BGZFError(f"Corrupt BGZF block at offset {coffset}: {exc}")
+
+        return data, block_size
+
+    def block_offsets(self):
+        """
+        Compressed offsets of every block, found by walking block headers
+        without decompressing.
+        """
+
+        offsets = []
+        coffset = 0
+
+        while True:
+            self.file_obj.seek(coffset)
+            header = self.file_obj.read(12)
+            if len(header) < 12:
+                break
+            xlen = struct.unpack("<H", header[10:12])[0]
+            offsets.append(coffset)
+            coffset += self._block_size(header, self.file_obj.read(xlen))
+
+        return offsets
+
+    @staticmethod
+    def _block_size(header: bytes, extra: bytes) -> int:
+        if header[:4] != b"\x1f\x8b\x08\x04":
+            raise BGZFError("Compressed VCF is not BGZF; re-compress it with bgzip.")
+
+        offset = 0
+        while offset + 4 <= len(extra):
+            si1, si2, slen = extra[offset], extra[offset + 1], struct.unpack("<H", extra[offset + 2:offset + 4])[0]
+            if si1 == 66 and si2 == 67 and slen == 2:
+                return struct.unpack("<H", extra[offset + 4:offset + 6])[0] + 1
+            offset += 4 + slen
+
+        raise BGZFError("Compressed VCF is not BGZF; re-compress it with bgzip.")
+
+    def read_range(self, start: int, end: int) -> bytes:
+        """
+        Return the uncompressed bytes between two virtual offsets.
+        """
+
+        coffset, uoffset = start >> 16, start & 0xFFFF
+        end_coffset, end_uoffset = end >> 16, end & 0xFFFF
+        parts = []
+
+        while coffset <= end_coffset:
+            data, block_size = self.read_block(coffset)
+            if block_size == 0:
+                break
+            stop = end_uoffset if coffset == end_coffset else len(data)
+            parts.append(data[uoffset:stop])
+            coffset += block_size
+            uoffset = 0
+
+        return b"".join(parts)
+
+    def read_header(self, meta: bytes = b"#"):
+        """
+        Read header lines from the start of the file.
+
+        Returns (header_lines, first_record) where ``first_record`` is the
+        first non-header line, or None if the file has no records.
+        """
+
+        header_lines = []
+        pending = b""
+        coffset = 0
+
+        while True:
+            data, block_size = self.read_block(coffset)
+            if block_size == 0:
+                break
+            coffset += block_size
+
+            lines = (pending + data).split(b"\n")
+            pending = lines.pop()
+            for line in lines:
+                if not line.startswith(meta) and line.strip():
+                    return header_lines, line
+                header_lines.append(line)
+
+        if pending.startswith(meta) or not pending.strip():
+            header_lines.append(pending)
+            return header_lines, None
+
+        return header_lines, pending
+
+
+class TabixIndex:
+    """
+    Parsed tabix (.tbi) index.
+    """
+
+    def __init__(self, names, bins, linear, meta):
+        self.names = names
+        self.bins = bins
+        self.linear = linear
+        self.meta = meta
+
+    @classmethod
+    def from_bytes(cls, raw: bytes):
+        try:
+            data = gzip.decompress(raw) if is_gzip(raw) else raw
+        except (OSError, EOFError, zlib.error):
+            raise BGZFError("The VCF index is not a valid tabix (.tbi) file.")
+
+        if data[:4] != TABIX_MAGIC:
+            raise BGZFError("The VCF index is not a valid tabix (.tbi) file.")
+
+        try:
+            n_ref, _fmt, _col_seq, _col_beg, _col_end, meta, _skip, l_nm = struct.unpack_from("<8i", data, 4)
+            offset = 36
+            names = [name.decode("utf-8") for name in data[offset:offset + l_nm].split(b"\0") if name]
+            offset += l_nm
+
+            bins = []
+            linear = []
+            for _ in range(n_ref):
+                (n_bin,) = struct.unpack_from("<i", data, offset)
+                offset += 4
+                ref_bins = {}
+                for _ in range(n_bin):
+                    bin_id, n_chunk = struct.unpack_from("<Ii", data, offset)
+                    offset += 8
+                    chunks = struct.unpack_from(f"<{2 * n_chunk}Q", data, offset)
+                    offset += 16 * n_chunk
+                    ref_bins[bin_id] = list(zip(chunks[::2], chunks[1::2]))
+                (n_intv,) = struct.unpack_from("<i", data, offset)
+                offset += 4
+                linear.append(struct.unpack_from(f"<{n_intv}Q", data, offset))
+                offset += 8 * n_intv
+                bins.append(ref_bins)
+        except struct.error:
+            raise BGZFError("The VCF index is truncated or corrupt.")
+
+        return cls(names, bins, linear, bytes([meta & 0xFF]))
+
+    def chunks_for(self, ref_id: int, start: int, end: int):
+        """
+        Candidate (begin, end) virtual-offset chunks for a 0-based, half-open
+        region on reference ``ref_id``.
+        """
+
+        ref_bins = self.bins[ref_id]
+        ref_linear = self.linear[ref_id]
+
+        window = start >> _LINEAR_SHIFT
+        min_offset = ref_linear[window] if window < len(ref_linear) else (ref_linear[-1] if ref_linear else 0)
+
+        chunks = []
+        for bin_id in reg2bins(start, end):
+            for chunk_begin, chunk_end in ref_bins.get(bin_id, ()):
+                if chunk_end > min_offset:
+                    chunks.append((chunk_begin, chunk_end))
+
+        return chunks
+
+
+def reg2bins(start: int, end: int):
+    end -= 1
+    bins = [0]
+    for shift, offset in _BIN_LEVELS:
+        bins.extend(range(offset + (start >> shift), offset + (end >> shift) + 1))
+    return bins
+
+
+def merge_chunks(chunks):
+    merged = []
+    for chunk_begin, chunk_end in sorted(chunks):
+        if merged and chunk_begin <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], chunk_end))
+        else:
+            merged.append((chunk_begin, chunk_end))
+    return merged
+
+
+def iter_region_lines(reader: BGZFReader, index: TabixIndex, regions):
+    """
+    Yield raw VCF record lines overlapping any of ``regions``.
+
+    ``regions`` is an iterable of (chrom, start, end) with 1-based inclusive
+    coordinates; chromosome names match with or without a ``chr`` prefix.
+    Each record is yielded once, in file order.
+    """
+
+    by_chrom = {}
+    for chrom, start, end in regions:
+        by_chrom.setdefault(normalize_chrom(chrom), []).append((start, end))
+
+    for ref_id, name in enumerate(index.names):
+        wanted = by_chrom.get(normalize_chrom(name))
+        if not wanted:
+            continue
+
+        name_bytes = name.encode("utf-8")
+
+        chunks = []
+        for start, end in wanted:
+            chunks.extend(index.chunks_for(ref_id, start - 1, end))
+
+        for chunk_begin, chunk_end in merge_chunks(chunks):
+            for line in reader.read_range(chunk_begin, chunk_end).split(b"\n"):
+                if not line or line.startswith(index.meta):
+                    continue
+                columns = line.split(b"\t", 2)
+                if len(columns) < 3 or columns[0] != name_bytes:
+                    continue
+                try:
+                    pos = int(columns[1])
+                except ValueError:
+                    continue
+                if any(start <= pos <= end for start, end in wanted):
+                    yield line
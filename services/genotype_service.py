@@ -1,30 +1,314 @@
 # ==========================================
 # Diplotype Builder
 # ==========================================
+#
+# Each PGx variant is placed on a haplotype from its GT: homozygous ALT
+# calls go on both, phased heterozygous calls on their own side, and
+# unphased or sites-only records are assigned greedily. The rsIDs of each
+# haplotype are then resolved to a star allele through the gene's
+# allele-definition index (data/allele_definitions.json). Every carried
+# call has to be accounted for by one of the two alleles; a missing call
+# or a variant left over makes the gene Indeterminate, with a warning.
 
+import json
 from collections import defaultdict
 
+import numpy as np
 
-def build_diplotypes(variants):
+from config import ALLELE_DEFINITIONS_PATH
+
+REFERENCE_ALLELE = "*1"
+
+# Reported for a gene whose calls do not give one diplotype; phenotyped as
+# Unknown.
+INDETERMINATE_DIPLOTYPE = "Indeterminate"
+
+MISSING_CALL_WARNING = "genotype call missing; diplotype reported as Indeterminate."
+UNRESOLVED_WARNING = "carried variants do not fit two star alleles; diplotype reported as Indeterminate."
+SITES_ONLY_WARNING = (
+    "records without a genotype call do not name two star alleles; diplotype reported as Indeterminate."
+)
+
+# Placement of one variant on a sample's two haplotypes. SITES_ONLY
+# records carry no call at all: each names one star allele.
+NOT_CARRIED, FIRST_HAPLOTYPE, SECOND_HAPLOTYPE, BOTH_HAPLOTYPES, UNPHASED, MISSING, SITES_ONLY = range(7)
+
+# Allele index stored in a GenotypeMatrix for records without a GT column.
+SITES_ONLY_ALLELE = -2
+
+
+class AlleleDefinitionIndex:
+    """
+    Star-allele definitions of one gene.
+
+    ``exact`` maps each set of defining rsIDs to its definition and
+    ``postings`` maps each rsID to the definitions that use it, so resolving
+    a haplotype only touches definitions that share one of its rsIDs.
+    """
+
+    def __init__(self, definitions):
+        self.stars = []
+        self.rsids = []
+        self.exact = {}
+        postings = defaultdict(list)
+
+        for star, rsids in definitions.items():
+            key = frozenset(rsids)
+            definition_id = len(self.stars)
+            self.stars.append(star)
+            self.rsids.append(key)
+            self.exact.setdefault(key, definition_id)
+            for rsid in key:
+                postings[rsid].append(definition_id)
+
+        self.postings = dict(postings)
+
+    def _best_definition(self, required, present):
+        """
+        The most specific definition whose rsIDs are all ``present`` and
+        include every ``required`` rsID (ties go to file order), or None.
+        """
+
+        definition_id = self.exact.get(present)
+        if definition_id is not None:
+            return definition_id
+
+        hits = defaultdict(int)
+        for rsid in present:
+            for definition_id in self.postings.get(rsid, ()):
+                hits[definition_id] += 1
+
+        best = None
+        for definition_id, count in hits.items():
+            if count != len(self.rsids[definition_id]) or not required <= self.rsids[definition_id]:
+                continue
+            if best is None or (count, -definition_id) > (len(self.rsids[best]), -best):
+                best = definition_id
+        return best
+
+    def resolve(self, required, optional=()):
+        """
+        Resolve one haplotype from (rsid, annotated star) calls: ``required``
+        calls must be carried by it, ``optional`` ones may be.
+
+        The most specific definition that covers every required call wins;
+        with none, the STAR annotation is used if the required calls (or,
+        without any, the first optional call) agree on it. Each chosen rsID
+        accounts for one call, so repeated records of a site stay separate.
+        Returns (star, optional calls left over), or (None, None) when the
+        required calls cannot be one allele.
+        """
+
+        calls = list(required) + list(optional)
+        if not calls:
+            return REFERENCE_ALLELE, []
+
+        required_rsids = frozenset(rsid for rsid, _ in required)
+        if len(required_rsids) != len(required):
+            return None, None
+
+        definition_id = self._best_definition(required_rsids, frozenset(rsid for rsid, _ in calls))
+        if definition_id is not None:
+            star = self.stars[definition_id]
+            accounted = set(self.rsids[definition_id])
+        else:
+            annotated = {star for _, star in required} or {calls[0][1]}
+            if len(annotated) != 1:
+                return None, None
+            star = annotated.pop()
+            accounted = {rsid for rsid, call_star in calls if call_star == star}
+
+        accounted -= required_rsids
+        leftover = []
+        for call in optional:
+            if call[0] in accounted:
+                accounted.discard(call[0])
+            else:
+                leftover.append(call)
+
+        return star, leftover
+
+
+def load_allele_definitions(path=ALLELE_DEFINITIONS_PATH):
+    with open(path, "r", encoding="utf-8") as handle:
+        data = json.load(handle)
+
+    return {
+        gene: AlleleDefinitionIndex(definitions)
+        for gene, definitions in data["genes"].items()
+    }
+
+
+ALLELE_DEFINITIONS = load_allele_definitions()
+_NO_DEFINITIONS = AlleleDefinitionIndex({})
+
+
+def genotype_placement(genotype):
+    """
+    Placement of a (allele, allele, phased) call. Records without a call
+    are SITES_ONLY; a call with a missing allele is MISSING, never the
+    reference.
+    """
+
+    if genotype is None:
+        return SITES_ONLY
+
+    first, second, phased = genotype
+    if first < 0 or second < 0:
+        return MISSING
+    if first > 0 and second > 0:
+        return BOTH_HAPLOTYPES
+    if first == 0 and second == 0:
+        return NOT_CARRIED
+    if not phased:
+        return UNPHASED
+    return FIRST_HAPLOTYPE if first > 0 else SECOND_HAPLOTYPE
+
+
+def resolve_sites_only(index, calls):
+    """
+    Diplotype from records without a genotype call, one star allele per
+    record: two records give both alleles, a single record is read as
+    heterozygous with the reference. Zygosity beyond that is unknown, so
+    more records give INDETERMINATE_DIPLOTYPE with a warning.
+    """
+
+    if len(calls) > 2:
+        return INDETERMINATE_DIPLOTYPE, SITES_ONLY_WARNING
+
+    stars = []
+    for call in calls:
+        star, _ = index.resolve([call])
+        if star is None:
+            return INDETERMINATE_DIPLOTYPE, UNRESOLVED_WARNING
+        stars.append(star)
+    if len(stars) == 1:
+        stars.append(REFERENCE_ALLELE)
+
+    return f"{stars[0]}/{stars[1]}", None
+
+
+def resolve_diplotype(index, calls):
+    """
+    Diplotype from (rsid, annotated star, placement) calls of one gene.
+
+    Unphased variants are offered to the first haplotype; those its star
+    allele does not account for must be carried by the second. Returns
+    (diplotype, warning): INDETERMINATE_DIPLOTYPE with a warning when a
+    call is missing or a carried variant fits neither haplotype. Records
+    without a call are resolved by ``resolve_sites_only`` and cannot be
+    combined with genotype calls of the same gene.
+    """
+
+    first, second, unphased, sites_only = [], [], [], []
+
+    for rsid, star, placement in calls:
+        if placement == MISSING:
+            return INDETERMINATE_DIPLOTYPE, MISSING_CALL_WARNING
+        if placement == BOTH_HAPLOTYPES:
+            first.append((rsid, star))
+            second.append((rsid, star))
+        elif placement == FIRST_HAPLOTYPE:
+            first.append((rsid, star))
+        elif placement == SECOND_HAPLOTYPE:
+            second.append((rsid, star))
+        elif placement == UNPHASED:
+            unphased.append((rsid, star))
+        elif placement == SITES_ONLY:
+            sites_only.append((rsid, star))
+
+    if sites_only:
+        if first or second or unphased:
+            return INDETERMINATE_DIPLOTYPE, SITES_ONLY_WARNING
+        return resolve_sites_only(index, sites_only)
+
+    first_star, leftover = index.resolve(first, unphased)
+    if first_star is None:
+        return INDETERMINATE_DIPLOTYPE, UNRESOLVED_WARNING
+
+    second_star, leftover = index.resolve(second + leftover)
+    if second_star is None or leftover:
+        return INDETERMINATE_DIPLOTYPE, UNRESOLVED_WARNING
+
+    return f"{first_star}/{second_star}", None
+
+
+def _add_warning(warnings, gene, message):
+    if warnings is not None:
+        text = f"{gene}: {message}"
+        if text not in warnings:
+            warnings.append(text)
+
+
+def build_diplotypes(variants, warnings=None):
     """
-    Group star alleles by gene and create diplotypes.
+    Group variants by gene and resolve each gene's diplotype. Genes that
+    cannot be resolved get a message appended to ``warnings``.
     """
 
-    gene_map = defaultdict(list)
+    gene_calls = defaultdict(list)
 
     for var in variants:
-        gene_map[var["gene"]].append(var["star"])
+        gene_calls[var.gene].append((var.rsid, var.star, genotype_placement(var.genotype)))
 
     diplotypes = {}
+    for gene, calls in gene_calls.items():
+        diplotypes[gene], problem = resolve_diplotype(ALLELE_DEFINITIONS.get(gene, _NO_DEFINITIONS), calls)
+        if problem is not None:
+            _add_warning(warnings, gene, problem)
 
-    for gene, stars in gene_map.items():
-        if len(stars) >= 2:
-            diplotype = f"{stars[0]}/{stars[1]}"
-        elif len(stars) == 1:
-            diplotype = f"{stars[0]}/Unknown"
-        else:
-            diplotype = "Unknown"
+    return diplotypes
+
+
+def build_diplotypes_bulk(matrix, warnings=None):
+    """
+    Build diplotypes for every sample of a GenotypeMatrix at once.
+
+    Placements are computed as one array per gene, with the same rules as
+    ``genotype_placement``, and each distinct per-sample placement pattern
+    is resolved once. Genes that some samples cannot be resolved for get a
+    message appended to ``warnings``.
+    Returns {gene: [diplotype per sample]}.
+    """
+
+    gene_rows = defaultdict(list)
+    for row, var in enumerate(matrix.variants):
+        gene_rows[var.gene].append(row)
+
+    diplotypes = {}
+
+    for gene, rows in gene_rows.items():
+        index = ALLELE_DEFINITIONS.get(gene, _NO_DEFINITIONS)
+        variants = [matrix.variants[row] for row in rows]
+
+        alleles = matrix.alleles[rows]
+        carried = alleles > 0
+        first, second = carried[..., 0], carried[..., 1]
+        placements = np.select(
+            [
+                (alleles == SITES_ONLY_ALLELE).all(axis=-1), (alleles < 0).any(axis=-1),
+                first & second, ~(first | second), ~matrix.phased[rows], first
+            ],
+            [SITES_ONLY, MISSING, BOTH_HAPLOTYPES, NOT_CARRIED, UNPHASED, FIRST_HAPLOTYPE],
+            SECOND_HAPLOTYPE
+        ).astype(np.int8)
+
+        patterns, inverse, counts = np.unique(placements.T, axis=0, return_inverse=True, return_counts=True)
+        labels = []
+        problems = defaultdict(int)
+        for pattern, count in zip(patterns, counts.tolist()):
+            label, problem = resolve_diplotype(index, [
+                (var.rsid, var.star, placement)
+                for var, placement in zip(variants, pattern.tolist())
+                if placement != NOT_CARRIED
+            ])
+            labels.append(label)
+            if problem is not None:
+                problems[problem] += count
+
+        for problem, count in problems.items():
+            _add_warning(warnings, gene, f"{count} sample(s): {problem}")
 
-        diplotypes[gene] = diplotype
+        diplotypes[gene] = [labels[code] for code in inverse.reshape(-1)]
 
     return diplotypes
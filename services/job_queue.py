@@ -0,0 +1,258 @@
+# ==========================================
+# Background Job Queue
+# ==========================================
+
+import json
+import multiprocessing
+import os
+import shutil
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+
+from config import (
+    JOB_WORKERS,
+    JOB_QUEUE_MAX,
+    JOB_DB_PATH,
+    JOB_UPLOAD_DIR,
+    PARSE_WORKERS,
+    PARALLEL_PARSE_MIN_BYTES,
+)
+from utils.processes import pid_alive
+
+
+class QueueFullError(Exception):
+    pass
+
+
+# ------------------------------------------
+# Worker side (runs in a separate process)
+# ------------------------------------------
+
+def job_parse_workers(parse_workers: int = PARSE_WORKERS, job_workers: int = JOB_WORKERS) -> int:
+    """
+    Parse processes each job worker may start.
+    """
+
+    return max(1, parse_workers // max(1, job_workers))
+
+
+def run_analysis_job(job_id: str, path: str, drugs, drug_gene_map, db_path: str = JOB_DB_PATH):
+    """
+    Parse → diplotypes → phenotypes → rule-based risk for a spooled VCF.
+    Runs in a worker process; the ML model and LLM are not used.
+    """
+
+    JobStore(db_path).update(job_id, "running")
+
+    from services.genotype_service import build_diplotypes
+    from services.phenotype_mapper import determine_phenotype
+    from services.rule_engine import rule_based_risk
+    from services.vcf_parser import VCFStreamParser, iter_vcf_file, parse_vcf_parallel
+
+    # Already inside one of JOB_WORKERS pool processes: split the parse
+    # workers between them instead of nesting a full pool in each.
+    parse_workers = job_parse_workers()
+    parser = VCFStreamParser()
+    if parse_workers > 1 and os.path.getsize(path) >= PARALLEL_PARSE_MIN_BYTES:
+        variants = parse_vcf_parallel(path, parser, parse_workers)
+    else:
+        with open(path, "rb") as handle:
+            variants = list(iter_vcf_file(handle, parser))
+
+    warnings = parser.get_warnings()
+    diplotypes = build_diplotypes(variants, warnings)
+    phenotypes = {}
+    results = []
+
+    for drug in drugs:
+        gene = drug_gene_map[drug]
+        diplotype = diplotypes.get(gene, "Unknown")
+        if gene not in phenotypes:
+            phenotypes[gene] = determine_phenotype(gene, diplotype)
+        risk_label, severity = rule_based_risk(drug, phenotypes[gene])
+
+        results.append({
+            "drug": drug,
+            "primary_gene": gene,
+            "diplotype": diplotype,
+            "phenotype": phenotypes[gene],
+            "risk_label": risk_label,
+            "severity": severity
+        })
+
+    return {
+        "drugs": list(drugs),
+        "results": results,
+        "detected_variants": [variant.to_dict() for variant in variants],
+        "quality_metrics": {
+            "vcf_parsing_success": True,
+            "variants_detected": len(variants),
+            "genes_matched": len(set(v.gene for v in variants)),
+            "drugs_processed": len(results),
+            "annotation_warnings": warnings
+        }
+    }
+
+
+# ------------------------------------------
+# API side
+# ------------------------------------------
+
+class JobStore:
+    """
+    Job state in a local SQLite file, shared by all API workers.
+    """
+
+    def __init__(self, path: str = JOB_DB_PATH):
+        self.path = path
+        with self._connect() as connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "id TEXT PRIMARY KEY, status TEXT, drugs TEXT, owner_pid INTEGER, "
+                "created REAL, updated REAL, result TEXT, error TEXT)"
+            )
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=10)
+
+    def create(self, job_id: str, drugs):
+        now = time.time()
+        with self._connect() as connection:
+            connection.execute(
+                "INSERT INTO jobs VALUES (?, 'queued', ?, ?, ?, ?, NULL, NULL)",
+                (job_id, json.dumps(drugs), os.getpid(), now, now)
+            )
+
+    def update(self, job_id: str, status: str, result=None, error=None):
+        with self._connect() as connection:
+            connection.execute(
+                "UPDATE jobs SET status=?, updated=?, result=?, error=? WHERE id=?",
+                (status, time.time(), json.dumps(result) if result is not None else None, error, job_id)
+            )
+
+    def get(self, job_id: str, include_result: bool = False):
+        columns = "id, status, drugs, created, updated, error" + (", result" if include_result else "")
+        with self._connect() as connection:
+            row = connection.execute(f"SELECT {columns} FROM jobs WHERE id=?", (job_id,)).fetchone()
+        if row is None:
+            return None
+
+        job = {
+            "job_id": row[0],
+            "status": row[1],
+            "drugs": json.loads(row[2]),
+            "created": row[3],
+            "updated": row[4],
+            "error": row[5]
+        }
+        if include_result:
+            job["result"] = json.loads(row[6]) if row[6] else None
+        return job
+
+    def fail_orphaned(self):
+        """
+        Mark unfinished jobs whose owning API process is gone as failed.
+        """
+
+        with self._connect() as connection:
+            rows = connection.execute(
+                "SELECT id, owner_pid FROM jobs WHERE status IN ('queued', 'running')"
+            ).fetchall()
+            for job_id, owner_pid in rows:
+                if not pid_alive(owner_pid):
+                    connection.execute(
+                        "UPDATE jobs SET status='failed', updated=?, error=? WHERE id=?",
+                        (time.time(), "Job was interrupted by a server restart.", job_id)
+                    )
+
+
+class JobQueue:
+    """
+    Bounded queue in front of a process pool.
+
+    At most ``max_pending`` jobs may be queued or running per API worker;
+    ``submit`` raises ``QueueFullError`` beyond that instead of buffering.
+    """
+
+    def __init__(self, workers: int = JOB_WORKERS, max_pending: int = JOB_QUEUE_MAX, upload_dir: str = JOB_UPLOAD_DIR):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.upload_dir = upload_dir
+        self.pending = 0
+        self._executor = None
+        self._store = None
+        self._lock = threading.Lock()
+
+    @property
+    def store(self) -> JobStore:
+        if self._store is None:
+            with self._lock:
+                if self._store is None:
+                    store = JobStore()
+                    store.fail_orphaned()
+                    self._store = store
+        return self._store
+
+    def _get_executor(self):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+
+    def submit(self, file_obj, drugs, drug_gene_map) -> str:
+        """
+        Spool the upload to disk and queue it. Blocking; call from a thread.
+        """
+
+        with self._lock:
+            if self.pending >= self.max_pending:
+                raise QueueFullError("The analysis queue is full.")
+            self.pending += 1
+
+        try:
+            job_id = uuid.uuid4().hex
+            os.makedirs(self.upload_dir, exist_ok=True)
+            path = os.path.join(self.upload_dir, f"{job_id}.vcf")
+
+            file_obj.seek(0)
+            with open(path, "wb") as handle:
+                shutil.copyfileobj(file_obj, handle, 1024 * 1024)
+
+            self.store.create(job_id, drugs)
+            future = self._get_executor().submit(
+                run_analysis_job, job_id, path, drugs, dict(drug_gene_map), self.store.path
+            )
+        except Exception:
+            with self._lock:
+                self.pending -= 1
+            raise
+
+        future.add_done_callback(lambda done: self._finish(job_id, path, done))
+        return job_id
+
+    def _finish(self, job_id: str, path: str, future):
+        try:
+            self.store.update(job_id, "done", result=future.result())
+        except Exception as exc:
+            self.store.update(job_id, "failed", error=str(exc) or exc.__class__.__name__)
+        finally:
+            with self._lock:
+                self.pending -= 1
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+job_queue = JobQueue()
@@ -1,30 +1,321 @@
+import asyncio
+import json
 import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
 from pathlib import Path
+from typing import TYPE_CHECKING
 
-from dotenv import load_dotenv
-from groq import Groq
+from config import (
+    LLM_TIMEOUT_SECONDS,
+    LLM_CONNECT_TIMEOUT_SECONDS,
+    LLM_MAX_RETRIES,
+    LLM_POOL_SIZE,
+    LLM_KEEPALIVE_SECONDS,
+    LLM_MAX_CONCURRENCY,
+    LLM_BREAKER_FAILURES,
+    LLM_BREAKER_RESET_SECONDS,
+    LLM_SLOW_CALL_SECONDS,
+    EXPLANATION_CACHE_MAX_ENTRIES,
+    EXPLANATION_CACHE_TTL_SECONDS,
+    EXPLANATION_CACHE_PATH,
+)
+from utils.concurrency import run_blocking
+from utils.metrics import metrics
+
+if TYPE_CHECKING:
+    from groq import AsyncGroq
+
+LLM_MODEL = "llama-3.1-8b-instant"
+
+
+class ExplanationCache:
+    """
+    Bounded LRU + TTL cache of LLM explanations keyed by
+    (gene, drug, risk_label), with an optional SQLite store on disk.
+
+    Memory is checked first; a disk hit is promoted into memory. Only
+    provider responses are cached, never the static fallback. Hits and
+    misses are counted in ``metrics``.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float, path: str = ""):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.path = path
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        if path:
+            self._init_disk()
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=5)
+
+    def _init_disk(self):
+        with self._connect() as connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS explanations ("
+                "gene TEXT, drug TEXT, risk_label TEXT, payload TEXT, created REAL, "
+                "PRIMARY KEY (gene, drug, risk_label))"
+            )
+
+    async def get(self, key):
+        """
+        Cached explanation or None; the disk lookup runs through
+        ``run_blocking``.
+        """
+
+        value = self._get_memory(key)
+        if value is None and self.path:
+            value = await run_blocking(self._get_disk, key)
+        return self._counted(value)
+
+    async def put(self, key, value):
+
+        created = time.time()
+        self._remember(key, dict(value), created)
+        if self.path:
+            await run_blocking(self._put_disk, key, value, created)
+
+    def _counted(self, value):
+        metrics.increment("explanation_cache_misses" if value is None else "explanation_cache_hits")
+        return value
+
+    def _get_memory(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, created = entry
+            if time.time() - created < self.ttl_seconds:
+                self._entries.move_to_end(key)
+                return dict(value)
+            del self._entries[key]
+            return None
+
+    def _get_disk(self, key):
+        try:
+            with self._connect() as connection:
+                row = connection.execute(
+                    "SELECT payload, created FROM explanations WHERE gene=? AND drug=? AND risk_label=?",
+                    key
+                ).fetchone()
+        except sqlite3.Error:
+            return None
+        if row is None or time.time() - row[1] >= self.ttl_seconds:
+            return None
+        value = json.loads(row[0])
+        self._remember(key, value, row[1])
+        return dict(value)
+
+    def _put_disk(self, key, value, created):
+        try:
+            with self._connect() as connection:
+                connection.execute(
+                    "INSERT OR REPLACE INTO explanations VALUES (?, ?, ?, ?, ?)",
+                    (*key, json.dumps(value), created)
+                )
+        except sqlite3.Error:
+            pass
+
+    def _remember(self, key, value, created):
+        with self._lock:
+            self._entries[key] = (value, created)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+explanation_cache = ExplanationCache(
+    EXPLANATION_CACHE_MAX_ENTRIES,
+    EXPLANATION_CACHE_TTL_SECONDS,
+    EXPLANATION_CACHE_PATH
+)
+
+# One in-flight provider request per cache key; later callers wait on it.
+_inflight = {}
+_inflight_lock = threading.Lock()
+
+
+def _join_or_lead(key):
+    """
+    Return (future, is_leader). The leader must resolve the future.
+    """
+
+    with _inflight_lock:
+        future = _inflight.get(key)
+        if future is not None:
+            metrics.increment("explanation_requests_coalesced")
+            return future, False
+        future = Future()
+        _inflight[key] = future
+        return future, True
+
+
+def _finish_lead(key, future, explanation):
+    with _inflight_lock:
+        _inflight.pop(key, None)
+    future.set_result(explanation)
 
 
 def _load_env_file() -> None:
+    from dotenv import load_dotenv
+
     backend_root = Path(__file__).resolve().parents[1]
     env_path = backend_root / ".env"
     load_dotenv(dotenv_path=env_path)
 
 
-def _get_client() -> Groq:
-    _load_env_file()
-    api_key = os.getenv("GROQ_API_KEY")
-    if not api_key:
-        raise ValueError("GROQ_API_KEY is not set")
-    return Groq(api_key=api_key)
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+
+    After ``failure_threshold`` failed or slow calls the circuit opens and
+    callers skip the provider for ``reset_seconds``; one trial call is then
+    let through and closes the circuit again if it succeeds.
+    """
+
+    def __init__(self, failure_threshold: int, reset_seconds: float, slow_call_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.slow_call_seconds = slow_call_seconds
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            if self.opened_at is None:
+                return "closed"
+            if time.monotonic() - self.opened_at >= self.reset_seconds:
+                return "half_open"
+            return "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at < self.reset_seconds or self.trial_in_flight:
+                return False
+            self.trial_in_flight = True
+            return True
+
+    def release_trial(self):
+        """
+        Give up a call without an outcome; a half-open circuit lets the
+        next caller try instead.
+        """
+
+        with self._lock:
+            self.trial_in_flight = False
+
+    def record(self, succeeded: bool, duration: float):
+        with self._lock:
+            self.trial_in_flight = False
+            if succeeded and duration <= self.slow_call_seconds:
+                self.failures = 0
+                self.opened_at = None
+                return
+            self.failures += 1
+            if self.opened_at is not None or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+
+class LLMClientManager:
+    """
+    Process-wide async Groq client.
+
+    ``.env`` is read once and the client is built once, on first use, over
+    a keep-alive httpx connection pool; groq and httpx are imported then
+    too. Calls are limited to
+    ``LLM_MAX_CONCURRENCY`` in flight and guarded by a circuit breaker.
+    """
+
+    def __init__(self):
+        self.breaker = CircuitBreaker(LLM_BREAKER_FAILURES, LLM_BREAKER_RESET_SECONDS, LLM_SLOW_CALL_SECONDS)
+        self._api_key = None
+        self._async_client = None
+        self._async_slots = None
+        self._lock = threading.Lock()
+
+    def _get_api_key(self) -> str:
+        if self._api_key is None:
+            _load_env_file()
+            self._api_key = os.getenv("GROQ_API_KEY") or ""
+        if not self._api_key:
+            raise ValueError("GROQ_API_KEY is not set")
+        return self._api_key
+
+    def _client_options(self):
+        import httpx
+
+        return {
+            "api_key": self._get_api_key(),
+            "base_url": os.getenv("GROQ_BASE_URL") or None,
+            "timeout": httpx.Timeout(LLM_TIMEOUT_SECONDS, connect=LLM_CONNECT_TIMEOUT_SECONDS),
+            "max_retries": LLM_MAX_RETRIES,
+        }
+
+    def _limits(self):
+        import httpx
+
+        return httpx.Limits(
+            max_connections=LLM_POOL_SIZE,
+            max_keepalive_connections=LLM_POOL_SIZE,
+            keepalive_expiry=LLM_KEEPALIVE_SECONDS
+        )
+
+    def get_async_client(self) -> "AsyncGroq":
+        if self._async_client is None:
+            with self._lock:
+                if self._async_client is None:
+                    import httpx
+                    from groq import AsyncGroq
+
+                    self._async_client = AsyncGroq(
+                        http_client=httpx.AsyncClient(limits=self._limits()),
+                        **self._client_options()
+                    )
+        return self._async_client
+
+    def warm_up(self):
+        """
+        Import the client libraries ahead of the first request.
+        """
+
+        import dotenv  # noqa: F401
+        import groq  # noqa: F401
+        import httpx  # noqa: F401
+
+    def async_slots(self) -> asyncio.Semaphore:
+        if self._async_slots is None:
+            self._async_slots = asyncio.Semaphore(LLM_MAX_CONCURRENCY)
+        return self._async_slots
+
+    async def aclose(self):
+        if self._async_client is not None:
+            await self._async_client.close()
+            self._async_client = None
 
 
-def generate_explanation(risk_result: dict) -> dict:
+llm_client_manager = LLMClientManager()
+
+
+def _explanation_inputs(risk_result: dict):
     gene = risk_result.get("pharmacogenomic_profile", {}).get("primary_gene", "Unknown")
     drug = risk_result.get("drug", "Unknown")
     label = risk_result.get("risk_assessment", {}).get("risk_label", "Unknown")
+    return gene, drug, label
+
 
-    prompt = f"""
+def _build_prompt(gene: str, drug: str, label: str) -> str:
+    return f"""
     Explain the pharmacogenomic interaction briefly.
 
     Gene: {gene}
@@ -39,28 +330,116 @@ def generate_explanation(risk_result: dict) -> dict:
     Do NOT include numbering, paragraphs, or extra text.
     """
 
+
+def _parse_explanation(content: str) -> dict:
+    lines = content.strip().split("\n")
+    cleaned = [line.strip() for line in lines if line.strip()]
+
+    return {
+        "summary": cleaned[0] if len(cleaned) > 0 else "",
+        "biological_mechanism": cleaned[1] if len(cleaned) > 1 else "",
+        "clinical_impact": cleaned[2] if len(cleaned) > 2 else "",
+        "dosing_guidance": "Follow CPIC recommendations based on genotype and phenotype.",
+        "confidence": "High",
+    }
+
+
+def is_provider_explanation(explanation: dict) -> bool:
+    """
+    True for explanations parsed from a provider response; the static
+    fallback carries no ``confidence`` field.
+    """
+    return "confidence" in explanation
+
+
+def fallback_explanation(gene: str, drug: str) -> dict:
+    return {
+        "summary": f"{gene} may alter response to {drug}.",
+        "biological_mechanism": "Genetic variation can change drug metabolism.",
+        "clinical_impact": "Treatment efficacy or safety may differ for this patient.",
+        "dosing_guidance": "Use genotype-guided dosing and monitor closely."
+    }
+
+
+async def generate_explanation_async(risk_result: dict, timeout: float = LLM_TIMEOUT_SECONDS) -> dict:
+    """
+    LLM explanation for a report, from the cache or the provider. Identical
+    concurrent requests share one provider call.
+
+    The whole call, connection included, is bounded by ``timeout``; on
+    timeout or any provider error the static fallback is returned.
+    """
+
+    key = _explanation_inputs(risk_result)
+
+    cached = await explanation_cache.get(key)
+    if cached is not None:
+        return cached
+
+    future, is_leader = _join_or_lead(key)
+    if not is_leader:
+        return dict(await asyncio.wrap_future(future))
+
+    explanation = fallback_explanation(key[0], key[1])
     try:
-        client = _get_client()
-        response = client.chat.completions.create(
-            model="llama-3.1-8b-instant",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.2,
-        )
+        explanation, from_provider = await _request_explanation_async(*key, timeout=timeout)
+        if from_provider:
+            await explanation_cache.put(key, explanation)
+        else:
+            metrics.increment("llm_fallbacks")
+    finally:
+        _finish_lead(key, future, explanation)
 
-        lines = response.choices[0].message.content.strip().split("\n")
-        cleaned = [line.strip() for line in lines if line.strip()]
+    return dict(explanation)
 
-        return {
-            "summary": cleaned[0] if len(cleaned) > 0 else "",
-            "biological_mechanism": cleaned[1] if len(cleaned) > 1 else "",
-            "clinical_impact": cleaned[2] if len(cleaned) > 2 else "",
-            "dosing_guidance": "Follow CPIC recommendations based on genotype and phenotype.",
-            "confidence": "High",
-        }
-    except Exception as e:
-        return {
-            "summary": f"{gene} may alter response to {drug}.",
-            "biological_mechanism": "Genetic variation can change drug metabolism.",
-            "clinical_impact": "Treatment efficacy or safety may differ for this patient.",
-            "dosing_guidance": "Use genotype-guided dosing and monitor closely."
-        }
+
+async def _request_explanation_async(gene: str, drug: str, label: str, timeout: float):
+    """
+    Returns (explanation, from_provider).
+
+    Only the provider call itself feeds the circuit breaker: time spent
+    waiting for a concurrency slot, or a missing API key, is neither a
+    provider failure nor provider latency.
+    """
+
+    manager = llm_client_manager
+    if manager.breaker.state == "open":
+        return fallback_explanation(gene, drug), False
+
+    deadline = time.monotonic() + timeout
+    slots = manager.async_slots()
+    try:
+        await asyncio.wait_for(slots.acquire(), timeout=timeout)
+    except asyncio.TimeoutError:
+        return fallback_explanation(gene, drug), False
+
+    try:
+        try:
+            client = manager.get_async_client()
+        except Exception:
+            return fallback_explanation(gene, drug), False
+        if not manager.breaker.allow():
+            return fallback_explanation(gene, drug), False
+
+        started = time.monotonic()
+        try:
+            response = await asyncio.wait_for(
+                client.chat.completions.create(
+                    model=LLM_MODEL,
+                    messages=[{"role": "user", "content": _build_prompt(gene, drug, label)}],
+                    temperature=0.2,
+                ),
+                timeout=max(0.0, deadline - started)
+            )
+            explanation = _parse_explanation(response.choices[0].message.content)
+        except asyncio.CancelledError:
+            # Client disconnect or shutdown: says nothing about the provider.
+            manager.breaker.release_trial()
+            raise
+        except Exception:
+            manager.breaker.record(False, time.monotonic() - started)
+            return fallback_explanation(gene, drug), False
+        manager.breaker.record(True, time.monotonic() - started)
+        return explanation, True
+    finally:
+        slots.release()
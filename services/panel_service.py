@@ -0,0 +1,114 @@
+# ==========================================
+# Multi-Drug Panel Service
+# ==========================================
+
+from services.phenotype_mapper import determine_phenotype, determine_phenotypes_bulk
+from services.rule_engine import rule_based_risk
+from utils.predictor import predict_risk
+
+
+def resolve_panel_drugs(requested: str, drug_gene_map):
+    """
+    Turn a comma-separated drug list (or "all") into (supported, unsupported).
+    """
+
+    if not requested or requested.strip().upper() == "ALL":
+        return list(drug_gene_map), []
+
+    supported = []
+    unsupported = []
+    for name in requested.split(","):
+        drug = name.strip().upper()
+        if not drug or drug in supported:
+            continue
+        if drug in drug_gene_map:
+            supported.append(drug)
+        else:
+            unsupported.append(drug)
+
+    return supported, unsupported
+
+
+def evaluate_panel(drugs, diplotypes, gene_drug_index):
+    """
+    Score every requested drug against one patient's diplotypes.
+
+    Each gene is phenotyped once and shared by all drugs that depend on it.
+    Results come back in the order of ``drugs``.
+    """
+
+    wanted = set(drugs)
+    results = {}
+
+    for gene, gene_drugs in gene_drug_index.items():
+        panel_drugs = [drug for drug in gene_drugs if drug in wanted]
+        if not panel_drugs:
+            continue
+
+        diplotype = diplotypes.get(gene, "Unknown")
+        phenotype = determine_phenotype(gene, diplotype)
+
+        for drug in panel_drugs:
+            rule_risk, severity = rule_based_risk(drug, phenotype)
+            _, confidence = predict_risk(drug, phenotype)
+
+            results[drug] = {
+                "drug": drug,
+                "primary_gene": gene,
+                "diplotype": diplotype,
+                "phenotype": phenotype,
+                "rule_risk": rule_risk,
+                "severity": severity,
+                "confidence": confidence
+            }
+
+    return [results[drug] for drug in drugs if drug in results]
+
+
+def evaluate_cohort(drugs, gene_diplotypes, n_samples, gene_drug_index):
+    """
+    Score requested drugs for every sample of a cohort.
+
+    ``gene_diplotypes`` is the {gene: [diplotype per sample]} output of
+    ``build_diplotypes_bulk``. Phenotypes are computed once per distinct
+    diplotype and risks once per distinct (drug, phenotype).
+    """
+
+    wanted = set(drugs)
+    scores = {}
+    profiles = [{} for _ in range(n_samples)]
+    risks = [{} for _ in range(n_samples)]
+
+    for gene, gene_drugs in gene_drug_index.items():
+        panel_drugs = [drug for drug in gene_drugs if drug in wanted]
+        if not panel_drugs:
+            continue
+
+        diplotypes = gene_diplotypes.get(gene) or ["Unknown"] * n_samples
+        phenotypes = determine_phenotypes_bulk(gene, diplotypes)
+
+        for sample_index, (diplotype, phenotype) in enumerate(zip(diplotypes, phenotypes)):
+            profiles[sample_index][gene] = {
+                "diplotype": diplotype,
+                "phenotype": phenotype
+            }
+
+            for drug in panel_drugs:
+                key = (drug, phenotype)
+                if key not in scores:
+                    rule_risk, severity = rule_based_risk(drug, phenotype)
+                    _, confidence = predict_risk(drug, phenotype)
+                    scores[key] = {
+                        "risk_label": rule_risk,
+                        "confidence_score": confidence,
+                        "severity": severity
+                    }
+                risks[sample_index][drug] = scores[key]
+
+    return [
+        {
+            "pharmacogenomic_profile": profile,
+            "risk_assessment": {drug: risk[drug] for drug in drugs if drug in risk}
+        }
+        for profile, risk in zip(profiles, risks)
+    ]
@@ -1,37 +1,141 @@
 # ==========================================
 # Phenotype Mapping Service
 # ==========================================
+#
+# Phenotypes come from per-gene allele activity values
+# (data/allele_functions.json): a diplotype's score is the sum of its two
+# alleles and is mapped to a phenotype through the gene's thresholds.
+# Genes that CPIC classes by function rather than score use the same
+# scheme with no = 0, decreased = 0.5, normal = 1, increased = 1.5.
+# Missing haplotypes ("Unknown") and unlisted alleles count as the
+# reference allele; an Indeterminate diplotype has an Unknown phenotype.
+
+import json
+import re
+
+import numpy as np
+
+from config import ALLELE_FUNCTIONS_PATH
+from services.genotype_service import INDETERMINATE_DIPLOTYPE
+
+UNKNOWN_ALLELE = "Unknown"
+UNKNOWN_PHENOTYPE = "Unknown"
+
+# Misses on the precompiled index (unlisted alleles, other separators) are
+# resolved once and cached, up to this many extra entries per gene.
+MAX_CACHED_DIPLOTYPES = 4096
+
+_ALLELE_SEPARATOR = re.compile(r"[/|]")
+
+
+class GenePhenotypeTable:
+    """
+    Compiled lookups for one gene.
+
+    ``pair_table[code1, code2]`` holds the phenotype code of an allele pair,
+    so bulk phenotyping is a single numpy gather over allele codes, and
+    ``diplotype_index`` maps every "allele/allele" string of the known
+    alleles (both orders) straight to its phenotype.
+    """
+
+    def __init__(self, gene, spec, reference_allele):
+        self.gene = gene
+        self.aliases = dict(spec.get("aliases") or {})
+
+        values = dict(spec["alleles"])
+        if spec.get("duplications"):
+            for allele, value in list(values.items()):
+                for copies in (2, 3):
+                    values[f"{allele}x{copies}"] = value * copies
+                values[f"{allele}xN"] = value * 2
+
+        self.alleles = list(values)
+        self.allele_index = {allele: code for code, allele in enumerate(self.alleles)}
+        self.reference_code = self.allele_index[reference_allele]
+
+        thresholds = sorted(spec["thresholds"])
+        self.phenotypes = np.array([phenotype for _, phenotype in thresholds], dtype=object)
+
+        scores = np.array([values[allele] for allele in self.alleles], dtype=float)
+        pair_scores = scores[:, None] + scores[None, :]
+        self.pair_table = np.maximum(
+            np.searchsorted([score for score, _ in thresholds], pair_scores, side="right") - 1,
+            0
+        )
+
+        self.diplotype_index = {}
+        labels = self.alleles + [UNKNOWN_ALLELE]
+        codes = list(range(len(self.alleles))) + [self.reference_code]
+        for first_label, first in zip(labels, codes):
+            for second_label, second in zip(labels, codes):
+                self.diplotype_index[f"{first_label}/{second_label}"] = self.phenotypes[self.pair_table[first, second]]
+        self.diplotype_index[UNKNOWN_ALLELE] = self.phenotypes[self.pair_table[self.reference_code, self.reference_code]]
+        self._compiled_size = len(self.diplotype_index)
+
+    def allele_code(self, allele: str) -> int:
+        allele = allele.strip()
+        allele = self.aliases.get(allele, allele)
+        return self.allele_index.get(allele, self.reference_code)
+
+    def allele_codes(self, diplotype: str):
+        alleles = _ALLELE_SEPARATOR.split(diplotype)
+        first = self.allele_code(alleles[0])
+        second = self.allele_code(alleles[1]) if len(alleles) > 1 else self.reference_code
+        return first, second
+
+    def phenotype(self, diplotype: str):
+        phenotype = self.diplotype_index.get(diplotype)
+        if phenotype is None:
+            phenotype = self.phenotypes[self.pair_table[self.allele_codes(diplotype)]]
+            if len(self.diplotype_index) < self._compiled_size + MAX_CACHED_DIPLOTYPES:
+                self.diplotype_index[diplotype] = phenotype
+        return phenotype
+
+    def phenotype_codes(self, first_codes, second_codes):
+        """
+        Vectorized: phenotype code for each pair of allele-code arrays.
+        """
+
+        return self.pair_table[first_codes, second_codes]
+
+
+def load_phenotype_tables(path=ALLELE_FUNCTIONS_PATH):
+    with open(path, "r", encoding="utf-8") as handle:
+        data = json.load(handle)
+
+    reference_allele = data.get("reference_allele", "*1")
+    return {
+        gene: GenePhenotypeTable(gene, spec, reference_allele)
+        for gene, spec in data["genes"].items()
+    }
+
+
+PHENOTYPE_TABLES = load_phenotype_tables()
+
 
 def determine_phenotype(gene, diplotype):
+    table = PHENOTYPE_TABLES.get(gene)
+    if table is None or diplotype == INDETERMINATE_DIPLOTYPE:
+        return UNKNOWN_PHENOTYPE
+    return table.phenotype(diplotype)
+
+
+def determine_phenotypes_bulk(gene, diplotypes):
+    """
+    Phenotype a list of diplotypes: each distinct one is split into allele
+    codes once and all of them are resolved with one table gather.
+    """
+
+    table = PHENOTYPE_TABLES.get(gene)
+    if table is None:
+        return [UNKNOWN_PHENOTYPE] * len(diplotypes)
+
+    distinct = [diplotype for diplotype in dict.fromkeys(diplotypes) if diplotype != INDETERMINATE_DIPLOTYPE]
+    lookup = {INDETERMINATE_DIPLOTYPE: UNKNOWN_PHENOTYPE}
+    if not distinct:
+        return [lookup[diplotype] for diplotype in diplotypes]
 
-    if gene == "CYP2D6":
-        if "*4/*4" in diplotype:
-            return "PM"
-        if "*4" in diplotype:
-            return "IM"
-        if "*2" in diplotype:
-            return "RM"
-        return "NM"
-
-    if gene == "CYP2C19":
-        if "*2/*2" in diplotype:
-            return "PM"
-        if "*2" in diplotype:
-            return "IM"
-        if "*17" in diplotype:
-            return "RM"
-        return "NM"
-
-    if gene == "CYP2C9":
-        if "*3/*3" in diplotype:
-            return "PM"
-        if "*2" in diplotype or "*3" in diplotype:
-            return "IM"
-        return "NM"
-
-    if gene in ["SLCO1B1", "TPMT", "DPYD"]:
-        if "*2" in diplotype or "*3" in diplotype or "*5" in diplotype:
-            return "IM"
-        return "NM"
-
-    return "Unknown"
+    codes = np.array([table.allele_codes(diplotype) for diplotype in distinct], dtype=np.intp)
+    phenotypes = table.phenotypes[table.phenotype_codes(codes[:, 0], codes[:, 1])]
+    lookup.update(zip(distinct, phenotypes.tolist()))
+    return [lookup[diplotype] for diplotype in diplotypes]
@@ -0,0 +1,77 @@
+# ==========================================
+# Startup Readiness
+# ==========================================
+#
+# The API answers liveness checks as soon as it is imported; heavy pieces
+# (the RandomForest model with pandas / scikit-learn, the LLM client
+# libraries) load on first use or in the background warm-up started by the
+# app lifespan. Readiness flips once every warm-up step has finished.
+
+import threading
+import time
+
+from ml_model import model_instance
+from services.llm_service import llm_client_manager
+from services.rule_engine import rule_engine
+
+STARTING = "starting"
+READY = "ready"
+FAILED = "failed"
+
+WARMUP_STEPS = (
+    ("model", model_instance.ensure_loaded),
+    ("rules", rule_engine.current),
+    ("llm_client", llm_client_manager.warm_up),
+)
+
+
+class Readiness:
+    """
+    Tracks the warm-up: overall state plus per-step load times.
+    """
+
+    def __init__(self, steps=WARMUP_STEPS):
+        self.steps = steps
+        self.state = STARTING
+        self.error = None
+        self.timings = {}
+        self._created = time.monotonic()
+        self._lock = threading.Lock()
+
+    @property
+    def is_ready(self) -> bool:
+        return self.state == READY
+
+    def warm_up(self):
+        """
+        Run every warm-up step once. Safe to call from several threads.
+        """
+
+        with self._lock:
+            if self.state == READY:
+                return
+
+            self.state = STARTING
+            self.error = None
+            try:
+                for name, step in self.steps:
+                    started = time.perf_counter()
+                    step()
+                    self.timings[name] = round(time.perf_counter() - started, 4)
+            except Exception as exc:
+                self.state = FAILED
+                self.error = f"{name}: {exc}"
+                print(f"⚠️ Warm-up failed at {self.error}")
+                return
+
+            self.state = READY
+            self.timings["since_start"] = round(time.monotonic() - self._created, 4)
+
+    def status(self):
+        payload = {"status": self.state, "timings": dict(self.timings)}
+        if self.error:
+            payload["error"] = self.error
+        return payload
+
+
+readiness = Readiness()
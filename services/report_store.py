@@ -0,0 +1,151 @@
+# ==========================================
+# Deferred Report Store
+# ==========================================
+
+import asyncio
+import json
+import os
+import sqlite3
+import time
+import uuid
+
+from config import REPORT_STORE_MAX_REPORTS, REPORT_STORE_PATH, REPORT_STORE_POLL_SECONDS, REPORT_STORE_TTL_SECONDS
+from utils.concurrency import run_blocking
+from utils.processes import pid_alive
+
+
+def new_report_id() -> str:
+    return uuid.uuid4().hex
+
+
+class StoredReport:
+    def __init__(self, report, ready: bool):
+        self.report = report
+        self.ready = ready
+
+
+class ReportStore:
+    """
+    Reports whose LLM explanation is generated in the background, kept in
+    a local SQLite file shared by all API workers: any worker can answer
+    for a report created by another. Bounded by count and age; oldest
+    entries are evicted first.
+
+    The explanation is produced by the worker that created the report. A
+    pending report whose worker has exited is treated as gone.
+    """
+
+    def __init__(
+        self,
+        path: str = REPORT_STORE_PATH,
+        max_reports: int = REPORT_STORE_MAX_REPORTS,
+        ttl_seconds: float = REPORT_STORE_TTL_SECONDS,
+        poll_seconds: float = REPORT_STORE_POLL_SECONDS
+    ):
+        self.path = path
+        self.max_reports = max_reports
+        self.ttl_seconds = ttl_seconds
+        self.poll_seconds = poll_seconds
+        self._initialized = False
+        # Reports being explained by this worker: id → (task, ready event).
+        self._local = {}
+
+    def _connect(self):
+        connection = sqlite3.connect(self.path, timeout=10)
+        if not self._initialized:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS reports ("
+                "id TEXT PRIMARY KEY, owner_pid INTEGER, created REAL, ready INTEGER, report TEXT)"
+            )
+            connection.execute("CREATE INDEX IF NOT EXISTS reports_created ON reports (created)")
+            self._initialized = True
+        return connection
+
+    def create(self, report_id: str, report):
+        with self._connect() as connection:
+            self._evict(connection)
+            connection.execute(
+                "INSERT INTO reports VALUES (?, ?, ?, 0, ?)",
+                (report_id, os.getpid(), time.time(), json.dumps(report))
+            )
+
+    def get(self, report_id: str):
+        with self._connect() as connection:
+            row = connection.execute(
+                "SELECT owner_pid, created, ready, report FROM reports WHERE id=?", (report_id,)
+            ).fetchone()
+        if row is None:
+            return None
+
+        owner_pid, created, ready, report = row
+        if created < time.time() - self.ttl_seconds:
+            return None
+        if not ready and report_id not in self._local and not pid_alive(owner_pid):
+            return None
+        return StoredReport(json.loads(report), bool(ready))
+
+    def _complete(self, report_id: str, report):
+        with self._connect() as connection:
+            connection.execute(
+                "UPDATE reports SET ready=1, report=? WHERE id=?", (json.dumps(report), report_id)
+            )
+
+    def start_explanation(self, report_id: str, report, coroutine_factory):
+        """
+        Run ``coroutine_factory(report)`` in the background and store its
+        result as the report's ``llm_generated_explanation``.
+        """
+
+        ready = asyncio.Event()
+
+        async def complete():
+            try:
+                try:
+                    report["llm_generated_explanation"] = await coroutine_factory(report)
+                finally:
+                    # Stored even on failure so readers stop waiting.
+                    await run_blocking(self._complete, report_id, report)
+            finally:
+                ready.set()
+                self._local.pop(report_id, None)
+
+        # The registry keeps a reference so the task is not garbage collected.
+        self._local[report_id] = (asyncio.create_task(complete()), ready)
+
+    async def wait(self, report_id: str, timeout: float):
+        """
+        The report once its explanation is ready or ``timeout`` seconds
+        have passed (None: no limit); None when it is gone. Reports
+        explained by this worker wake on completion, others are polled.
+        """
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            entry = await run_blocking(self.get, report_id)
+            if entry is None or entry.ready:
+                return entry
+
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return entry
+
+            local = self._local.get(report_id)
+            if local is None:
+                await asyncio.sleep(self.poll_seconds if remaining is None else min(self.poll_seconds, remaining))
+                continue
+            try:
+                await asyncio.wait_for(local[1].wait(), timeout=remaining)
+            except asyncio.TimeoutError:
+                pass
+
+    def _evict(self, connection):
+        connection.execute("DELETE FROM reports WHERE created < ?", (time.time() - self.ttl_seconds,))
+        connection.execute(
+            "DELETE FROM reports WHERE id NOT IN "
+            "(SELECT id FROM reports ORDER BY created DESC LIMIT ?)",
+            (max(0, self.max_reports - 1),)
+        )
+
+
+report_store = ReportStore()
@@ -2,11 +2,39 @@
 # Final JSON Response Builder
 # ==========================================
 
+import asyncio
 from datetime import datetime
-from services.llm_service import generate_explanation
+from services.llm_service import generate_explanation_async
+from services.rule_engine import rule_engine
+from utils.metrics import stage_timer
 
 
-def build_final_response(
+def request_fields():
+    """
+    Fields identifying one request rather than the analysis result.
+    """
+
+    now = datetime.utcnow()
+    return {
+        "patient_id": f"PATIENT_{now.strftime('%H%M%S')}",
+        "timestamp": now.isoformat(),
+    }
+
+
+def refresh_request_fields(result):
+    """
+    Stamp a cached report (and each panel entry) with this request's
+    fields so a replay does not echo the first caller's.
+    """
+
+    fields = request_fields()
+    result.update(fields)
+    for entry in result.get("results", []):
+        entry.update(fields)
+    return result
+
+
+def build_report(
     drug,
     primary_gene,
     diplotype,
@@ -18,13 +46,18 @@ def build_final_response(
     annotation_warnings=None
 ):
     """
-    Build hackathon-required structured JSON output.
+    Build hackathon-required structured JSON output, without the LLM
+    explanation (left as an empty section).
     """
 
+    # Recommendation texts come from the same rule table as the risk label.
+    recommendation_summary, recommended_action = rule_engine.current().recommendation(drug, rule_risk)
+
+    fields = request_fields()
     response = {
-        "patient_id": f"PATIENT_{datetime.utcnow().strftime('%H%M%S')}",
+        "patient_id": fields["patient_id"],
         "drug": drug,
-        "timestamp": datetime.utcnow().isoformat(),
+        "timestamp": fields["timestamp"],
 
         # -----------------------------
         # Risk Assessment Section
@@ -42,16 +75,16 @@ def build_final_response(
             "primary_gene": primary_gene,
             "diplotype": diplotype,
             "phenotype": phenotype,
-            "detected_variants": variants
+            "detected_variants": [variant.to_dict() for variant in variants]
         },
 
         # -----------------------------
         # Clinical Recommendation
         # -----------------------------
         "clinical_recommendation": {
-            "recommendation_summary": generate_recommendation(drug, rule_risk),
+            "recommendation_summary": recommendation_summary,
             "cpic_guideline_reference": f"CPIC Guideline for {primary_gene} and {drug}",
-            "recommended_action": generate_action(rule_risk)
+            "recommended_action": recommended_action
         },
 
         # -----------------------------
@@ -65,40 +98,86 @@ def build_final_response(
         "quality_metrics": {
             "vcf_parsing_success": True,
             "variants_detected": len(variants),
-            "genes_matched": len(set(v["gene"] for v in variants)),
+            "genes_matched": len(set(v.gene for v in variants)),
             "drugs_processed": 1,
             "annotation_warnings": annotation_warnings or []
         }
     }
 
-    response["llm_generated_explanation"] = generate_explanation(response)
+    return response
+
 
+async def build_final_response_async(**report_fields):
+    """
+    Build the full report, awaiting the LLM explanation without blocking
+    the event loop.
+    """
+
+    response = build_report(**report_fields)
+    with stage_timer("llm"):
+        response["llm_generated_explanation"] = await generate_explanation_async(response)
     return response
 
 
-# --------------------------------------------------
-# Helper Functions
-# --------------------------------------------------
-
-def generate_recommendation(drug, risk):
-    if risk == "Safe":
-        return f"{drug} can be prescribed at standard dosage."
-    if risk == "Adjust Dosage":
-        return f"{drug} requires dosage adjustment."
-    if risk == "Toxic":
-        return f"Avoid {drug} due to high toxicity risk."
-    if risk == "Ineffective":
-        return f"{drug} may be ineffective due to metabolic variation."
-    return "Consult specialist."
-
-
-def generate_action(risk):
-    if risk == "Safe":
-        return "Proceed with standard treatment."
-    if risk == "Adjust Dosage":
-        return "Reduce or adjust dosage."
-    if risk == "Toxic":
-        return "Avoid drug and use alternative."
-    if risk == "Ineffective":
-        return "Consider alternative therapy."
-    return "Further evaluation required."
+async def build_panel_response_async(drug_results, variants, annotation_warnings=None):
+    """
+    Combine per-drug results from one VCF into a single panel report.
+    Each entry in ``results`` has the same shape as a single-drug
+    ``/analyze`` response; per-drug explanations run concurrently.
+    """
+
+    results = [
+        build_report(
+            variants=variants,
+            annotation_warnings=annotation_warnings,
+            **drug_result
+        )
+        for drug_result in drug_results
+    ]
+
+    with stage_timer("llm"):
+        explanations = await asyncio.gather(*(generate_explanation_async(result) for result in results))
+    for result, explanation in zip(results, explanations):
+        result["llm_generated_explanation"] = explanation
+
+    return _panel_envelope(results, variants, annotation_warnings)
+
+
+def _panel_envelope(results, variants, annotation_warnings):
+    return {
+        **request_fields(),
+        "drugs": [result["drug"] for result in results],
+        "results": results,
+        "quality_metrics": {
+            "vcf_parsing_success": True,
+            "variants_detected": len(variants),
+            "genes_matched": len(set(v.gene for v in variants)),
+            "drugs_processed": len(results),
+            "annotation_warnings": annotation_warnings or []
+        }
+    }
+
+
+def build_cohort_response(samples, sample_results, drugs, variants, annotation_warnings=None):
+    """
+    Build the multi-sample report: one profile and risk entry per sample.
+    No LLM explanation is generated per sample.
+    """
+
+    return {
+        "cohort_id": f"COHORT_{datetime.utcnow().strftime('%H%M%S')}",
+        "timestamp": datetime.utcnow().isoformat(),
+        "drugs": drugs,
+        "sample_count": len(samples),
+        "results": [
+            {"sample_id": sample_id, **result}
+            for sample_id, result in zip(samples, sample_results)
+        ],
+        "quality_metrics": {
+            "vcf_parsing_success": True,
+            "variants_detected": len(variants),
+            "genes_matched": len(set(v.gene for v in variants)),
+            "drugs_processed": len(drugs),
+            "annotation_warnings": annotation_warnings or []
+        }
+    }
@@ -0,0 +1,151 @@
+# ==========================================
+# Content-Addressed Result Cache
+# ==========================================
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from config import (
+    PIPELINE_VERSION,
+    RESULT_CACHE_BACKEND,
+    RESULT_CACHE_PATH,
+    RESULT_CACHE_MAX_BYTES,
+)
+from ml_model import model_instance
+from services.rule_engine import rule_engine
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def hash_file(file_obj) -> str:
+    """
+    SHA-256 of a seekable binary file; the position is reset to 0.
+    """
+
+    digest = hashlib.sha256()
+    file_obj.seek(0)
+    while True:
+        chunk = file_obj.read(HASH_CHUNK_SIZE)
+        if not chunk:
+            break
+        digest.update(chunk)
+    file_obj.seek(0)
+    return digest.hexdigest()
+
+
+def pipeline_version() -> str:
+    """
+    Identifies everything besides the input that shapes a result.
+    """
+
+    return f"{PIPELINE_VERSION}:{model_instance.fingerprint}:{rule_engine.fingerprint}"
+
+
+def result_cache_key(content_hash: str, endpoint: str, *params) -> str:
+    material = "|".join([content_hash, endpoint, pipeline_version(), *map(str, params)])
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class MemoryResultCache:
+    """
+    Per-process LRU bounded by total serialized size.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            payload = self._entries.get(key)
+            if payload is None:
+                return None
+            self._entries.move_to_end(key)
+        return json.loads(payload)
+
+    def put(self, key: str, value):
+        payload = json.dumps(value).encode("utf-8")
+        if len(payload) > self.max_bytes:
+            return
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.total_bytes -= len(previous)
+            self._entries[key] = payload
+            self.total_bytes += len(payload)
+            while self.total_bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.total_bytes -= len(evicted)
+
+class SQLiteResultCache:
+    """
+    Local SQLite store shared by all workers on the host. Least recently
+    used rows are deleted once the total payload size exceeds the limit.
+    """
+
+    def __init__(self, path: str, max_bytes: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        with self._connect() as connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                "key TEXT PRIMARY KEY, payload BLOB, size INTEGER, accessed REAL)"
+            )
+            connection.execute("CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed)")
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=5)
+
+    def get(self, key: str):
+        try:
+            with self._connect() as connection:
+                row = connection.execute("SELECT payload FROM results WHERE key=?", (key,)).fetchone()
+                if row is not None:
+                    connection.execute("UPDATE results SET accessed=? WHERE key=?", (time.time(), key))
+        except sqlite3.Error:
+            row = None
+
+        if row is None:
+            return None
+        return json.loads(row[0])
+
+    def put(self, key: str, value):
+        payload = json.dumps(value).encode("utf-8")
+        if len(payload) > self.max_bytes:
+            return
+
+        try:
+            with self._connect() as connection:
+                connection.execute(
+                    "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)",
+                    (key, payload, len(payload), time.time())
+                )
+                (total,) = connection.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()
+                if total > self.max_bytes:
+                    connection.execute(
+                        "DELETE FROM results WHERE key IN ("
+                        " SELECT key FROM (SELECT key, SUM(size) OVER (ORDER BY accessed DESC) AS running"
+                        " FROM results) WHERE running > ?)",
+                        (self.max_bytes,)
+                    )
+        except sqlite3.Error:
+            pass
+
+
+def create_result_cache(backend: str = RESULT_CACHE_BACKEND):
+    if backend == "sqlite":
+        return SQLiteResultCache(RESULT_CACHE_PATH, RESULT_CACHE_MAX_BYTES)
+    if backend == "memory":
+        return MemoryResultCache(RESULT_CACHE_MAX_BYTES)
+    return None
+
+
+result_cache = create_result_cache()
@@ -2,65 +2,202 @@
 # CPIC Rule-Based Risk Engine
 # ==========================================
 
+import json
+import os
+import threading
+import time
+from collections.abc import Mapping
+
+from config import RULES_PATH, RULES_RELOAD_CHECK_INTERVAL
+
+# Phenotype value that matches any phenotype without its own rule.
+ANY_PHENOTYPE = "*"
+
+# An Unknown phenotype (indeterminate genotype) is not covered by "*": it
+# gets the unknown outcome unless a rule names it.
+UNKNOWN_PHENOTYPE = "UNKNOWN"
+
+
+class RuleTableError(ValueError):
+    pass
+
+
+class CompiledRuleTable:
+    """
+    Immutable, direct-indexed form of the rule file.
+
+    Drugs and phenotypes are mapped to integer ids once; a lookup is two
+    dict hits and a tuple index. A reload builds a new instance and swaps
+    it in, so readers always see one complete table.
+    """
+
+    def __init__(self, data, fingerprint):
+        self.fingerprint = fingerprint
+        self.version = data.get("version")
+
+        unknown = data.get("unknown_drug") or {"risk_label": "Unknown", "severity": "low"}
+        self.unknown_drug = (unknown["risk_label"], unknown["severity"])
+
+        drug_genes = {}
+        rows = {}
+
+        for position, rule in enumerate(data.get("rules") or []):
+            try:
+                drug = rule["drug"].upper()
+                gene = rule["gene"]
+                phenotype = rule["phenotype"].upper()
+                outcome = (rule["risk_label"], rule["severity"])
+            except (KeyError, TypeError, AttributeError):
+                raise RuleTableError(f"Rule #{position} needs drug, gene, phenotype, risk_label and severity.")
+
+            if drug_genes.setdefault(drug, gene) != gene:
+                raise RuleTableError(f"{drug} is mapped to both {drug_genes[drug]} and {gene}.")
+            rows.setdefault(drug, {})[phenotype] = outcome
+
+        if not drug_genes:
+            raise RuleTableError("The rule table has no rules.")
+
+        phenotypes = sorted(({phenotype for row in rows.values() for phenotype in row} | {UNKNOWN_PHENOTYPE}) - {ANY_PHENOTYPE})
+        self.phenotype_index = {phenotype: position for position, phenotype in enumerate(phenotypes)}
+        self.drug_index = {drug: position for position, drug in enumerate(drug_genes)}
+
+        # One row per drug, one column per known phenotype plus a final
+        # column for everything else.
+        columns = phenotypes + [ANY_PHENOTYPE]
+        self.outcomes = tuple(
+            tuple(
+                rows[drug].get(
+                    phenotype,
+                    self.unknown_drug if phenotype == UNKNOWN_PHENOTYPE
+                    else rows[drug].get(ANY_PHENOTYPE, self.unknown_drug)
+                )
+                for phenotype in columns
+            )
+            for drug in drug_genes
+        )
+
+        self.drug_gene_map = dict(drug_genes)
+        self.gene_drug_index = {}
+        for drug, gene in drug_genes.items():
+            self.gene_drug_index.setdefault(gene, []).append(drug)
+
+        recommendations = data.get("recommendations") or {}
+        fallback = recommendations.get(ANY_PHENOTYPE) or {"summary": "Consult specialist.", "action": "Further evaluation required."}
+        self.fallback_recommendation = (fallback["summary"], fallback["action"])
+        self.recommendations = {
+            risk_label: (text["summary"], text["action"])
+            for risk_label, text in recommendations.items()
+            if risk_label != ANY_PHENOTYPE
+        }
+
+    def risk(self, drug: str, phenotype: str):
+        drug_id = self.drug_index.get(drug)
+        if drug_id is None:
+            drug_id = self.drug_index.get(drug.upper())
+            if drug_id is None:
+                return self.unknown_drug
+
+        phenotype_id = self.phenotype_index.get(phenotype)
+        if phenotype_id is None:
+            phenotype_id = self.phenotype_index.get(phenotype.upper(), len(self.phenotype_index))
+
+        return self.outcomes[drug_id][phenotype_id]
+
+    def recommendation(self, drug: str, risk_label: str):
+        summary, action = self.recommendations.get(risk_label, self.fallback_recommendation)
+        return summary.format(drug=drug), action
+
+
+def _rules_fingerprint(path):
+    stat = os.stat(path)
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def load_rule_table(path=RULES_PATH):
+    fingerprint = _rules_fingerprint(path)
+    try:
+        with open(path, "r", encoding="utf-8") as handle:
+            data = json.load(handle)
+    except json.JSONDecodeError as exc:
+        raise RuleTableError(f"Invalid rule file {path}: {exc}")
+    return CompiledRuleTable(data, fingerprint)
+
+
+class RuleEngine:
+    """
+    Holds the current compiled table and swaps in a new one when the rule
+    file changes (checked at most every RULES_RELOAD_CHECK_INTERVAL seconds).
+    A file that fails to load is reported and the previous table is kept.
+    """
+
+    def __init__(self, path=RULES_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._table = load_rule_table(path)
+        self._next_check = time.monotonic() + RULES_RELOAD_CHECK_INTERVAL
+        self.drug_gene_map = _TableView(self, "drug_gene_map")
+        self.gene_drug_index = _TableView(self, "gene_drug_index")
+
+    def current(self) -> CompiledRuleTable:
+        if time.monotonic() >= self._next_check:
+            self._reload_if_changed()
+        return self._table
+
+    def _reload_if_changed(self):
+        with self._lock:
+            if time.monotonic() < self._next_check:
+                return
+            self._next_check = time.monotonic() + RULES_RELOAD_CHECK_INTERVAL
+            try:
+                if _rules_fingerprint(self.path) == self._table.fingerprint:
+                    return
+                table = load_rule_table(self.path)
+            except (OSError, RuleTableError) as exc:
+                print(f"⚠️ Rule table reload failed, keeping previous rules: {exc}")
+                return
+            self._table = table
+            print(f"✅ Rule table reloaded ({len(table.drug_index)} drugs).")
+
+    @property
+    def fingerprint(self):
+        return self.current().fingerprint
+
+
+class _TableView(Mapping):
+    """
+    Read-only mapping that always reflects the current table.
+    """
+
+    def __init__(self, engine, attribute):
+        self._engine = engine
+        self._attribute = attribute
+
+    def _snapshot(self):
+        return getattr(self._engine.current(), self._attribute)
+
+    def __getitem__(self, key):
+        return self._snapshot()[key]
+
+    def __iter__(self):
+        return iter(list(self._snapshot()))
+
+    def __len__(self):
+        return len(self._snapshot())
+
+    def items(self):
+        return list(self._snapshot().items())
+
+    def __repr__(self):
+        return repr(self._snapshot())
+
+
+rule_engine = RuleEngine()
+
+
 def rule_based_risk(drug: str, phenotype: str):
     """
     Determine drug risk using CPIC-style deterministic rules.
     Returns: (risk_label, severity)
     """
 
-    drug = drug.upper()
-    phenotype = phenotype.upper()
-
-    # ---------------------------------------
-    # CODEINE - CYP2D6
-    # ---------------------------------------
-    if drug == "CODEINE":
-        if phenotype == "PM":
-            return "Ineffective", "moderate"
-        if phenotype in ["RM", "URM"]:
-            return "Toxic", "high"
-        return "Safe", "none"
-
-    # ---------------------------------------
-    # WARFARIN - CYP2C9
-    # ---------------------------------------
-    if drug == "WARFARIN":
-        if phenotype in ["PM", "IM"]:
-            return "Adjust Dosage", "moderate"
-        return "Safe", "none"
-
-    # ---------------------------------------
-    # CLOPIDOGREL - CYP2C19
-    # ---------------------------------------
-    if drug == "CLOPIDOGREL":
-        if phenotype == "PM":
-            return "Ineffective", "high"
-        if phenotype == "IM":
-            return "Adjust Dosage", "moderate"
-        return "Safe", "none"
-
-    # ---------------------------------------
-    # SIMVASTATIN - SLCO1B1
-    # ---------------------------------------
-    if drug == "SIMVASTATIN":
-        if phenotype == "IM":
-            return "Adjust Dosage", "moderate"
-        return "Safe", "none"
-
-    # ---------------------------------------
-    # AZATHIOPRINE - TPMT
-    # ---------------------------------------
-    if drug == "AZATHIOPRINE":
-        if phenotype == "IM":
-            return "Toxic", "high"
-        return "Safe", "none"
-
-    # ---------------------------------------
-    # FLUOROURACIL - DPYD
-    # ---------------------------------------
-    if drug == "FLUOROURACIL":
-        if phenotype == "IM":
-            return "Toxic", "critical"
-        return "Safe", "none"
-
-    return "Unknown", "low"
+    return rule_engine.current().risk(drug, phenotype)
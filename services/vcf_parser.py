@@ -2,6 +2,33 @@
 # VCF Parsing Service
 # ==========================================
 
+import functools
+import io
+import multiprocessing
+import os
+import re
+import sys
+from array import array
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from config import PARSE_WORKERS
+from utils.concurrency import run_blocking
+from utils.metrics import stage_timer
+
+from services.bgzf_reader import (
+    BGZFError,
+    BGZFReader,
+    GzipStreamDecompressor,
+    TabixIndex,
+    is_gzip,
+    iter_region_lines,
+    normalize_chrom,
+)
+from services.genotype_service import SITES_ONLY_ALLELE
+
 TARGET_GENES = [
     "CYP2D6",
     "CYP2C19",
@@ -11,45 +38,220 @@ TARGET_GENES = [
     "DPYD"
 ]
 
+# Gene loci (chrom, start, end; 1-based inclusive, padded by ~2 kb) used for
+# region-restricted reads of indexed files. GRCh37 and GRCh38 coordinates
+# are both listed (TPMT is the same in both) so either build is covered; GENE annotations are
+# still checked on every record that is read.
+TARGET_GENE_REGIONS = {
+    "CYP2D6": [("22", 42520000, 42529000), ("22", 42124000, 42133000)],
+    "CYP2C19": [("10", 96520000, 96615000), ("10", 94760000, 94858000)],
+    "CYP2C9": [("10", 96696000, 96752000), ("10", 94936000, 94993000)],
+    "SLCO1B1": [("12", 21282000, 21395000), ("12", 21126000, 21245000)],
+    "TPMT": [("6", 18126000, 18158000)],
+    "DPYD": [("1", 97541000, 98389000), ("1", 97075000, 97924000)],
+}
+
+# Bytes pulled from an upload per read when streaming.
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+
+MISSING_GENE_WARNING = "One or more variants are missing GENE annotation and were skipped."
+
+# Byte-level pre-filter: rows that cannot carry a target GENE value are
+# counted without being split or decoded.
+_TARGET_GENE_PATTERN = re.compile(
+    rb"GENE=(?:" + b"|".join(re.escape(gene.encode("ascii")) for gene in TARGET_GENES) + rb")"
+)
+# A non-empty GENE value; the match runs to the end of the line, so there
+# is one match per annotated line. Only used on blocks where every "GENE="
+# starts an INFO item and no line has two of them. A CR is not part of a
+# value: decoding strips it from CRLF lines.
+_GENE_VALUE_LINE = re.compile(rb"GENE=[^;\t\r\n]()[^\n]*")
+# Matches (empty) at the start of a line without a non-empty GENE value.
+_MISSING_GENE_LINE = re.compile(rb"^(?![^\n]*[\t;]GENE=[^;\t\r\n])", re.MULTILINE)
+# One match per line with a "GENE=" key (the empty group keeps findall
+# from copying lines).
+_GENE_KEY_LINE = re.compile(rb"GENE=()[^\n]*")
+_IRREGULAR_LINE_START = re.compile(rb"\n[\s#\x1c-\x1f]")
+_NON_SEPARATORS = bytes(range(256)).translate(None, b"\t\n")
+
 
 class VCFValidationError(Exception):
     pass
 
 
-def parse_vcf(file_content: str, return_warnings: bool = False):
+class EmptyVCFError(VCFValidationError):
+    pass
+
+
+class VCFEncodingError(VCFValidationError):
+    pass
+
+
+class VariantRecord:
     """
-    Parse VCF file content and extract pharmacogenomic variants.
+    One PGx variant. Slotted, with interned gene and star strings, so large
+    result lists cost a fraction of the equivalent dicts.
+
+    ``genotype`` is the (allele, allele, phased) call of the first sample,
+    or None for sites-only records; it is not part of the API output.
     """
 
-    variants = []
-    warnings = []
+    __slots__ = ("gene", "rsid", "star", "genotype")
+
+    def __init__(self, gene: str, rsid: str, star: str, genotype=None):
+        self.gene = sys.intern(gene)
+        self.rsid = rsid
+        self.star = sys.intern(star)
+        self.genotype = genotype
+
+    def to_dict(self):
+        return {"gene": self.gene, "rsid": self.rsid, "star": self.star}
+
+    def __eq__(self, other):
+        if not isinstance(other, VariantRecord):
+            return NotImplemented
+        return (
+            (self.gene, self.rsid, self.star, self.genotype)
+            == (other.gene, other.rsid, other.star, other.genotype)
+        )
+
+    def __repr__(self):
+        return (
+            f"VariantRecord(gene={self.gene!r}, rsid={self.rsid!r}, "
+            f"star={self.star!r}, genotype={self.genotype!r})"
+        )
+
+
+# Distinct GT strings seen in practice are few ("0/1", "1|0", "./.", ...);
+# the cap only matters for files with many multiallelic or malformed calls.
+GT_CACHE_SIZE = 1024
+
+
+@functools.lru_cache(maxsize=GT_CACHE_SIZE)
+def parse_gt(gt):
+    """
+    (first allele, second allele, phased) for a GT string; alleles above
+    127 are clamped to fit the int8 genotype matrix, missing alleles are -1.
+    """
+
+    codes = [-1, -1]
+    phased = 0
+    if gt:
+        phased = 1 if "|" in gt else 0
+        for position, allele in enumerate(gt.replace("|", "/").split("/")[:2]):
+            if allele.isdigit():
+                codes[position] = min(int(allele), 127)
+        if "/" not in gt and "|" not in gt:
+            # Haploid call: mirror onto the second haplotype.
+            codes[1] = codes[0]
+
+    return codes[0], codes[1], phased
+
+
+class VCFStreamParser:
+    """
+    Incremental VCF parser.
+
+    Raw bytes are pushed in with ``feed`` as they arrive and each call returns
+    the PGx variants completed by that chunk. Only the trailing partial line is
+    buffered, so memory stays bounded by the chunk size regardless of file
+    size. ``close`` flushes the last line and runs end-of-file validation.
+    """
+
+    def __init__(self):
+        self.lines_read = 0
+        self.data_rows = 0
+        self.malformed_rows = 0
+        self.has_chrom_header = False
+        self._warnings = Counter()
+        self._buffer = b""
+
+    # Set to False to parse every row in full (benchmark baseline).
+    prefilter = True
+
+    def feed(self, chunk: bytes):
+        if not chunk:
+            return []
+
+        data = self._buffer + chunk
+        end = data.rfind(b"\n")
+        if end < 0:
+            self._buffer = data
+            return []
+
+        self._buffer = data[end + 1:]
+        block = data[:end]
+
+        if self._can_prefilter(block):
+            return self._feed_candidates(block)
+
+        variants = []
+        for raw_line in block.split(b"\n"):
+            variant = self.feed_line(self.decode_line(raw_line))
+            if variant is not None:
+                variants.append(variant)
+
+        return variants
+
+    def close(self):
+        variants = []
+
+        if self._buffer:
+            variant = self.feed_line(self.decode_line(self._buffer))
+            self._buffer = b""
+            if variant is not None:
+                variants.append(variant)
+
+        if self.lines_read == 0:
+            raise EmptyVCFError("The uploaded VCF file is empty.")
+
+        if not self.has_chrom_header:
+            raise VCFValidationError("Missing required VCF header line (#CHROM).")
 
-    lines = file_content.splitlines()
+        if self.data_rows == 0:
+            raise VCFValidationError("No variant records were found in the VCF file.")
 
-    if not lines:
-        raise VCFValidationError("The uploaded VCF file is empty.")
+        if self.malformed_rows > 0:
+            self._warn(f"{self.malformed_rows} malformed variant record(s) were skipped.")
 
-    has_chrom_header = any(line.startswith("#CHROM") for line in lines)
-    if not has_chrom_header:
-        raise VCFValidationError("Missing required VCF header line (#CHROM).")
+        return variants
 
-    malformed_rows = 0
-    data_rows = 0
+    def get_warnings(self):
+        return list(self._warnings)
+
+    def get_warning_counts(self):
+        """
+        Occurrences of each warning, in first-seen order.
+        """
+
+        return dict(self._warnings)
+
+    def feed_line(self, line: str):
+        """
+        Parse a single decoded line. Returns a VariantRecord or None.
+        """
+
+        self.lines_read += 1
 
-    for line in lines:
         if not line.strip():
-            continue
+            return None
 
         if line.startswith("#"):
-            continue
+            if line.startswith("#CHROM"):
+                self.has_chrom_header = True
+                self._on_header(line)
+            return None
 
-        data_rows += 1
+        if not self.has_chrom_header:
+            raise VCFValidationError("Missing required VCF header line (#CHROM).")
+
+        self.data_rows += 1
 
         columns = line.split("\t")
 
         if len(columns) < 8:
-            malformed_rows += 1
-            continue
+            self.malformed_rows += 1
+            return None
 
         chrom = columns[0]
         pos = columns[1]
@@ -67,33 +269,531 @@ def parse_vcf(file_content: str, return_warnings: bool = False):
         star = info_parts.get("STAR")
 
         if not gene:
-            warnings.append("One or more variants are missing GENE annotation and were skipped.")
-            continue
+            self._warn(MISSING_GENE_WARNING)
+            return None
+
+        # Only rows that are reported get annotation warnings.
+        if gene not in TARGET_GENES:
+            return None
 
         if not star:
             star = "Unknown"
-            warnings.append(f"STAR annotation missing for {gene}; defaulted to Unknown.")
+            self._warn(f"STAR annotation missing for {gene}; defaulted to Unknown.")
 
         if not rsid or rsid == ".":
             rsid = f"{chrom}:{pos}"
-            warnings.append("One or more variants were missing RSID and were labeled using CHROM:POS.")
+            self._warn("One or more variants were missing RSID and were labeled using CHROM:POS.")
+
+        return self._on_variant(VariantRecord(gene, rsid, star), columns)
+
+    def _can_prefilter(self, block: bytes):
+        """
+        True when skipping every non-candidate row of ``block`` gives the
+        same counts and warnings as parsing it: the header has been seen,
+        every line is an ASCII data row with at least 8 columns and every
+        "GENE=" starts an INFO item, at most once per line.
+        """
+
+        if not (self.prefilter and self.has_chrom_header):
+            return False
+
+        if not block.isascii() or _IRREGULAR_LINE_START.search(b"\n" + block):
+            return False
+
+        gene_keys = block.count(b"GENE=")
+        if gene_keys != block.count(b"\tGENE=") + block.count(b";GENE="):
+            return False
+        if gene_keys and len(_GENE_KEY_LINE.findall(block)) != gene_keys:
+            return False
+
+        separators = block.translate(None, _NON_SEPARATORS)
+        first_line_tabs = separators.find(b"\n")
+        if first_line_tabs < 0:
+            return len(separators) >= 7
+
+        if first_line_tabs >= 7:
+            line = separators[:first_line_tabs + 1]
+            if separators + b"\n" == line * (len(separators) // len(line) + 1):
+                return True
+
+        return min(len(tabs) for tabs in set(separators.split(b"\n"))) >= 7
+
+    def _feed_candidates(self, block: bytes):
+        starts = sorted({
+            block.rfind(b"\n", 0, match.start()) + 1
+            for match in _TARGET_GENE_PATTERN.finditer(block)
+        })
+
+        skipped = block.count(b"\n") + 1 - len(starts)
+        self.lines_read += skipped
+        self.data_rows += skipped
+
+        # Skipped rows without a GENE value count towards its warning;
+        # candidates are parsed in full and warn for themselves.
+        annotated = len(_GENE_VALUE_LINE.findall(block))
+        annotated -= sum(1 for start in starts if not _MISSING_GENE_LINE.match(block, start))
+        missing = skipped - annotated
+
+        # The first time the warning is raised it must come in row order
+        # relative to the candidates' own warnings.
+        first_missing = None
+        if missing and MISSING_GENE_WARNING not in self._warnings:
+            first_missing = self._first_skipped_missing(block, starts)
+
+        variants = []
+        for start in starts:
+            if first_missing is not None and first_missing < start:
+                self._warn(MISSING_GENE_WARNING, missing)
+                first_missing = missing = None
+            stop = block.find(b"\n", start)
+            variant = self.feed_line(self.decode_line(block[start:stop if stop >= 0 else len(block)]))
+            if variant is not None:
+                variants.append(variant)
+
+        if missing:
+            self._warn(MISSING_GENE_WARNING, missing)
+
+        return variants
+
+    @staticmethod
+    def _first_skipped_missing(block: bytes, starts):
+        candidates = set(starts)
+        for match in _MISSING_GENE_LINE.finditer(block):
+            if match.start() not in candidates:
+                return match.start()
+        return None
+
+    def _on_header(self, line: str):
+        pass
+
+    def _on_variant(self, variant, columns):
+        # Single-sample input: keep the first sample's call for the
+        # diplotype builder. Sites-only records (no FORMAT column) keep no
+        # call; a FORMAT column without a usable GT is a missing call.
+        if len(columns) > 8:
+            format_keys = columns[8]
+            gt = None
+            if len(columns) > 9:
+                if format_keys == "GT" or format_keys.startswith("GT:"):
+                    gt = columns[9].split(":", 1)[0]
+                else:
+                    format_keys = format_keys.split(":")
+                    if "GT" in format_keys:
+                        fields = columns[9].split(":")
+                        gt_index = format_keys.index("GT")
+                        gt = fields[gt_index] if gt_index < len(fields) else None
+            variant.genotype = parse_gt(gt)
+        return variant
+
+    def _warn(self, message, count: int = 1):
+        # One counter entry per distinct message, however many rows hit it.
+        self._warnings[message] += count
+
+    @staticmethod
+    def decode_line(raw_line: bytes):
+        try:
+            return raw_line.decode("utf-8").rstrip("\r")
+        except UnicodeDecodeError:
+            raise VCFEncodingError("The uploaded VCF file encoding is not valid UTF-8.")
+
+
+# Genotype stored for a sites-only record in a GenotypeMatrix, which
+# build_diplotypes_bulk places like a record without a call.
+SITES_ONLY_CALL = (SITES_ONLY_ALLELE, SITES_ONLY_ALLELE, 0)
+
+
+class GenotypeMatrix:
+    """
+    Per-sample genotypes for the PGx variants of a multi-sample VCF.
+
+    ``alleles`` is an int8 array of shape (variants, samples, 2) holding the
+    allele index of each haplotype (0 = REF, 1+ = ALT, -1 = missing,
+    SITES_ONLY_ALLELE = record without a GT column) and
+    ``phased`` is a bool array of shape (variants, samples).
+    """
+
+    def __init__(self, samples, variants, alleles, phased):
+        self.samples = samples
+        self.variants = variants
+        self.alleles = alleles
+        self.phased = phased
+
+
+class CohortVCFParser(VCFStreamParser):
+    """
+    Streaming parser that also reads the GT of every sample column.
+
+    Genotypes of PGx records are appended to flat byte arrays in a single
+    pass; ``to_matrix`` turns them into a ``GenotypeMatrix`` without copying
+    per-call objects.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.samples = []
+        self._alleles = array("b")
+        self._phased = array("b")
+
+    def _on_header(self, line: str):
+        self.samples = line.split("\t")[9:]
+
+    def _on_variant(self, variant, columns):
+        n_samples = len(self.samples)
+        if n_samples == 0:
+            return variant
+
+        if len(columns) <= 8:
+            # Sites-only record: no call for any sample, as in the
+            # single-sample path.
+            for _ in range(n_samples):
+                self._alleles.extend(SITES_ONLY_CALL[:2])
+                self._phased.append(SITES_ONLY_CALL[2])
+            return variant
 
-        if gene in TARGET_GENES:
-            variants.append({
-                "gene": gene,
-                "rsid": rsid,
-                "star": star
-            })
+        format_keys = columns[8].split(":")
+        gt_index = format_keys.index("GT") if "GT" in format_keys else None
+        sample_fields = columns[9:9 + n_samples]
 
-    if data_rows == 0:
-        raise VCFValidationError("No variant records were found in the VCF file.")
+        for sample_index in range(n_samples):
+            gt = None
+            if gt_index is not None and sample_index < len(sample_fields):
+                fields = sample_fields[sample_index].split(":")
+                if gt_index < len(fields):
+                    gt = fields[gt_index]
+            first, second, phased = parse_gt(gt)
+            self._alleles.append(first)
+            self._alleles.append(second)
+            self._phased.append(phased)
 
-    if malformed_rows > 0:
-        warnings.append(f"{malformed_rows} malformed variant record(s) were skipped.")
+        return variant
 
-    deduped_warnings = list(dict.fromkeys(warnings))
+    def to_matrix(self, variants):
+        n_samples = len(self.samples)
+        alleles = np.frombuffer(self._alleles, dtype=np.int8).reshape(len(variants), n_samples, 2)
+        phased = np.frombuffer(self._phased, dtype=np.int8).reshape(len(variants), n_samples).astype(bool)
+        return GenotypeMatrix(self.samples, variants, alleles, phased)
+
+
+def parse_vcf(file_content: str, return_warnings: bool = False):
+    """
+    Parse VCF file content and extract pharmacogenomic variants.
+    """
+
+    parser = VCFStreamParser()
+    variants = []
+
+    # Universal-newline iteration avoids materialising a list of all lines.
+    for line in io.StringIO(file_content, newline=None):
+        variant = parser.feed_line(line.rstrip("\n"))
+        if variant is not None:
+            variants.append(variant)
+
+    variants.extend(parser.close())
 
     if return_warnings:
-        return variants, deduped_warnings
+        return variants, parser.get_warnings()
+
+    return variants
+
+
+def _feed_raw(parser: VCFStreamParser, decompressor, chunk: bytes):
+    if decompressor is not None:
+        with stage_timer("decompress"):
+            try:
+                chunk = decompressor.decompress(chunk)
+            except BGZFError as exc:
+                raise VCFValidationError(str(exc))
+    # UTF-8 decoding happens per candidate line inside the parser.
+    with stage_timer("parse"):
+        return parser.feed(chunk)
+
+
+def iter_vcf_file(file_obj, parser: VCFStreamParser, chunk_size: int = DEFAULT_CHUNK_SIZE):
+    """
+    Stream PGx variants from a binary file object, one chunk at a time.
+    Gzip/BGZF input is detected from the first bytes and decompressed
+    on the fly.
+    """
+
+    decompressor = None
+    first = True
+
+    while True:
+        chunk = file_obj.read(chunk_size)
+        if not chunk:
+            break
+        if first:
+            first = False
+            if is_gzip(chunk):
+                decompressor = GzipStreamDecompressor()
+        yield from _feed_raw(parser, decompressor, chunk)
+
+    yield from parser.close()
+
+
+async def stream_vcf_upload(upload, parser: VCFStreamParser, chunk_size: int = DEFAULT_CHUNK_SIZE):
+    """
+    Async counterpart of ``iter_vcf_file`` for FastAPI ``UploadFile`` objects.
+
+    Decompression and parsing of each chunk run on the pipeline executor so
+    the event loop only awaits I/O.
+    """
+
+    decompressor = None
+    first = True
+
+    while True:
+        with stage_timer("upload_read"):
+            chunk = await upload.read(chunk_size)
+        if not chunk:
+            break
+        if first:
+            first = False
+            if is_gzip(chunk):
+                decompressor = GzipStreamDecompressor()
+        for variant in await run_blocking(_feed_raw, parser, decompressor, chunk):
+            yield variant
+
+    with stage_timer("parse"):
+        remaining = await run_blocking(parser.close)
+    for variant in remaining:
+        yield variant
+
+
+def _in_target_region(line: bytes, regions):
+    columns = line.split(b"\t", 2)
+    if len(columns) < 3:
+        return False
+    chrom = normalize_chrom(columns[0].decode("utf-8", "replace"))
+    try:
+        pos = int(columns[1])
+    except ValueError:
+        return False
+    return any(chrom == r_chrom and start <= pos <= end for r_chrom, start, end in regions)
+
+
+def read_indexed_vcf(file_obj, index_data: bytes, parser: VCFStreamParser, regions=None):
+    """
+    Parse a BGZF-compressed VCF using its tabix index, decompressing only
+    the blocks that cover the target gene loci.
+
+    ``file_obj`` must be seekable. Header lines are read from the start of
+    the file as usual, so validation matches the streaming path.
+    """
+
+    if regions is None:
+        regions = [region for loci in TARGET_GENE_REGIONS.values() for region in loci]
+
+    try:
+        index = TabixIndex.from_bytes(index_data)
+        reader = BGZFReader(file_obj)
+        header_lines, first_record = reader.read_header(index.meta)
+
+        for raw_line in header_lines:
+            parser.feed_line(parser.decode_line(raw_line))
+
+        variants = []
+
+        # The first record proves the file has data rows. If it lies inside
+        # a target locus the region query below will return it instead.
+        if first_record is not None and not _in_target_region(first_record, regions):
+            variant = parser.feed_line(parser.decode_line(first_record))
+            if variant is not None:
+                variants.append(variant)
+
+        for raw_line in iter_region_lines(reader, index, regions):
+            variant = parser.feed_line(parser.decode_line(raw_line))
+            if variant is not None:
+                variants.append(variant)
+    except BGZFError as exc:
+        raise VCFValidationError(str(exc))
+
+    variants.extend(parser.close())
+    return variants
+
+
+# ------------------------------------------
+# Parallel parsing of large on-disk files
+# ------------------------------------------
+
+def _parse_byte_range(path: str, start: int, end: int, compressed: bool):
+    """
+    Parse the lines of ``path`` between two byte offsets (compressed offsets
+    on BGZF block boundaries when ``compressed``).
+
+    The range rarely starts or ends on a newline, so the text before the
+    first newline and after the last one is handed back unparsed for the
+    caller to stitch onto its neighbours. Returns (head, tail, variants,
+    warning_counts, lines_read, data_rows, malformed_rows); ``tail`` is None when
+    the range holds no newline at all.
+    """
+
+    parser = VCFStreamParser()
+    # The caller validates the header once for the whole file.
+    parser.has_chrom_header = True
+
+    decompressor = GzipStreamDecompressor() if compressed else None
+    head = None
+    pending = b""
+    variants = []
+
+    with open(path, "rb") as handle:
+        handle.seek(start)
+        remaining = end - start
+
+        while remaining > 0:
+            chunk = handle.read(min(DEFAULT_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+
+            data = chunk
+            if decompressor is not None:
+                try:
+                    data = decompressor.decompress(chunk)
+                except BGZFError as exc:
+                    raise VCFValidationError(str(exc))
+
+            if head is None:
+                data = pending + data
+                newline = data.find(b"\n")
+                if newline < 0:
+                    pending = data
+                    continue
+                head = data[:newline]
+                data = data[newline + 1:]
+
+            variants.extend(parser.feed(data))
+
+    if head is None:
+        return pending, None, [], {}, 0, 0, 0
+
+    return (
+        head,
+        parser._buffer,
+        variants,
+        parser.get_warning_counts(),
+        parser.lines_read,
+        parser.data_rows,
+        parser.malformed_rows,
+    )
+
+
+def _split_ranges(path: str, compressed: bool, parts: int):
+    size = os.path.getsize(path)
+
+    if not compressed:
+        bounds = [size * i // parts for i in range(parts + 1)]
+    else:
+        with open(path, "rb") as handle:
+            blocks = BGZFReader(handle).block_offsets()
+        bounds = sorted(set(blocks[len(blocks) * i // parts] for i in range(parts))) + [size]
+
+    return [(start, end) for start, end in zip(bounds, bounds[1:]) if end > start]
+
+
+def _read_header_lines(path: str, compressed: bool):
+    """
+    Return (header_lines, first_record) from the start of the file.
+    """
+
+    with open(path, "rb") as handle:
+        if compressed:
+            header_lines, first_record = BGZFReader(handle).read_header()
+            if first_record is None and header_lines and not header_lines[-1]:
+                # Trailing partial line, which the stream parser never feeds.
+                header_lines.pop()
+            return header_lines, first_record
+
+        header_lines = []
+        for raw_line in handle:
+            line = raw_line.rstrip(b"\n")
+            if line.strip() and not line.startswith(b"#"):
+                return header_lines, line
+            header_lines.append(line)
+        return header_lines, None
+
+
+def parse_vcf_parallel(path: str, parser: VCFStreamParser = None, workers: int = PARSE_WORKERS, executor=None):
+    """
+    Parse an on-disk VCF (plain or BGZF) on a process pool.
+
+    The file is cut into ``workers`` byte ranges (BGZF block ranges when
+    compressed) that are parsed independently; variants, warnings and row
+    counts are merged back in file order into ``parser``, so the result and
+    the ``VCFValidationError`` raised match a sequential parse. Plain gzip
+    files cannot be split and are parsed sequentially.
+
+    Without an ``executor`` a spawn-context pool is created for the call and
+    shut down afterwards, so no worker processes outlive it.
+    """
+
+    if parser is None:
+        parser = VCFStreamParser()
+
+    with open(path, "rb") as handle:
+        compressed = is_gzip(handle.read(2))
+        handle.seek(0)
+        bgzf = compressed and handle.read(4) == b"\x1f\x8b\x08\x04"
+        handle.seek(0)
+        if workers <= 1 or (compressed and not bgzf):
+            return list(iter_vcf_file(handle, parser))
+
+    try:
+        header_lines, first_record = _read_header_lines(path, compressed)
+    except BGZFError as exc:
+        raise VCFValidationError(str(exc))
+
+    for raw_line in header_lines:
+        parser.feed_line(parser.decode_line(raw_line))
+
+    if first_record is None:
+        return parser.close()
+
+    if not parser.has_chrom_header:
+        # Raises the same error as the sequential parser.
+        parser.feed_line(parser.decode_line(first_record))
+
+    ranges = _split_ranges(path, compressed, workers)
+
+    if executor is None:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            return _merge_ranges(parser, pool, path, ranges, compressed)
+
+    return _merge_ranges(parser, executor, path, ranges, compressed)
+
+
+def _merge_ranges(parser: VCFStreamParser, executor, path: str, ranges, compressed: bool):
+    futures = [
+        executor.submit(_parse_byte_range, path, start, end, compressed)
+        for start, end in ranges
+    ]
+
+    # Header lines are parsed again by the first range; only the counts that
+    # feed validation are merged, so this does not change the outcome.
+    variants = []
+    carry = b""
+
+    for future in futures:
+        head, tail, chunk_variants, warnings, lines_read, data_rows, malformed_rows = future.result()
+
+        if tail is None:
+            carry += head
+            continue
+
+        # The line split across the previous range boundary comes first.
+        variant = parser.feed_line(parser.decode_line(carry + head))
+        if variant is not None:
+            variants.append(variant)
+
+        variants.extend(chunk_variants)
+        for message, count in warnings.items():
+            parser._warn(message, count)
+        parser.lines_read += lines_read
+        parser.data_rows += data_rows
+        parser.malformed_rows += malformed_rows
+        carry = tail
 
+    parser._buffer = carry
+    variants.extend(parser.close())
     return variants
@@ -0,0 +1,175 @@
+# ==========================================
+# Diplotype Builder Tests
+# ==========================================
+
+import pytest
+
+from services.genotype_service import INDETERMINATE_DIPLOTYPE, build_diplotypes, build_diplotypes_bulk
+from services.phenotype_mapper import determine_phenotype
+from services.rule_engine import rule_based_risk
+from services.vcf_parser import GT_CACHE_SIZE, CohortVCFParser, parse_gt, parse_vcf
+
+HEADER = "##fileformat=VCFv4.2\n#CHROM\tPOS\tID\tREF\tALT\tQUAL\tFILTER\tINFO"
+
+CYP2C19_SITES = [
+    ("rs4244285", "*2"),
+    ("rs4986893", "*3"),
+    ("rs12248560", "*17"),
+]
+
+
+def make_vcf(rows, samples=()):
+    """
+    ``rows`` are (rsid, gene, star, [GT per sample]) tuples; sites-only
+    when ``samples`` is empty.
+    """
+
+    lines = [HEADER + ("\tFORMAT\t" + "\t".join(samples) if samples else "")]
+    for position, (rsid, gene, star, calls) in enumerate(rows, start=1):
+        line = f"chr1\t{position}\t{rsid}\tA\tG\t50\tPASS\tGENE={gene};STAR={star}"
+        if calls is not None:
+            line += "\tGT\t" + "\t".join(calls)
+        lines.append(line)
+    return "\n".join(lines) + "\n"
+
+
+def diplotypes_of(text):
+    warnings = []
+    return build_diplotypes(parse_vcf(text), warnings), warnings
+
+
+def cohort_diplotypes_of(text):
+    parser = CohortVCFParser()
+    variants = []
+    for line in text.splitlines():
+        variant = parser.feed_line(line)
+        if variant is not None:
+            variants.append(variant)
+    warnings = []
+    return build_diplotypes_bulk(parser.to_matrix(variants), warnings), warnings
+
+
+def test_phased_heterozygous_calls_land_on_their_haplotypes():
+    text = make_vcf([
+        ("rs4244285", "CYP2C19", "*2", ["1|0"]),
+        ("rs12248560", "CYP2C19", "*17", ["0|1"]),
+    ], ["S1"])
+    assert diplotypes_of(text) == ({"CYP2C19": "*2/*17"}, [])
+
+
+def test_homozygous_call_is_on_both_haplotypes():
+    text = make_vcf([("rs4244285", "CYP2C19", "*2", ["1/1"])], ["S1"])
+    assert diplotypes_of(text)[0] == {"CYP2C19": "*2/*2"}
+
+
+@pytest.mark.parametrize("calls", [
+    ["0/1", "0/1", "0/1"],
+    ["1|0", "1|0", "0|1"],
+])
+def test_third_carried_allele_is_not_dropped(calls):
+    text = make_vcf([
+        (rsid, "CYP2C19", star, [call])
+        for (rsid, star), call in zip(CYP2C19_SITES, calls)
+    ], ["S1"])
+    diplotypes, warnings = diplotypes_of(text)
+
+    assert diplotypes == {"CYP2C19": INDETERMINATE_DIPLOTYPE}
+    assert len(warnings) == 1 and warnings[0].startswith("CYP2C19:")
+
+
+@pytest.mark.parametrize("call", ["./.", ".|.", "."])
+def test_missing_call_is_never_the_reference(call):
+    text = make_vcf([("rs4244285", "CYP2C19", "*2", [call])], ["S1"])
+    diplotypes, warnings = diplotypes_of(text)
+
+    assert diplotypes == {"CYP2C19": INDETERMINATE_DIPLOTYPE}
+    assert warnings
+    phenotype = determine_phenotype("CYP2C19", diplotypes["CYP2C19"])
+    assert phenotype == "Unknown"
+    assert rule_based_risk("CLOPIDOGREL", phenotype)[0] == "Unknown"
+
+
+def test_format_without_gt_is_a_missing_call():
+    text = HEADER + "\tFORMAT\tS1\nchr1\t1\trs4244285\tA\tG\t50\tPASS\tGENE=CYP2C19;STAR=*2\tDP\t12\n"
+    diplotypes, warnings = diplotypes_of(text)
+    assert diplotypes == {"CYP2C19": INDETERMINATE_DIPLOTYPE}
+    assert warnings
+
+
+def test_genotype_cache_is_bounded():
+    # One distinct multiallelic GT per row must not grow the cache unbounded.
+    rows = [(f"rs{n}", "CYP2C19", "*2", [f"0/{n}"]) for n in range(GT_CACHE_SIZE + 200)]
+    parse_vcf(make_vcf(rows, ["S1"]))
+
+    assert parse_gt.cache_info().currsize <= GT_CACHE_SIZE
+    assert parse_gt("0/300") == (0, 127, 0)
+    assert parse_gt("1|0") == (1, 0, 1)
+    assert parse_gt("1") == (1, 1, 0)
+
+
+def test_repeated_sites_only_records_keep_their_multiplicity():
+    text = make_vcf([
+        ("rs3892097", "CYP2D6", "*4", None),
+        ("rs3892097", "CYP2D6", "*4", None),
+    ])
+    diplotypes, warnings = diplotypes_of(text)
+
+    assert diplotypes == {"CYP2D6": "*4/*4"}
+    assert warnings == []
+    phenotype = determine_phenotype("CYP2D6", diplotypes["CYP2D6"])
+    assert phenotype == "PM"
+    assert rule_based_risk("CODEINE", phenotype)[0] == "Ineffective"
+
+
+def test_sites_only_records_name_one_allele_each():
+    # Both sites of the *4 definition, each as its own record: without a
+    # GT the records are two *4 alleles, not one *4 plus an assumed *1.
+    text = make_vcf([
+        ("rs3892097", "CYP2D6", "*4", None),
+        ("rs1065852", "CYP2D6", "*4", None),
+    ])
+    diplotypes, warnings = diplotypes_of(text)
+
+    assert diplotypes == {"CYP2D6": "*4/*4"}
+    assert warnings == []
+    phenotype = determine_phenotype("CYP2D6", diplotypes["CYP2D6"])
+    assert phenotype == "PM"
+    assert rule_based_risk("CODEINE", phenotype)[0] == "Ineffective"
+
+
+@pytest.mark.parametrize("rows", [
+    [("rs3892097", "CYP2D6", "*4", None)] * 3,
+    [("rs4244285", "CYP2C19", "*2", None), ("rs12248560", "CYP2C19", "*17", ["0/1"])],
+])
+def test_sites_only_records_beyond_two_alleles_are_indeterminate(rows):
+    samples = ["S1"] if any(calls for *_, calls in rows) else ()
+    diplotypes, warnings = diplotypes_of(make_vcf(rows, samples))
+
+    assert set(diplotypes.values()) == {INDETERMINATE_DIPLOTYPE}
+    assert len(warnings) == 1
+
+
+def test_sites_only_records_fill_both_haplotypes():
+    text = make_vcf([
+        ("rs3892097", "CYP2D6", "*4", None),
+        (".", "CYP2D6", "*41", None),
+    ])
+    assert diplotypes_of(text) == ({"CYP2D6": "*4/*41"}, [])
+
+
+@pytest.mark.parametrize("rows", [
+    [("rs3892097", "CYP2D6", "*4", None), ("rs3892097", "CYP2D6", "*4", None)],
+    [("rs3892097", "CYP2D6", "*4", None), ("rs1065852", "CYP2D6", "*4", None)],
+    [("rs3892097", "CYP2D6", "*4", None)],
+    [("rs4244285", "CYP2C19", "*2", None), ("rs12248560", "CYP2C19", "*17", ["0/1"])],
+    [("rs4244285", "CYP2C19", "*2", ["1|0"]), ("rs12248560", "CYP2C19", "*17", ["0|1"])],
+    [("rs4244285", "CYP2C19", "*2", ["./."]), ("rs12248560", "CYP2C19", "*17", ["0/1"])],
+    [(rsid, "CYP2C19", star, ["0/1"]) for rsid, star in CYP2C19_SITES],
+])
+def test_cohort_and_single_sample_paths_agree(rows):
+    text = make_vcf(rows, ["S1"])
+    single, single_warnings = diplotypes_of(text)
+    cohort, cohort_warnings = cohort_diplotypes_of(text)
+
+    assert {gene: labels[0] for gene, labels in cohort.items()} == single
+    assert bool(cohort_warnings) == bool(single_warnings)
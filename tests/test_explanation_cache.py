@@ -0,0 +1,39 @@
+# ==========================================
+# Explanation Cache Tests
+# ==========================================
+
+import asyncio
+
+from services.llm_service import ExplanationCache
+from utils.metrics import metrics
+
+KEY = ("CYP2D6", "CODEINE", "Toxic")
+EXPLANATION = {"summary": "Ultrarapid conversion to morphine.", "confidence": "High"}
+
+
+def test_disk_entries_are_shared_and_counted(tmp_path):
+    path = str(tmp_path / "explanations.sqlite3")
+    writer, reader = ExplanationCache(4, 60, path), ExplanationCache(4, 60, path)
+    before = dict(metrics.counters)
+
+    async def scenario():
+        missed = await writer.get(KEY)
+        await writer.put(KEY, EXPLANATION)
+        return missed, await reader.get(KEY)
+
+    missed, hit = asyncio.run(scenario())
+
+    assert missed is None
+    assert hit == EXPLANATION
+    assert metrics.counters["explanation_cache_misses"] == before["explanation_cache_misses"] + 1
+    assert metrics.counters["explanation_cache_hits"] == before["explanation_cache_hits"] + 1
+
+
+def test_expired_entries_miss(tmp_path):
+    cache = ExplanationCache(4, 0, str(tmp_path / "explanations.sqlite3"))
+
+    async def scenario():
+        await cache.put(KEY, EXPLANATION)
+        return await cache.get(KEY)
+
+    assert asyncio.run(scenario()) is None
@@ -0,0 +1,117 @@
+# ==========================================
+# Compiled Forest and Parallel Parse Parity Tests
+# ==========================================
+
+from concurrent.futures import ThreadPoolExecutor
+from itertools import product
+
+import numpy as np
+import pytest
+
+from benchmarks.synthetic_vcf import write_bgzf, write_synthetic_vcf
+from config import FEATURES_PATH, MODEL_PATH, PACKED_MODEL_PATH
+from ml_model import encode_pairs
+from services.vcf_parser import VCFStreamParser, iter_vcf_file, parse_vcf_parallel
+from utils.forest_pack import (
+    EVALUATION_CHUNK_ROWS,
+    PARITY_TOLERANCE,
+    CompiledForest,
+    _sklearn_proba,
+    file_sha256,
+)
+
+
+@pytest.fixture(scope="module")
+def shipped_model():
+    joblib = pytest.importorskip("joblib")
+    pytest.importorskip("sklearn")
+    pytest.importorskip("pandas")
+    return joblib.load(MODEL_PATH), joblib.load(FEATURES_PATH)
+
+
+def parity_inputs(feature_columns):
+    """
+    Every drug × phenotype one-hot row the service encodes, random binary
+    rows, and random values around the 0.5 split thresholds; more rows
+    than one evaluation chunk.
+    """
+
+    drugs = [column[len("drug_"):] for column in feature_columns if column.startswith("drug_")]
+    phenotypes = [column[len("phenotype_"):] for column in feature_columns if column.startswith("phenotype_")]
+    feature_index = {column: position for position, column in enumerate(feature_columns)}
+    pairs = list(product(drugs + ["UNKNOWN_DRUG"], phenotypes + ["Unknown"]))
+
+    rng = np.random.default_rng(7)
+    width = len(feature_columns)
+    return np.concatenate([
+        encode_pairs(pairs, feature_index, width),
+        (rng.random((EVALUATION_CHUNK_ROWS, width)) < 0.3).astype(np.float32),
+        rng.random((256, width)).astype(np.float32),
+    ])
+
+
+@pytest.mark.parametrize("source", ["compiled", "packed"])
+def test_compiled_forest_matches_sklearn(shipped_model, source):
+    model, feature_columns = shipped_model
+    if source == "packed":
+        forest = CompiledForest.load(PACKED_MODEL_PATH)
+        assert forest.source_sha256 == file_sha256(MODEL_PATH)
+    else:
+        forest = CompiledForest.from_sklearn(model, feature_columns)
+
+    X = parity_inputs(feature_columns)
+    expected = _sklearn_proba(model, X, feature_columns)
+    actual = forest.predict_proba(X)
+
+    assert list(forest.classes_) == [str(label) for label in model.classes_]
+    assert actual.shape == expected.shape
+    assert np.abs(actual - expected).max() <= PARITY_TOLERANCE
+
+
+def parse_sequential(path):
+    parser = VCFStreamParser()
+    with open(path, "rb") as handle:
+        variants = list(iter_vcf_file(handle, parser))
+    return variants, parser
+
+
+def assert_same_parse(parallel, sequential):
+    (parallel_variants, parallel_parser), (sequential_variants, sequential_parser) = parallel, sequential
+    assert [v.to_dict() for v in parallel_variants] == [v.to_dict() for v in sequential_variants]
+    assert parallel_parser.get_warnings() == sequential_parser.get_warnings()
+    assert parallel_parser.malformed_rows == sequential_parser.malformed_rows
+
+
+@pytest.fixture(scope="module")
+def synthetic_files(tmp_path_factory):
+    directory = tmp_path_factory.mktemp("parallel_parse")
+    plain = write_synthetic_vcf(
+        directory / "synthetic.vcf", 20_000, pgx_fraction=0.01,
+        samples=1, missing_annotation_rate=0.05, malformed_rate=0.002
+    )
+    bgzf = directory / "synthetic.vcf.gz"
+    write_bgzf(plain, bgzf, block_size=4096)
+    return {"plain": str(plain), "bgzf": str(bgzf)}
+
+
+@pytest.mark.parametrize("layout", ["plain", "bgzf"])
+@pytest.mark.parametrize("workers", [2, 3, 7])
+def test_parallel_parse_matches_sequential(synthetic_files, layout, workers):
+    path = synthetic_files[layout]
+    parser = VCFStreamParser()
+
+    # Threads run the same byte-range worker as the process pool.
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        variants = parse_vcf_parallel(path, parser, workers, executor=executor)
+
+    assert variants
+    assert_same_parse((variants, parser), parse_sequential(path))
+
+
+def test_parallel_parse_on_process_pool(synthetic_files):
+    path = synthetic_files["plain"]
+    parser = VCFStreamParser()
+
+    variants = parse_vcf_parallel(path, parser, 2)
+
+    assert_same_parse((variants, parser), parse_sequential(path))
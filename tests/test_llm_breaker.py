@@ -0,0 +1,98 @@
+# ==========================================
+# LLM Circuit Breaker Tests
+# ==========================================
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from services import llm_service
+
+
+class FakeCompletions:
+    def __init__(self, delay=0.0, fail=False):
+        self.delay = delay
+        self.fail = fail
+
+    async def create(self, **request):
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("provider error")
+        message = SimpleNamespace(content="summary\nmechanism\nimpact")
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+@pytest.fixture
+def manager(monkeypatch):
+    manager = llm_service.LLMClientManager()
+    manager.breaker.slow_call_seconds = 0.1
+    monkeypatch.setattr(llm_service, "llm_client_manager", manager)
+    return manager
+
+
+def use_provider(manager, completions, slots=1):
+    manager._async_client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    manager._async_slots = asyncio.Semaphore(slots)
+
+
+def request(timeout=1.0):
+    return llm_service._request_explanation_async("CYP2D6", "CODEINE", "Toxic", timeout=timeout)
+
+
+def test_slot_wait_is_not_provider_latency(manager):
+    async def scenario():
+        use_provider(manager, FakeCompletions(delay=0.05))
+        # The request queues for the only slot for longer than the
+        # slow-call limit, but its provider call itself is fast.
+        await manager.async_slots().acquire()
+        queued = asyncio.create_task(request())
+        await asyncio.sleep(0.15)
+        manager.async_slots().release()
+        return await queued
+
+    _, from_provider = asyncio.run(scenario())
+
+    assert from_provider
+    assert manager.breaker.failures == 0
+
+
+def test_no_slot_falls_back_without_failure(manager):
+    async def scenario():
+        use_provider(manager, FakeCompletions())
+        await manager.async_slots().acquire()
+        return await request(timeout=0.05)
+
+    explanation, from_provider = asyncio.run(scenario())
+
+    assert not from_provider
+    assert explanation == llm_service.fallback_explanation("CYP2D6", "CODEINE")
+    assert manager.breaker.failures == 0
+
+
+def test_provider_errors_and_slow_calls_count(manager):
+    async def scenario():
+        use_provider(manager, FakeCompletions(fail=True))
+        await request()
+        use_provider(manager, FakeCompletions(delay=0.15))
+        await request()
+
+    asyncio.run(scenario())
+
+    assert manager.breaker.failures == 2
+
+
+def test_cancelled_call_is_not_a_failure(manager):
+    async def scenario():
+        use_provider(manager, FakeCompletions(delay=5))
+        task = asyncio.create_task(request(timeout=10))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(scenario())
+
+    assert manager.breaker.failures == 0
+    assert not manager.breaker.trial_in_flight
+    assert not manager.async_slots().locked()
@@ -0,0 +1,27 @@
+# ==========================================
+# Request Metrics Tests
+# ==========================================
+
+from fastapi.testclient import TestClient
+
+import main
+from utils.metrics import metrics
+
+
+def request_count():
+    histogram = metrics.stages.get("request")
+    return 0 if histogram is None else histogram.count
+
+
+def test_probes_are_not_in_the_request_histogram():
+    with TestClient(main.app) as client:
+        before = request_count()
+        live = client.get("/live")
+        client.get("/ready")
+        client.get("/metrics")
+        assert request_count() == before
+        assert "server-timing" not in live.headers
+
+        timed = client.get("/reports/missing")
+        assert request_count() == before + 1
+        assert "total;dur=" in timed.headers["server-timing"]
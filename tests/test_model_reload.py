@@ -0,0 +1,44 @@
+# ==========================================
+# Model Hot-Reload Tests
+# ==========================================
+
+import ml_model
+from utils.forest_pack import PackedForestError
+
+
+def test_failed_reload_keeps_the_current_model(monkeypatch):
+    model = ml_model.PharmaGuardModel()
+    model.ensure_loaded()
+    loaded = model.current()
+    drug, phenotype = next(iter(loaded.risk_table))
+    attempts = []
+
+    def broken_files():
+        attempts.append(1)
+        raise PackedForestError("values.npy is truncated")
+
+    monkeypatch.setattr(ml_model, "_model_fingerprint", lambda: ("changed",))
+    monkeypatch.setattr(ml_model, "_load_model_files", broken_files)
+    model._next_check = 0.0
+
+    assert model.lookup_risk(drug, phenotype) == loaded.risk_table[(drug, phenotype)]
+    assert model.current() is loaded
+    # The failed attempt pushes the next check forward instead of retrying
+    # (and failing) on every prediction.
+    model.get_model()
+    assert len(attempts) == 1
+    assert model._next_check > 0.0
+
+
+def test_reload_swaps_one_snapshot(monkeypatch):
+    model = ml_model.PharmaGuardModel()
+    model.ensure_loaded()
+    previous = model.current()
+
+    monkeypatch.setattr(ml_model, "_model_fingerprint", lambda: ("changed",))
+    model._next_check = 0.0
+    current = model.current()
+
+    assert current is not previous
+    assert current.fingerprint == ("changed",)
+    assert current.feature_index == previous.feature_index
@@ -0,0 +1,43 @@
+# ==========================================
+# Request Profiling Tests
+# ==========================================
+
+import asyncio
+import threading
+
+from utils import profiling
+
+
+class RecordingStore:
+    def __init__(self):
+        self.saved = []
+
+    def save(self, profile, status):
+        self.saved.append((status, threading.get_ident()))
+
+
+async def ok_app(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"{}"})
+
+
+def test_profile_is_saved_off_the_event_loop(monkeypatch):
+    monkeypatch.setattr(profiling, "profile_token_valid", lambda token: True)
+    store = RecordingStore()
+    middleware = profiling.ProfilingMiddleware(ok_app, store=store)
+    scope = {"type": "http", "path": "/analyze", "headers": [(b"x-profile-token", b"secret")]}
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    async def scenario():
+        await middleware(scope, None, send)
+        return threading.get_ident()
+
+    loop_thread = asyncio.run(scenario())
+
+    assert [status for status, _ in store.saved] == [200]
+    assert store.saved[0][1] != loop_thread
+    assert b"x-profile-id" in dict(sent[0]["headers"])
+    assert sent[-1]["body"] == b"{}"
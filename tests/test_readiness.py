@@ -0,0 +1,47 @@
+# ==========================================
+# Readiness Probe Tests
+# ==========================================
+
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from services.readiness import FAILED, READY, STARTING, readiness
+
+
+def wait_for_state(state, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while readiness.state != state:
+        assert time.monotonic() < deadline, f"readiness stayed {readiness.state}"
+        time.sleep(0.01)
+
+
+def test_ready_retries_a_failed_warmup(monkeypatch):
+    if not main.WARMUP_ON_STARTUP:
+        pytest.skip("background warm-up disabled")
+
+    attempts = []
+
+    def flaky_step():
+        attempts.append(time.monotonic())
+        if len(attempts) == 1:
+            raise RuntimeError("model file busy")
+
+    monkeypatch.setattr(readiness, "steps", (("flaky", flaky_step),))
+    monkeypatch.setattr(readiness, "state", STARTING)
+    monkeypatch.setattr(readiness, "error", None)
+
+    with TestClient(main.app) as client:
+        wait_for_state(FAILED)
+
+        failed = client.get("/ready")
+        assert failed.status_code == 503
+        assert "model file busy" in failed.json()["error"]
+
+        wait_for_state(READY)
+        assert client.get("/ready").status_code == 200
+
+    assert len(attempts) == 2
+    assert main.app.state.warmup_task.done()
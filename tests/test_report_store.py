@@ -0,0 +1,68 @@
+# ==========================================
+# Deferred Report Store Tests
+# ==========================================
+
+import asyncio
+
+from services.report_store import ReportStore, new_report_id
+
+
+def make_store(path, **options):
+    return ReportStore(path=str(path), poll_seconds=0.01, **options)
+
+
+def test_report_is_visible_to_another_worker(tmp_path):
+    path = tmp_path / "reports.sqlite3"
+    owner, other = make_store(path), make_store(path)
+
+    async def explain(report):
+        await asyncio.sleep(0.05)
+        return {"summary": "done"}
+
+    async def scenario():
+        report_id = new_report_id()
+        owner.create(report_id, {"drug": "CODEINE", "llm_generated_explanation": {"status": "pending"}})
+        owner.start_explanation(report_id, {"drug": "CODEINE"}, explain)
+
+        pending = other.get(report_id)
+        assert pending is not None and not pending.ready
+
+        ready = await other.wait(report_id, timeout=5)
+        return ready
+
+    ready = asyncio.run(scenario())
+
+    assert ready.ready
+    assert ready.report["llm_generated_explanation"] == {"summary": "done"}
+
+
+def test_wait_times_out_while_pending(tmp_path):
+    store = make_store(tmp_path / "reports.sqlite3")
+    report_id = new_report_id()
+    store.create(report_id, {"drug": "CODEINE"})
+
+    entry = asyncio.run(store.wait(report_id, timeout=0.05))
+
+    assert entry is not None and not entry.ready
+
+
+def test_pending_report_of_exited_worker_is_gone(tmp_path):
+    store = make_store(tmp_path / "reports.sqlite3")
+    report_id = new_report_id()
+    store.create(report_id, {"drug": "CODEINE"})
+
+    with store._connect() as connection:
+        connection.execute("UPDATE reports SET owner_pid=? WHERE id=?", (2 ** 22 + 1, report_id))
+
+    assert store.get(report_id) is None
+
+
+def test_oldest_reports_are_evicted(tmp_path):
+    store = make_store(tmp_path / "reports.sqlite3", max_reports=2)
+    report_ids = [new_report_id() for _ in range(3)]
+    for report_id in report_ids:
+        store.create(report_id, {})
+
+    assert store.get(report_ids[0]) is None
+    assert store.get(report_ids[1]) is not None
+    assert store.get(report_ids[2]) is not None
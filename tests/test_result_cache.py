@@ -0,0 +1,102 @@
+# ==========================================
+# Result Cache Tests (/analyze)
+# ==========================================
+
+import io
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from ml_model import model_instance
+from services.result_cache import hash_file, result_cache_key
+
+
+def make_vcf(tag):
+    # A distinct header line per test keeps entries from leaking across tests.
+    return (
+        "##fileformat=VCFv4.2\n"
+        f"##test={tag}\n"
+        "#CHROM\tPOS\tID\tREF\tALT\tQUAL\tFILTER\tINFO\tFORMAT\tS1\n"
+        "chr10\t1\trs4244285\tG\tA\t50\tPASS\tGENE=CYP2C19;STAR=*2\tGT\t0/1\n"
+    ).encode("utf-8")
+
+
+CACHED = {"patient_id": "PATIENT_000000", "timestamp": "2000-01-01T00:00:00", "drug": "CLOPIDOGREL"}
+
+
+@pytest.fixture
+def client():
+    if main.result_cache is None:
+        pytest.skip("result cache disabled")
+    with TestClient(main.app) as client:
+        yield client
+
+
+def seed(vcf, read_mode):
+    key = result_cache_key(hash_file(io.BytesIO(vcf)), "analyze", read_mode, "CLOPIDOGREL")
+    main.result_cache.put(key, dict(CACHED))
+
+
+def test_cache_hit_gets_fresh_request_fields(client):
+    vcf = make_vcf("hit")
+    seed(vcf, "full")
+
+    response = client.post("/analyze", files={"file": ("a.vcf", vcf)}, data={"drug": "clopidogrel"})
+
+    assert response.headers.get("X-Result-Cache") == "hit"
+    body = response.json()
+    assert body["drug"] == "CLOPIDOGREL"
+    assert body["patient_id"] != CACHED["patient_id"]
+    assert body["timestamp"] != CACHED["timestamp"]
+
+
+def test_deferred_request_skips_cache(client):
+    vcf = make_vcf("deferred")
+    seed(vcf, "full")
+
+    response = client.post(
+        "/analyze",
+        files={"file": ("a.vcf", vcf)},
+        data={"drug": "clopidogrel", "explanation": "deferred"},
+    )
+
+    assert response.status_code == 200
+    assert "X-Result-Cache" not in response.headers
+    assert "report_id" in response.json()
+
+
+def test_full_read_does_not_reuse_indexed_result(client):
+    vcf = make_vcf("indexed")
+    seed(vcf, "indexed")
+
+    response = client.post("/analyze", files={"file": ("a.vcf", vcf)}, data={"drug": "clopidogrel"})
+
+    assert "X-Result-Cache" not in response.headers
+    assert response.json()["risk_assessment"]["risk_label"]
+
+
+def test_cache_lookup_does_not_block_the_event_loop(client, monkeypatch):
+    # Model not loaded yet and the warm-up holding its lock: the cache key
+    # (which includes the model fingerprint) waits off the event loop.
+    monkeypatch.setattr(model_instance, "_loaded", None)
+    model_instance._lock.acquire()
+    analyze = threading.Thread(
+        target=client.post,
+        args=("/analyze",),
+        kwargs={"files": {"file": ("a.vcf", make_vcf("blocked"))}, "data": {"drug": "clopidogrel"}},
+    )
+    live = []
+    probe = threading.Thread(target=lambda: live.append(client.get("/live").status_code))
+    try:
+        analyze.start()
+        time.sleep(0.2)
+        probe.start()
+        probe.join(timeout=1.0)
+        assert live == [200]
+    finally:
+        model_instance._lock.release()
+        analyze.join(timeout=30)
+        probe.join(timeout=30)
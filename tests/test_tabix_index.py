@@ -0,0 +1,147 @@
+# ==========================================
+# Tabix-Indexed BGZF Read Tests
+# ==========================================
+
+import gzip
+import io
+import struct
+import zlib
+
+import pytest
+
+from services.vcf_parser import TARGET_GENE_REGIONS, VCFStreamParser, VCFValidationError, parse_vcf, read_indexed_vcf
+
+HEADER = "##fileformat=VCFv4.2\n#CHROM\tPOS\tID\tREF\tALT\tQUAL\tFILTER\tINFO\tFORMAT\tS1\n"
+
+# (chrom, pos, rsid, info); sorted as a tabix-indexed file must be.
+RECORDS = [
+    ("1", 500, "rs100", "GENE=BRCA1"),
+    ("1", 97915614, "rs3918290", "GENE=DPYD;STAR=*2A"),
+    ("10", 100, "rs101", "GENE=CYP2C19;STAR=*17"),
+    ("10", 96541616, "rs4244285", "GENE=CYP2C19;STAR=*2"),
+    ("10", 96541700, "rs102", "GENE=TP53"),
+    ("10", 96612671, "rs12248560", "GENE=CYP2C19;STAR=*17"),
+    ("10", 120000000, "rs103", "GENE=CYP2C19;STAR=*3"),
+    ("22", 1000, "rs104", "GENE=CYP2D6;STAR=*10"),
+    ("22", 42126611, "rs3892097", "GENE=CYP2D6;STAR=*4"),
+    ("22", 42130692, "rs1065852", "GENE=CYP2D6;STAR=*10"),
+    ("22", 50000000, "rs105", "GENE=CYP2D6;STAR=*41"),
+]
+LINES_PER_BLOCK = 3
+
+
+def record_line(chrom, pos, rsid, info):
+    return f"{chrom}\t{pos}\t{rsid}\tC\tT\t50\tPASS\t{info}\tGT\t0/1\n"
+
+
+def bgzf_block(data: bytes) -> bytes:
+    compressor = zlib.compressobj(6, zlib.DEFLATED, -zlib.MAX_WBITS)
+    payload = compressor.compress(data) + compressor.flush()
+    header = b"\x1f\x8b\x08\x04\x00\x00\x00\x00\x00\xff\x06\x00BC\x02\x00"
+    size = struct.pack("<H", len(header) + 2 + len(payload) + 8 - 1)
+    trailer = struct.pack("<II", zlib.crc32(data) & 0xFFFFFFFF, len(data))
+    return header + size + payload + trailer
+
+
+def reg2bin(beg: int, end: int) -> int:
+    # SAM specification, section 5.3 (0-based, half-open).
+    end -= 1
+    for shift, first in ((14, 4681), (17, 585), (20, 73), (23, 9), (26, 1)):
+        if beg >> shift == end >> shift:
+            return first + (beg >> shift)
+    return 0
+
+
+def build_indexed_vcf(records):
+    """
+    BGZF file (header in its own block, then LINES_PER_BLOCK records per
+    block) and its uncompressed tabix index.
+    """
+
+    blocks = [HEADER.encode("ascii")]
+    for start in range(0, len(records), LINES_PER_BLOCK):
+        blocks.append("".join(record_line(*record) for record in records[start:start + LINES_PER_BLOCK]).encode("ascii"))
+
+    compressed = io.BytesIO()
+    offsets = {}
+    for block_number, data in enumerate(blocks):
+        coffset = compressed.tell()
+        compressed.write(bgzf_block(data))
+        if block_number == 0:
+            continue
+        uoffset = 0
+        for record in records[(block_number - 1) * LINES_PER_BLOCK:block_number * LINES_PER_BLOCK]:
+            length = len(record_line(*record))
+            offsets[record] = ((coffset << 16) | uoffset, (coffset << 16) | (uoffset + length))
+            uoffset += length
+    compressed.write(bgzf_block(b""))
+
+    names = list(dict.fromkeys(chrom for chrom, *_ in records))
+    index = bytearray(b"TBI\x01")
+    name_block = b"".join(name.encode("ascii") + b"\0" for name in names)
+    index += struct.pack("<8i", len(names), 2, 1, 2, 0, ord("#"), 0, len(name_block)) + name_block
+
+    for name in names:
+        bins = {}
+        linear = {}
+        for record in records:
+            chrom, pos = record[0], record[1]
+            if chrom != name:
+                continue
+            begin, end = offsets[record]
+            bins.setdefault(reg2bin(pos - 1, pos), []).append((begin, end))
+            window = (pos - 1) >> 14
+            linear[window] = min(linear.get(window, begin), begin)
+
+        index += struct.pack("<i", len(bins))
+        for bin_id, chunks in sorted(bins.items()):
+            index += struct.pack("<Ii", bin_id, len(chunks))
+            for begin, end in chunks:
+                index += struct.pack("<QQ", begin, end)
+
+        intervals = []
+        previous = 0
+        for window in range(max(linear) + 1):
+            previous = linear.get(window, previous)
+            intervals.append(previous)
+        index += struct.pack("<i", len(intervals)) + struct.pack(f"<{len(intervals)}Q", *intervals)
+
+    return compressed.getvalue(), bytes(index)
+
+
+def in_target(chrom, pos):
+    return any(
+        chrom == region_chrom and start <= pos <= end
+        for loci in TARGET_GENE_REGIONS.values() for region_chrom, start, end in loci
+    )
+
+
+def test_indexed_read_returns_target_loci_only():
+    data, index = build_indexed_vcf(RECORDS)
+    text = HEADER + "".join(record_line(*record) for record in RECORDS)
+    assert gzip.decompress(data).decode("ascii") == text
+
+    variants = read_indexed_vcf(io.BytesIO(data), gzip.compress(index), VCFStreamParser())
+
+    expected = [
+        variant for variant in parse_vcf(text)
+        if in_target(*next((chrom, pos) for chrom, pos, rsid, _ in RECORDS if rsid == variant.rsid))
+    ]
+    assert [v.to_dict() for v in variants] == [v.to_dict() for v in expected]
+    assert {v.rsid for v in variants} == {"rs3918290", "rs4244285", "rs12248560", "rs3892097", "rs1065852"}
+
+
+@pytest.mark.parametrize("compress", [False, True])
+def test_truncated_index_is_a_validation_error(compress):
+    data, index = build_indexed_vcf(RECORDS)
+    truncated = index[:len(index) - 20]
+
+    with pytest.raises(VCFValidationError):
+        read_indexed_vcf(io.BytesIO(data), gzip.compress(truncated) if compress else truncated, VCFStreamParser())
+
+
+def test_corrupt_index_is_a_validation_error():
+    data, _ = build_indexed_vcf(RECORDS)
+
+    with pytest.raises(VCFValidationError):
+        read_indexed_vcf(io.BytesIO(data), b"not a tabix index", VCFStreamParser())
@@ -0,0 +1,88 @@
+# ==========================================
+# VCF Pre-filter Parity Tests
+# ==========================================
+
+import pytest
+
+from benchmarks.synthetic_vcf import synthetic_vcf_text
+from services.vcf_parser import VCFStreamParser, parse_vcf
+
+HEADER = b"##fileformat=VCFv4.2\n#CHROM\tPOS\tID\tREF\tALT\tQUAL\tFILTER\tINFO\n"
+
+
+class FullParseVCFParser(VCFStreamParser):
+    prefilter = False
+
+
+def row(info, rsid="rs1", newline="\n"):
+    return f"chr1\t1\t{rsid}\tA\tG\t50\tPASS\t{info}{newline}".encode("ascii")
+
+
+def parse(parser, body, chunk_size):
+    # The header goes in its own chunk so the body blocks can be pre-filtered.
+    variants = parser.feed(HEADER)
+    for start in range(0, len(body), chunk_size):
+        variants += parser.feed(body[start:start + chunk_size])
+    variants += parser.close()
+    return variants, parser.get_warning_counts(), parser.data_rows
+
+
+CASES = {
+    "annotated, star warning before missing gene": [
+        row("GENE=BRCA1"), row("GENE=CYP2D6"), row("DP=3"), row("GENE=TP53"),
+    ],
+    "missing gene before star warning": [
+        row("DP=3"), row("GENE=BRCA1"), row("GENE=CYP2C19", rsid="."), row("GENE=CYP2D6;STAR=*4"),
+    ],
+    "every row annotated": [
+        row(f"GENE={gene};STAR=*2") for gene in ("BRCA1", "CYP2C9", "TP53", "TPMT", "EGFR")
+    ],
+    "empty gene value": [
+        row("GENE=;DP=3"), row("GENE=CYP2D6"), row("DP=1;GENE="),
+    ],
+    "gene key inside another key": [
+        row("XGENE=CYP2D6"), row("GENE=CYP2D6;STAR=*4"), row("DP=2"),
+    ],
+    "crlf empty gene value": [
+        row("DP=3;GENE=", newline="\r\n"), row("GENE=CYP2D6;STAR=*4", newline="\r\n"),
+        row("GENE=", newline="\r\n"), row("GENE=BRCA1", newline="\r\n"),
+    ],
+    "crlf every row annotated": [
+        row(f"GENE={gene}", newline="\r\n") for gene in ("BRCA1", "CYP2C9", "TP53")
+    ],
+    "repeated gene key": [
+        row("GENE=BRCA1;GENE=CYP2D6;STAR=*4"), row("DP=3"), row("GENE=CYP2C19;STAR=*2;GENE=TP53"),
+        row("GENE=;GENE=CYP2C9;STAR=*3"), row("GENE=TP53;GENE="),
+    ],
+}
+
+
+@pytest.mark.parametrize("rows", CASES.values(), ids=CASES.keys())
+@pytest.mark.parametrize("chunk_size", [7, 64, 1 << 20])
+def test_prefilter_matches_full_parse(rows, chunk_size):
+    body = b"".join(rows)
+    assert parse(VCFStreamParser(), body, chunk_size) == parse(FullParseVCFParser(), body, chunk_size)
+
+
+@pytest.mark.parametrize("rows", CASES.values(), ids=CASES.keys())
+def test_prefilter_matches_parse_vcf(rows):
+    body = b"".join(rows)
+    variants, warning_counts, _ = parse(VCFStreamParser(), body, 1 << 20)
+
+    assert (variants, list(warning_counts)) == parse_vcf((HEADER + body).decode("ascii"), return_warnings=True)
+
+
+@pytest.mark.parametrize("annotated", [False, True])
+def test_prefilter_matches_full_parse_on_synthetic_file(annotated):
+    text = synthetic_vcf_text(5000, 0.05, missing_annotation_rate=0.2, annotated=annotated).encode("ascii")
+    header_end = text.index(b"\nchr") + 1
+    body = text[header_end:]
+
+    def run(parser):
+        variants = parser.feed(text[:header_end])
+        # The body takes the pre-filtered path, not the per-line fallback.
+        assert parser._can_prefilter(body[:body.rfind(b"\n")]) == parser.prefilter
+        variants += parser.feed(body) + parser.close()
+        return variants, parser.get_warnings()
+
+    assert run(VCFStreamParser()) == run(FullParseVCFParser())
@@ -0,0 +1,35 @@
+# ==========================================
+# Bounded Executor for Blocking Work
+# ==========================================
+
+import asyncio
+import contextvars
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+from config import PIPELINE_WORKERS
+from utils.profiling import active_profile
+
+# Shared by all requests in the worker so blocking stages never run on
+# the event loop and never spawn unbounded threads.
+PIPELINE_EXECUTOR = ThreadPoolExecutor(
+    max_workers=PIPELINE_WORKERS,
+    thread_name_prefix="pipeline"
+)
+
+
+async def run_blocking(func, *args, **kwargs):
+    """
+    Run ``func`` on the pipeline executor and await its result.
+
+    The caller's context variables are carried over to the worker thread.
+    Inside a profiled request the call runs under that request's profiler.
+    """
+
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    profile = active_profile()
+    if profile is not None:
+        func = functools.partial(profile.run, func)
+    call = functools.partial(context.run, func, *args, **kwargs)
+    return await loop.run_in_executor(PIPELINE_EXECUTOR, call)
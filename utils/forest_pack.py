@@ -0,0 +1,277 @@
+# ==========================================
+# Compiled Random Forest
+# ==========================================
+#
+# Usage: python -m utils.forest_pack
+#
+# Compiles the pickled RandomForest (MODEL_PATH + FEATURES_PATH) into flat
+# NumPy node arrays and writes them to a directory that can be
+# memory-mapped:
+#
+#   forest.json    classes, feature columns, tree roots, depth, source
+#                  pickle hash and parity probes
+#   children.npy   left and right child of every node, interleaved
+#   feature.npy    split feature of every node
+#   threshold.npy  split threshold of every node
+#   values.npy     class probabilities (classes × nodes)
+#
+# All trees share the node arrays; child indices are global and leaves
+# point at themselves, so a batch walks every tree at once for a fixed
+# number of steps. Workers that load the same files share their pages
+# through the OS page cache, and serving needs neither joblib nor
+# scikit-learn.
+
+import hashlib
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+
+from config import MODEL_PATH, FEATURES_PATH, PACKED_MODEL_PATH
+
+PACK_FORMAT_VERSION = 2
+PACKED_ARRAYS = ("children", "feature", "threshold", "values")
+
+# Largest compiled-vs-scikit-learn probability difference accepted.
+PARITY_TOLERANCE = 1e-9
+PARITY_RANDOM_PROBES = 64
+
+# Rows evaluated together; bounds the rows × trees × classes gather.
+EVALUATION_CHUNK_ROWS = 1024
+
+
+class PackedForestError(ValueError):
+    pass
+
+
+def file_sha256(path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        for chunk in iter(lambda: handle.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class CompiledForest:
+    """
+    Forest over flat node arrays, with the ``predict_proba`` / ``classes_``
+    interface the predictor uses.
+
+    Built from a fitted model with ``from_sklearn`` or memory-mapped from a
+    packed directory with ``load``; either way the parity probes are
+    re-evaluated before the forest is used.
+    """
+
+    def __init__(self, arrays, meta):
+        node_count = meta["node_count"]
+        expected_shapes = {
+            "children": (2 * node_count,),
+            "feature": (node_count,),
+            "threshold": (node_count,),
+            "values": (len(meta["classes"]), node_count),
+        }
+        for name, shape in expected_shapes.items():
+            if arrays[name].shape != shape:
+                raise PackedForestError(f"Packed model array {name} does not match forest.json.")
+
+        # Plain ndarray views of the (possibly memory-mapped) arrays: same
+        # pages, without np.memmap's per-result overhead.
+        self.arrays = arrays
+        self.meta = meta
+        self.children = np.asarray(arrays["children"])
+        self.feature = np.asarray(arrays["feature"])
+        self.threshold = np.asarray(arrays["threshold"])
+        self.values = np.asarray(arrays["values"])
+
+        self.classes_ = np.array(meta["classes"], dtype=object)
+        self.feature_columns = list(meta["feature_columns"])
+        self.roots = np.array(meta["roots"], dtype=np.intp)
+        self.max_depth = meta["max_depth"]
+        self.source_sha256 = meta.get("source_sha256")
+
+        self.verify()
+
+    @classmethod
+    def from_sklearn(cls, model, feature_columns, source_sha256=None):
+        """
+        Compile a fitted single-output RandomForestClassifier.
+        """
+
+        children = []
+        features = []
+        thresholds = []
+        values = []
+        roots = []
+        max_depth = 0
+        offset = 0
+
+        for estimator in model.estimators_:
+            tree = estimator.tree_
+            local = np.arange(tree.node_count)
+            leaf = tree.children_left < 0
+
+            pairs = np.empty((tree.node_count, 2), dtype=np.int64)
+            pairs[:, 0] = np.where(leaf, local, tree.children_left) + offset
+            pairs[:, 1] = np.where(leaf, local, tree.children_right) + offset
+            children.append(pairs.reshape(-1))
+            features.append(np.where(leaf, 0, tree.feature))
+            thresholds.append(np.where(leaf, 0.0, tree.threshold))
+
+            # Per-node class fractions, as DecisionTreeClassifier.predict_proba.
+            counts = tree.value[:, 0, :].astype(np.float64)
+            totals = counts.sum(axis=1, keepdims=True)
+            totals[totals == 0] = 1.0
+            values.append(counts / totals)
+
+            roots.append(offset)
+            max_depth = max(max_depth, int(tree.max_depth))
+            offset += tree.node_count
+
+        arrays = {
+            "children": np.concatenate(children),
+            "feature": np.concatenate(features).astype(np.int64),
+            "threshold": np.concatenate(thresholds).astype(np.float64),
+            "values": np.ascontiguousarray(np.concatenate(values).T),
+        }
+
+        probes = _parity_probes(len(feature_columns))
+        meta = {
+            "format": PACK_FORMAT_VERSION,
+            "classes": [str(label) for label in model.classes_],
+            "feature_columns": list(feature_columns),
+            "roots": roots,
+            "max_depth": max_depth,
+            "node_count": offset,
+            "source_sha256": source_sha256,
+            "parity": {
+                "inputs": probes.astype(int).tolist(),
+                "probabilities": _sklearn_proba(model, probes, feature_columns).tolist(),
+            },
+        }
+
+        return cls(arrays, meta)
+
+    @classmethod
+    def load(cls, path=PACKED_MODEL_PATH):
+        path = Path(path)
+        try:
+            with open(path / "forest.json", "r", encoding="utf-8") as handle:
+                meta = json.load(handle)
+        except (OSError, ValueError) as exc:
+            raise PackedForestError(f"Cannot load packed model from {path}: {exc}")
+
+        if meta.get("format") != PACK_FORMAT_VERSION:
+            raise PackedForestError(f"Unsupported packed model format {meta.get('format')!r}.")
+
+        try:
+            arrays = {name: np.load(path / f"{name}.npy", mmap_mode="r") for name in PACKED_ARRAYS}
+        except (OSError, ValueError) as exc:
+            raise PackedForestError(f"Cannot load packed model from {path}: {exc}")
+
+        return cls(arrays, meta)
+
+    def verify(self):
+        """
+        Re-evaluate the parity probes against the probabilities scikit-learn
+        gave at compile time.
+        """
+
+        parity = self.meta.get("parity")
+        if not parity:
+            raise PackedForestError("Packed model has no parity probes.")
+
+        expected = np.array(parity["probabilities"], dtype=np.float64)
+        actual = self.predict_proba(np.array(parity["inputs"], dtype=np.float32))
+        difference = float(np.abs(actual - expected).max()) if expected.size else 0.0
+        if actual.shape != expected.shape or difference > PARITY_TOLERANCE:
+            raise PackedForestError(f"Compiled forest differs from scikit-learn by {difference:.3g}.")
+
+    def predict_proba(self, X):
+        # Same comparison as scikit-learn: float32 features against the
+        # stored thresholds.
+        X = np.asarray(X, dtype=np.float32)
+        if len(X) > 1:
+            # One-hot batches repeat rows; score each distinct row once.
+            distinct, inverse = np.unique(X, axis=0, return_inverse=True)
+            if len(distinct) < len(X):
+                return self._predict_rows(distinct)[inverse.reshape(-1)]
+        return self._predict_rows(X)
+
+    def _predict_rows(self, X):
+        if len(X) <= EVALUATION_CHUNK_ROWS:
+            return self._predict_chunk(X)
+        return np.concatenate([
+            self._predict_chunk(X[start:start + EVALUATION_CHUNK_ROWS])
+            for start in range(0, len(X), EVALUATION_CHUNK_ROWS)
+        ])
+
+    def _predict_chunk(self, X):
+        # node[row, tree]; every tree advances one level per step and
+        # leaves loop onto themselves.
+        width = X.shape[1]
+        flat = np.ascontiguousarray(X).reshape(-1)
+        row_offsets = (np.arange(len(X)) * width)[:, None]
+        node = np.repeat(self.roots[None, :], len(X), axis=0)
+
+        for _ in range(self.max_depth):
+            go_right = flat.take(row_offsets + self.feature.take(node)) > self.threshold.take(node)
+            node = self.children.take(2 * node + go_right)
+
+        probabilities = np.empty((len(X), len(self.classes_)))
+        for column, class_values in enumerate(self.values):
+            probabilities[:, column] = class_values.take(node).sum(axis=1)
+        return probabilities / len(self.roots)
+
+
+def _parity_probes(width: int):
+    """
+    Inputs checked for parity: no feature, each single feature, each pair
+    and a fixed sample of random rows.
+    """
+
+    identity = np.eye(width, dtype=bool)
+    rows = [np.zeros((1, width), dtype=bool), identity]
+    for first in range(width):
+        rows.append(identity[first] | identity[first + 1:])
+    rows.append(np.random.default_rng(0).random((PARITY_RANDOM_PROBES, width)) < 0.5)
+    return np.concatenate(rows).astype(np.float32)
+
+
+def _sklearn_proba(model, X, feature_columns):
+    import pandas as pd
+
+    # Column labels keep scikit-learn's feature-name check quiet.
+    return model.predict_proba(pd.DataFrame(X, columns=list(feature_columns), copy=False))
+
+
+def pack_forest(forest: CompiledForest, path=PACKED_MODEL_PATH):
+    """
+    Write a compiled forest. Each file is written aside and renamed into
+    place, so workers that still map the old files keep a consistent view.
+    """
+
+    path = Path(path)
+    path.mkdir(parents=True, exist_ok=True)
+
+    for name in PACKED_ARRAYS:
+        _replace_file(path / f"{name}.npy", lambda handle: np.save(handle, np.ascontiguousarray(forest.arrays[name])))
+    _replace_file(path / "forest.json", lambda handle: handle.write(json.dumps(forest.meta, indent=2).encode("utf-8")))
+
+
+def _replace_file(path: Path, write):
+    temporary = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with open(temporary, "wb") as handle:
+        write(handle)
+    os.replace(temporary, path)
+
+
+if __name__ == "__main__":
+    import joblib
+
+    pack_forest(CompiledForest.from_sklearn(
+        joblib.load(MODEL_PATH),
+        joblib.load(FEATURES_PATH),
+        source_sha256=file_sha256(MODEL_PATH)
+    ))
+    print(f"✅ Packed {MODEL_PATH.name} into {PACKED_MODEL_PATH}")
@@ -0,0 +1,166 @@
+# ==========================================
+# Latency Metrics
+# ==========================================
+#
+# Per-stage latency histograms and pipeline counters, rendered in the
+# Prometheus text format on /metrics. Every stage timing is also added to
+# the current request's timings (a context variable, so stages that run
+# through run_blocking are included), which the ServerTimingMiddleware
+# sends back as a Server-Timing header. Metrics are per worker process.
+
+import contextvars
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+# Upper bounds (seconds) of the latency histogram buckets.
+STAGE_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+COUNTERS = {
+    "variants_parsed": "PGx variants parsed from uploads.",
+    "malformed_rows": "Malformed VCF data rows skipped.",
+    "llm_fallbacks": "Explanations answered with the static fallback.",
+    "explanation_cache_hits": "LLM explanations served from the explanation cache.",
+    "explanation_cache_misses": "Explanation cache lookups that missed.",
+    "explanation_requests_coalesced": "Explanation requests that waited on an identical in-flight provider call.",
+    "result_cache_hits": "Responses served from the result cache.",
+    "result_cache_misses": "Result cache lookups that missed.",
+}
+
+METRIC_PREFIX = "pharmaguard"
+
+# Scrape and health-probe traffic is neither timed nor counted, so it does
+# not dilute the "request" latency histogram.
+UNTIMED_PATHS = ("/metrics", "/live", "/ready")
+
+_request_timings = contextvars.ContextVar("request_timings", default=None)
+
+
+class Histogram:
+    def __init__(self, bounds=STAGE_BUCKETS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.total += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    """
+    Histograms per stage and named counters, behind one lock.
+    """
+
+    def __init__(self):
+        self.stages = {}
+        self.counters = dict.fromkeys(COUNTERS, 0)
+        self._lock = threading.Lock()
+
+    def observe(self, stage: str, seconds: float):
+        with self._lock:
+            histogram = self.stages.get(stage)
+            if histogram is None:
+                histogram = self.stages[stage] = Histogram()
+            histogram.observe(seconds)
+
+    def increment(self, counter: str, amount=1):
+        with self._lock:
+            self.counters[counter] = self.counters.get(counter, 0) + amount
+
+    def render(self) -> str:
+        """
+        Prometheus text exposition format (version 0.0.4).
+        """
+
+        with self._lock:
+            stages = {
+                stage: (list(histogram.counts), histogram.total, histogram.count)
+                for stage, histogram in self.stages.items()
+            }
+            counters = dict(self.counters)
+
+        name = f"{METRIC_PREFIX}_stage_seconds"
+        lines = [
+            f"# HELP {name} Latency of request pipeline stages.",
+            f"# TYPE {name} histogram",
+        ]
+        for stage in sorted(stages):
+            counts, total, count = stages[stage]
+            cumulative = 0
+            for bound, bucket in zip(STAGE_BUCKETS + (float("inf"),), counts):
+                cumulative += bucket
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f'{name}_bucket{{stage="{stage}",le="{le}"}} {cumulative}')
+            lines.append(f'{name}_sum{{stage="{stage}"}} {total!r}')
+            lines.append(f'{name}_count{{stage="{stage}"}} {count}')
+
+        for counter in sorted(counters):
+            name = f"{METRIC_PREFIX}_{counter}_total"
+            lines.append(f"# HELP {name} {COUNTERS.get(counter, counter)}")
+            lines.append(f"# TYPE {name} counter")
+            lines.append(f"{name} {counters[counter]}")
+
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+
+
+def record_stage(stage: str, seconds: float):
+    metrics.observe(stage, seconds)
+    timings = _request_timings.get()
+    if timings is not None:
+        timings[stage] = timings.get(stage, 0.0) + seconds
+
+
+@contextmanager
+def stage_timer(stage: str):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(stage, time.perf_counter() - started)
+
+
+def server_timing_header(timings, total: float) -> str:
+    entries = [f"{stage};dur={seconds * 1000:.2f}" for stage, seconds in timings.items()]
+    entries.append(f"total;dur={total * 1000:.2f}")
+    return ", ".join(entries)
+
+
+class ServerTimingMiddleware:
+    """
+    ASGI middleware: collects the request's stage timings, records the
+    whole request as the "request" stage and adds a Server-Timing header.
+    """
+
+    def __init__(self, app, excluded_paths=UNTIMED_PATHS):
+        self.app = app
+        self.excluded_paths = set(excluded_paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope.get("path") in self.excluded_paths:
+            await self.app(scope, receive, send)
+            return
+
+        timings = {}
+        token = _request_timings.set(timings)
+        started = time.perf_counter()
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                total = time.perf_counter() - started
+                metrics.observe("request", total)
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", server_timing_header(timings, total).encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _request_timings.reset(token)
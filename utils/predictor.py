@@ -1,28 +1,53 @@
 # utils/predictor.py
 
-import pandas as pd
-from ml_model import model_instance
+import numpy as np
+from ml_model import model_instance, encode_pairs, predict_proba
+
 
 def predict_risk(drug: str, phenotype: str):
 
-    model = model_instance.get_model()
-    feature_columns = model_instance.get_feature_columns()
+    # Fast path: every drug × phenotype the model was trained on is
+    # precomputed at load time.
+    cached = model_instance.lookup_risk(drug, phenotype)
+    if cached is not None:
+        return cached
+
+    return predict_risk_batch([(drug, phenotype)])[0]
+
+
+def predict_risk_batch(pairs):
+    """
+    Predict many (drug, phenotype) pairs at once.
+
+    Pairs in the precomputed table are answered directly. The rest are
+    one-hot encoded straight into a NumPy matrix via the feature column
+    index and scored with a single predict_proba call; labels come from the
+    probability argmax. Returns a list of (risk_label, confidence).
+    """
+
+    # One snapshot, so a concurrent reload cannot mix models and columns.
+    loaded = model_instance.current()
+    results = [None] * len(pairs)
+    misses = []
 
-    input_df = pd.DataFrame([{
-        "drug": drug,
-        "phenotype": phenotype
-    }])
+    for position, (drug, phenotype) in enumerate(pairs):
+        cached = loaded.risk_table.get((drug, phenotype))
+        if cached is not None:
+            results[position] = cached
+        else:
+            misses.append(position)
 
-    input_encoded = pd.get_dummies(input_df)
+    if not misses:
+        return results
 
-    input_encoded = input_encoded.reindex(
-        columns=feature_columns,
-        fill_value=0
-    )
+    model = loaded.model
 
-    prediction = model.predict(input_encoded)[0]
-    probabilities = model.predict_proba(input_encoded)[0]
+    features = encode_pairs([pairs[position] for position in misses], loaded.feature_index, len(loaded.feature_columns))
+    probabilities = predict_proba(model, features, loaded.feature_columns)
+    best = probabilities.argmax(axis=1)
+    confidences = probabilities[np.arange(len(misses)), best]
 
-    confidence_score = float(max(probabilities))
+    for position, index, confidence in zip(misses, best, confidences):
+        results[position] = (str(model.classes_[index]), round(float(confidence), 4))
 
-    return prediction, round(confidence_score, 4)
+    return results
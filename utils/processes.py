@@ -0,0 +1,22 @@
+# ==========================================
+# Process Liveness
+# ==========================================
+
+import os
+
+
+def pid_alive(pid) -> bool:
+    """
+    True if a process with this pid exists on the host; used to tell
+    whether the worker that owns a job or report row is still running.
+    """
+
+    if pid == os.getpid():
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
@@ -0,0 +1,241 @@
+# ==========================================
+# On-Demand Request Profiling
+# ==========================================
+#
+# A request to /analyze* or /predict* with an X-Profile-Token header equal
+# to PROFILE_TOKEN gets a RequestProfile in a context variable. Its
+# blocking stages (run_blocking, or call_profiled in sync endpoints) run
+# under cProfile; the merged stats are written to PROFILE_DIR under the
+# profile ID returned in the X-Profile-Id header. Requests without the
+# header never see a profile and run exactly as before.
+
+import asyncio
+import contextvars
+import cProfile
+import hmac
+import json
+import os
+import pstats
+import re
+import threading
+import time
+import uuid
+
+from config import PROFILE_TOKEN, PROFILE_DIR, PROFILE_MAX_STORED
+
+PROFILE_HEADER = "x-profile-token"
+PROFILED_PATH_PREFIXES = ("/analyze", "/predict")
+
+_active_profile = contextvars.ContextVar("active_profile", default=None)
+
+# Only one cProfile profiler may be active at a time on some Python
+# versions, so profiled calls from concurrent requests take turns.
+_profiler_lock = threading.Lock()
+
+_PROFILE_ID = re.compile(r"^[0-9a-f]{32}$")
+
+
+def profile_token_valid(value) -> bool:
+    if not PROFILE_TOKEN or not value:
+        return False
+    return hmac.compare_digest(value.encode("utf-8"), PROFILE_TOKEN.encode("utf-8"))
+
+
+class RequestProfile:
+    """
+    cProfile stats merged over every profiled call of one request.
+    """
+
+    def __init__(self, path: str):
+        self.profile_id = uuid.uuid4().hex
+        self.path = path
+        self.calls = 0
+        self.stats = None
+        self.started = time.perf_counter()
+
+    def run(self, func, *args, **kwargs):
+        with _profiler_lock:
+            profiler = cProfile.Profile()
+            try:
+                return profiler.runcall(func, *args, **kwargs)
+            finally:
+                self.calls += 1
+                if self.stats is None:
+                    self.stats = pstats.Stats(profiler)
+                else:
+                    self.stats.add(profiler)
+
+
+def active_profile():
+    return _active_profile.get()
+
+
+def call_profiled(func, *args, **kwargs):
+    """
+    Run ``func`` under the current request's profile, if it has one.
+    """
+
+    profile = _active_profile.get()
+    if profile is None:
+        return func(*args, **kwargs)
+    return profile.run(func, *args, **kwargs)
+
+
+class ProfileStore:
+    """
+    Profiles on disk: ``<id>.pstats`` plus ``<id>.json`` metadata. Only the
+    newest ``max_stored`` are kept. A shared directory lets any worker
+    serve a profile recorded by another.
+    """
+
+    def __init__(self, directory: str = PROFILE_DIR, max_stored: int = PROFILE_MAX_STORED):
+        self.directory = directory
+        self.max_stored = max_stored
+
+    def _path(self, profile_id: str, suffix: str):
+        if not _PROFILE_ID.match(profile_id):
+            return None
+        return os.path.join(self.directory, f"{profile_id}{suffix}")
+
+    def save(self, profile: RequestProfile, status_code):
+        os.makedirs(self.directory, exist_ok=True)
+        if profile.stats is not None:
+            profile.stats.dump_stats(self._path(profile.profile_id, ".pstats"))
+
+        meta = {
+            "profile_id": profile.profile_id,
+            "path": profile.path,
+            "status_code": status_code,
+            "wall_seconds": round(time.perf_counter() - profile.started, 6),
+            "profiled_calls": profile.calls,
+            "created": time.time(),
+        }
+        with open(self._path(profile.profile_id, ".json"), "w", encoding="utf-8") as handle:
+            json.dump(meta, handle)
+
+        self._prune()
+
+    def _prune(self):
+        metas = sorted(
+            (entry for entry in os.scandir(self.directory) if entry.name.endswith(".json")),
+            key=lambda entry: entry.stat().st_mtime
+        )
+        for entry in metas[:max(0, len(metas) - self.max_stored)]:
+            profile_id = entry.name[:-len(".json")]
+            for suffix in (".json", ".pstats"):
+                try:
+                    os.remove(os.path.join(self.directory, f"{profile_id}{suffix}"))
+                except FileNotFoundError:
+                    pass
+
+    def meta(self, profile_id: str):
+        path = self._path(profile_id, ".json")
+        if path is None or not os.path.exists(path):
+            return None
+        with open(path, "r", encoding="utf-8") as handle:
+            return json.load(handle)
+
+    def stats_path(self, profile_id: str):
+        path = self._path(profile_id, ".pstats")
+        if path is None or not os.path.exists(path):
+            return None
+        return path
+
+    def summary(self, profile_id: str, limit: int = 30):
+        """
+        Metadata plus the top functions by cumulative time, or None.
+        """
+
+        meta = self.meta(profile_id)
+        if meta is None:
+            return None
+
+        functions = []
+        path = self.stats_path(profile_id)
+        if path is not None:
+            stats = pstats.Stats(path)
+            ranked = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)
+            for (filename, line, name), (_, calls, own, cumulative, _) in ranked[:limit]:
+                functions.append({
+                    "function": f"{filename}:{line}({name})",
+                    "calls": calls,
+                    "own_seconds": round(own, 6),
+                    "cumulative_seconds": round(cumulative, 6),
+                })
+
+        return {**meta, "functions": functions}
+
+
+profile_store = ProfileStore()
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware that turns on profiling for requests carrying a valid
+    profile token; a token on a profiled path that does not match (or
+    profiling being disabled) is answered with 403.
+    """
+
+    def __init__(self, app, store: ProfileStore = profile_store):
+        self.app = app
+        self.store = store
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith(PROFILED_PATH_PREFIXES):
+            await self.app(scope, receive, send)
+            return
+
+        token = None
+        for key, value in scope.get("headers", ()):
+            if key == PROFILE_HEADER.encode("latin-1"):
+                token = value.decode("latin-1")
+                break
+
+        if token is None:
+            await self.app(scope, receive, send)
+            return
+
+        if not profile_token_valid(token):
+            await _send_forbidden(send)
+            return
+
+        profile = RequestProfile(scope["path"])
+        status = {}
+
+        async def send_with_profile(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((b"x-profile-id", profile.profile_id.encode("latin-1")))
+                headers.append((b"x-profile-url", f"/profiles/{profile.profile_id}".encode("latin-1")))
+                message = {**message, "headers": headers}
+            elif message["type"] == "http.response.body" and not message.get("more_body", False):
+                # Stored before the last body chunk goes out, so the
+                # profile exists once the client has the response. Dumping
+                # and pruning are file I/O: kept off the event loop.
+                await asyncio.to_thread(self.store.save, profile, status.get("code"))
+            await send(message)
+
+        context_token = _active_profile.set(profile)
+        try:
+            await self.app(scope, receive, send_with_profile)
+        finally:
+            _active_profile.reset(context_token)
+
+
+async def _send_forbidden(send):
+    message = "Profiling is disabled or the profile token is invalid."
+    body = json.dumps({
+        "detail": {
+            "code": "PROFILING_FORBIDDEN",
+            "message": message,
+            "user_message": message,
+            "hint": "Send the configured PROFILE_TOKEN in the X-Profile-Token header."
+        }
+    }).encode("utf-8")
+    await send({
+        "type": "http.response.start",
+        "status": 403,
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode("latin-1"))],
+    })
+    await send({"type": "http.response.body", "body": body})